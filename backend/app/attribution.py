@@ -0,0 +1,235 @@
+# app/attribution.py
+"""
+Exact feature attributions for the served GradientBoosting model.
+
+Values are path-dependent TreeSHAP in log-odds space: for every matchup they
+sum to model logit minus expected_value. Instead of walking each tree per
+sample, every leaf is decomposed once into the features on its path, the
+interval each feature must fall in to reach it, and the cover fraction taken
+when that feature is unknown. A leaf's contribution is then a product game
+over at most max_depth players, so Shapley values for a whole batch come out
+of a handful of numpy operations over (samples x leaves x path slots).
+
+Results are cached per (data version, canonical matchup); the upcoming cards
+are precomputed at startup so their explains are cache hits.
+"""
+
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from math import factorial
+from pathlib import Path
+
+import numpy as np
+
+from app import config
+from app import utils
+
+UPCOMING_PATH = Path(__file__).resolve().parent.parent / "data" / "upcoming_cards.json"
+
+
+def _flat_trees(model) -> dict:
+    """Tree arrays for either a sklearn GBM or a snapshot FlatGradientBoosting."""
+    if hasattr(model, "left") and hasattr(model, "cover"):
+        return {
+            "left": np.asarray(model.left), "right": np.asarray(model.right),
+            "feature": np.asarray(model.feature), "threshold": np.asarray(model.threshold),
+            "value": np.asarray(model.value), "cover": np.asarray(model.cover),
+            "learning_rate": model.learning_rate, "init_raw": model.init_raw,
+            "n_features": model.n_features_in_,
+        }
+    if type(model).__name__ == "GradientBoostingClassifier" and len(model.classes_) == 2:
+        from app.snapshot import _flatten_gbm
+        flat = _flatten_gbm(model)
+        meta = flat.pop("meta")
+        flat.update(learning_rate=meta["learning_rate"], init_raw=meta["init_raw"], n_features=meta["n_features"])
+        return flat
+    raise ValueError(f"Exact attributions need a binary GradientBoostingClassifier, got {type(model).__name__}")
+
+
+class TreeAttributor:
+    def __init__(self, model):
+        t = _flat_trees(model)
+        lr = t["learning_rate"]
+        self.n_features = t["n_features"]
+
+        leaves = []  # (value, {feature: [lo, hi, cover_ratio]})
+        expected = t["init_raw"]
+        for tree in range(t["left"].shape[0]):
+            left, right = t["left"][tree], t["right"][tree]
+            feat, thr, cover = t["feature"][tree], t["threshold"][tree], t["cover"][tree]
+            root_cover = cover[0]
+            stack = [(0, {})]
+            while stack:
+                node, conds = stack.pop()
+                if left[node] == -1:
+                    value = lr * t["value"][tree, node]
+                    expected += value * cover[node] / root_cover
+                    leaves.append((value, conds))
+                    continue
+                d = int(feat[node])
+                lo, hi, ratio = conds.get(d, (-np.inf, np.inf, 1.0))
+                for child, go_left in ((left[node], True), (right[node], False)):
+                    c = dict(conds)
+                    c[d] = (lo, min(hi, thr[node]), ratio * cover[child] / cover[node]) if go_left \
+                        else (max(lo, thr[node]), hi, ratio * cover[child] / cover[node])
+                    stack.append((child, c))
+
+        n_leaves = len(leaves)
+        slots = max(1, max(len(c) for _, c in leaves))
+        self.slots = slots
+        self.expected_value = float(expected)
+        self.leaf_value = np.array([v for v, _ in leaves])
+        self.slot_feature = np.zeros((n_leaves, slots), dtype=np.int64)
+        self.slot_lo = np.full((n_leaves, slots), -np.inf)
+        self.slot_hi = np.full((n_leaves, slots), np.inf)
+        self.slot_cover = np.ones((n_leaves, slots))
+        self.slot_real = np.zeros((n_leaves, slots), dtype=bool)
+        for i, (_, conds) in enumerate(leaves):
+            for j, (d, (lo, hi, ratio)) in enumerate(sorted(conds.items())):
+                self.slot_feature[i, j] = d
+                self.slot_lo[i, j] = lo
+                self.slot_hi[i, j] = hi
+                self.slot_cover[i, j] = ratio
+                self.slot_real[i, j] = True
+        self.n_players = self.slot_real.sum(axis=1)
+
+        # Shapley weight |S|!(k-|S|-1)!/k! for every leaf's k and subset size
+        k_max = slots
+        table = np.zeros((k_max + 1, k_max))
+        for k in range(1, k_max + 1):
+            for s in range(k):
+                table[k, s] = factorial(s) * factorial(k - s - 1) / factorial(k)
+        self._weight_table = table
+
+    def shap_values(self, X_scaled) -> np.ndarray:
+        """Exact TreeSHAP values, shape (n_samples, n_features), in log-odds."""
+        # Same float32 comparison semantics as sklearn's tree traversal
+        X = np.asarray(X_scaled, dtype=np.float32).astype(np.float64)
+        n = X.shape[0]
+        x_slot = X[:, self.slot_feature]  # (n, leaves, slots)
+        a = ((x_slot > self.slot_lo) & (x_slot <= self.slot_hi)).astype(np.float64)
+        a = np.where(self.slot_real, a, 1.0)
+        b = self.slot_cover
+
+        phi_slots = np.zeros((n, len(self.leaf_value), self.slots))
+        for i in range(self.slots):
+            others = [j for j in range(self.slots) if j != i]
+            acc = np.zeros((n, len(self.leaf_value)))
+            for mask in itertools.product((False, True), repeat=len(others)):
+                in_s = [j for j, m in zip(others, mask) if m]
+                # subsets may only contain real players of the leaf
+                valid = self.slot_real[:, in_s].all(axis=1) if in_s else np.ones(len(self.leaf_value), dtype=bool)
+                weight = self._weight_table[self.n_players, len(in_s)] * valid
+                term = np.ones((n, len(self.leaf_value)))
+                for j in others:
+                    term = term * (a[:, :, j] if j in in_s else b[:, j])
+                acc += weight * term
+            phi_slots[:, :, i] = acc * (a[:, :, i] - b[:, i]) * self.slot_real[:, i]
+
+        phi = np.zeros((n, self.n_features))
+        contrib = phi_slots * self.leaf_value[None, :, None]
+        for i in range(self.slots):
+            np.add.at(phi.T, self.slot_feature[:, i], contrib[:, :, i].T)
+        return phi
+
+
+class AttributionEngine:
+    def __init__(self, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._attributor = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def attributor(self) -> TreeAttributor:
+        if self._attributor is None:
+            with self._lock:
+                if self._attributor is None:
+                    self._attributor = TreeAttributor(utils.model)
+        return self._attributor
+
+    @staticmethod
+    def _key(f1: dict, f2: dict):
+        a, b = sorted([f1["name"].strip().lower(), f2["name"].strip().lower()])
+        return (utils.DATA_VERSION, a, b)
+
+    def _compute(self, pairs: list) -> list:
+        """Canonical-order attributions for many (f1, f2) dicts in one pass."""
+        canonical = [tuple(sorted(p, key=lambda d: d["name"].strip().lower())) for p in pairs]
+        X = np.vstack([utils.build_feature_vector(a, b).to_numpy(dtype=np.float64) for a, b in canonical])
+        X_scaled = utils.scaler.transform(X)
+        phi = self.attributor.shap_values(X_scaled)
+        proba = utils.model.predict_proba(X_scaled)[:, 1]
+        return [
+            {
+                "canonical_order": [a["name"], b["name"]],
+                "features": list(utils.feature_names),
+                "feature_values": [float(v) for v in X[i]],
+                "shap_values": [float(v) for v in phi[i]],
+                "expected_value": self.attributor.expected_value,
+                "model_proba_canonical_f1": float(proba[i]),
+            }
+            for i, (a, b) in enumerate(canonical)
+        ]
+
+    def explain_pairs(self, pairs: list) -> list:
+        keys = [self._key(f1, f2) for f1, f2 in pairs]
+        results = [None] * len(pairs)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[i] = self._cache[key]
+                    self.hits += 1
+                else:
+                    missing.append(i)
+                    self.misses += 1
+
+        if missing:
+            computed = self._compute([pairs[i] for i in missing])
+            with self._lock:
+                for i, res in zip(missing, computed):
+                    results[i] = res
+                    self._cache[keys[i]] = res
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return results
+
+    def explain(self, f1: dict, f2: dict) -> dict:
+        return self.explain_pairs([(f1, f2)])[0]
+
+    def precompute_upcoming(self, path=UPCOMING_PATH) -> int:
+        """Fill the cache for every explainable upcoming-card bout."""
+        if not Path(path).exists():
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            cards = json.load(f)
+        pairs = []
+        for event in cards:
+            for fight in event.get("fights", []):
+                f1 = utils.get_fighter_stats(fight.get("fighter_red") or "")
+                f2 = utils.get_fighter_stats(fight.get("fighter_blue") or "")
+                if f1 and f2 and not utils.should_be_tossup(f1, f2):
+                    pairs.append((f1, f2))
+        if pairs:
+            self.explain_pairs(pairs)
+        return len(pairs)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+attribution_engine = AttributionEngine(cache_size=config.ATTRIBUTION_CACHE_SIZE)
+
+
+def orient(result: dict, fighter1_name: str) -> dict:
+    """Flip a canonical attribution so positive values favour fighter1_name."""
+    flip = result["canonical_order"][0].strip().lower() != fighter1_name.strip().lower()
+    sign = -1.0 if flip else 1.0
+    values = [sign * v for v in result["shap_values"]]
+    return {**result, "shap_values": values, "expected_value": sign * result["expected_value"]}
@@ -0,0 +1,329 @@
+# app/backtest.py
+"""
+Historical backtest of the served model and its confidence boosts.
+
+Every UFC bout between two fighters in the DB is replayed in date order,
+with each fighter as of the fight date (same-day bouts never see each
+other). Record and strikes landed/absorbed and takedowns per minute are one
+vectorized as-of lookup in the point-in-time feature store; form, streak and
+opponents' records come from the fights before the date. Striking accuracy,
+striking defence and takedown defence need attempt counts the histories
+don't carry, so those three (and height/reach) are today's career values.
+The same goes for opponent strength (utils.opponent_strength): its record
+part is each opponent's record on the bout date, its defence part today's.
+
+By default only bouts after the served model's bouts_through date (from its
+registry manifest) are replayed, since the model was trained on everything
+up to it. --in-sample replays every bout; those numbers measure fit, not
+predictive skill, and the report says so.
+
+Shards of bouts are scored in a process pool: each worker builds the model
+rows with utils.prepare_match, runs one batched scaler/model call, and then
+runs utils.apply_boosts (the served boost logic) under every combination of
+APPLY_FORM_BOOST, APPLY_STREAK_BOOST and APPLY_STAT_DOMINANCE_BONUS. The
+opponent-strength boost follows config, using point-in-time opponent records.
+
+The served probability is apply_boosts' boosted P(win), not the displayed
+confidence. Toss-ups (< 3 UFC fights), draws and no contests are left out of
+the metrics. Results go to logs/backtest.json.
+
+    python -m app.backtest --workers 8 --since 2010
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from app import config
+from app import utils
+from app.feature_store import FeatureStore
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+REPORT_PATH = BACKEND_DIR / "logs" / "backtest.json"
+
+BOOST_FLAGS = ("APPLY_FORM_BOOST", "APPLY_STREAK_BOOST", "APPLY_STAT_DOMINANCE_BONUS")
+CALIBRATION_EDGES = [0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 1.0001]
+
+
+def _norm(name) -> str:
+    return " ".join((name or "").lower().split())
+
+
+def _dated_ufc_fights(row) -> list:
+    """A fighters_df row's dated UFC fights as (day, fight), oldest first."""
+    fights = []
+    for fight in utils.fighter_history(row) or []:
+        if "UFC" in fight.get("event", ""):
+            day = utils.parse_event_date(fight.get("event"))
+            if day is not None:
+                fights.append((day, fight))
+    return sorted(fights, key=lambda df: df[0])
+
+
+def load_bouts(since=None) -> list:
+    """
+    UFC bouts between two fighters in the DB, in date order:
+    {"date", "a", "b", "winner"} with a < b by name and winner "a" / "b" /
+    None (draw or no contest).
+    """
+    names = dict(zip(utils.fighters_df["name"].map(_norm), utils.fighters_df["name"]))
+    bouts = {}
+    for _, row in utils.fighters_df.iterrows():
+        me = _norm(row["name"])
+        for day, fight in _dated_ufc_fights(row):
+            opp = _norm(fight.get("opponent"))
+            if opp not in names:
+                continue
+            a, b = sorted([me, opp])
+            bout = bouts.setdefault((day, a, b), {"date": day, "a": names[a], "b": names[b], "winner": None})
+            result = utils.safe_result(fight)
+            if result in ("win", "loss"):
+                bout["winner"] = ("a" if me == a else "b") if result == "win" else ("b" if me == a else "a")
+
+    out = sorted(bouts.values(), key=lambda b: (b["date"], b["a"], b["b"]))
+    if since:
+        out = [b for b in out if b["date"] >= date(since, 1, 1)]
+    return out
+
+
+def served_bouts_through():
+    """Date of the last bout the served model was trained on, from its registry manifest."""
+    from app import model_registry
+
+    try:
+        return model_registry.read_manifest(utils.MODEL_VERSION)["training"].get("bouts_through")
+    except (model_registry.RegistryError, OSError, KeyError, ValueError):
+        return None
+
+
+def point_in_time_matchups(bouts: list) -> list:
+    """(f1, f2, f1_won) per decided bout, with each fighter as of the bout date."""
+    store = FeatureStore.from_fighters(utils.fighters_df)
+    static, histories, defence = {}, {}, {}
+    for _, row in utils.fighters_df.iterrows():
+        static[row["name"]] = {
+            "name": row["name"], "weight": row["weight"], "height": row["height"], "reach": row["reach"],
+            "TD Def.": row["TD Def."], "Str. Acc.": row["Str. Acc."], "Str. Def": row["Str. Def"],
+        }
+        fights = _dated_ufc_fights(row)
+        histories[row["name"]] = ([d for d, _ in fights], [f for _, f in fights])
+        defence[_norm(row["name"])] = (row["TD Def."] + row["Str. Def"]) / 200
+
+    decided = [b for b in bouts if b["winner"] is not None]
+    sides = [(b["a"], b["date"]) for b in decided] + [(b["b"], b["date"]) for b in decided]
+    days = store.days(d for _, d in sides)
+    stats, _ = store.as_of(store.ids(n for n, _ in sides), days,
+                           ["slpm", "sapm", "td_avg", "wins", "losses", "draws"])
+
+    # Prior fights going into each bout, newest first, and their opponents' records on the bout date
+    prior = []
+    for name, day in sides:
+        days_fought, fights = histories[name]
+        prior.append(fights[:bisect.bisect_left(days_fought, day)][::-1])
+    counts = [len(p) for p in prior]
+    seg = np.repeat(np.arange(len(sides)), counts)
+    opp_names = [_norm(f.get("opponent")) for p in prior for f in p]
+    opp_stats, _ = store.as_of(store.ids(opp_names), days[seg], ["wins", "losses", "draws"])
+    opp_record = np.column_stack([np.bincount(seg, opp_stats[:, k], minlength=len(sides)) for k in range(3)])
+
+    # utils.opponent_strength per prior fight: 0.6 x defence (today's) + 0.4 x record (as of the bout);
+    # 0.5 for opponents outside the DB
+    total = opp_stats.sum(axis=1)
+    record_score = np.divide(opp_stats[:, 0], total, out=np.full(len(total), 0.5), where=total > 0)
+    def_score = np.array([defence.get(n, np.nan) for n in opp_names], dtype=np.float64)
+    opp_strength = np.where(np.isnan(def_score), 0.5, np.round(0.6 * def_score + 0.4 * record_score, 4))
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    fighters = []
+    for i, (name, _) in enumerate(sides):
+        fights = prior[i]
+        strength = opp_strength[offsets[i]:offsets[i + 1]]
+        streak, weight_sum = 0.0, 0.0
+        for f, s in zip(fights[:5], strength):  # utils.win_streak_score with point-in-time strength
+            r = utils.safe_result(f)
+            if r == "win":
+                w = utils.fight_recency_weight(f)
+                streak += s * w
+                weight_sum += w
+            elif r in {"nc", "draw"}:
+                continue
+            else:
+                break
+        slpm, sapm, td_avg, wins, losses, draws = stats[i]
+        fighters.append({
+            **static[name],
+            "SLpM": slpm,
+            "SApM": sapm,
+            "TD Avg.": td_avg,
+            "fight_history": fights,
+            "recent_form_score": utils.recent_form_score(fights),
+            "win_streak_score": round(streak / 5, 4) if weight_sum else 0.0,
+            "avg_opp_strength": float(np.mean(strength[:5])) if fights else 0.5,
+            "last_results": utils.get_last_results(fights),
+            "ufc_wins": int(wins),
+            "ufc_losses": int(losses),
+            "ufc_draws": int(draws),
+            # opponents' UFC records as of this bout, for the opponent-strength boost
+            "opp_record": tuple(int(v) for v in opp_record[i]),
+        })
+
+    n = len(decided)
+    return [(fighters[i], fighters[n + i], b["winner"] == "a") for i, b in enumerate(decided)]
+
+
+def flag_grid() -> list:
+    return [dict(zip(BOOST_FLAGS, values)) for values in itertools.product([True, False], repeat=len(BOOST_FLAGS))]
+
+
+def served_proba(prepared: dict, raw_proba: float, flags: dict) -> float:
+    """P(canonical f1 wins) after utils.apply_boosts, with explicit flags and point-in-time opponent records."""
+    f1, f2 = prepared["f1"], prepared["f2"]
+    p = 1 - raw_proba if prepared["reverse"] else raw_proba
+    if prepared["reverse"]:
+        f1, f2 = f2, f1
+    flags = {**flags, "APPLY_OPP_STRENGTH_BOOST": config.APPLY_OPP_STRENGTH_BOOST}
+    boosted, _, _ = utils.apply_boosts(f1, f2, p, flags, (f1["opp_record"], f2["opp_record"]))
+    return 1 - boosted if prepared["reverse"] else boosted
+
+
+def score_shard(matchups: list) -> dict:
+    """Worker: P(f1 wins) from the raw model and from every boost combination."""
+    prepared = [utils.prepare_match(f1, f2) for f1, f2, _ in matchups]
+    keep = [i for i, p in enumerate(prepared) if "result" not in p]
+    probas = utils.score_matches([prepared[i] for i in keep])
+
+    raw, served = [], {i: [] for i in range(len(flag_grid()))}
+    for i, proba in zip(keep, probas):
+        raw.append(1 - proba if prepared[i]["reverse"] else proba)
+        for c, flags in enumerate(flag_grid()):
+            served[c].append(served_proba(prepared[i], proba, flags))
+    return {
+        "y": [matchups[i][2] for i in keep],
+        "raw": raw,
+        "served": served,
+        "tossups": len(matchups) - len(keep),
+    }
+
+
+def metrics(y: np.ndarray, p: np.ndarray) -> dict:
+    """Accuracy, log-loss, Brier score and a reliability table for P(f1 wins)."""
+    if len(y) == 0:
+        return {"n": 0}
+    y = y.astype(np.float64)
+    pc = np.clip(p, 1e-6, 1 - 1e-6)
+    pick = np.where(p >= 0.5, p, 1 - p)
+    hit = (p >= 0.5) == (y == 1)
+    bins = np.digitize(pick, CALIBRATION_EDGES) - 1
+
+    calibration, ece = [], 0.0
+    for k in range(len(CALIBRATION_EDGES) - 1):
+        mask = bins == k
+        if not mask.any():
+            continue
+        predicted, observed = float(pick[mask].mean()), float(hit[mask].mean())
+        ece += mask.sum() / len(y) * abs(predicted - observed)
+        calibration.append({
+            "bin": f"{CALIBRATION_EDGES[k]:.2f}-{min(CALIBRATION_EDGES[k + 1], 1.0):.2f}",
+            "n": int(mask.sum()),
+            "mean_predicted": round(predicted, 4),
+            "hit_rate": round(observed, 4),
+        })
+    return {
+        "n": int(len(y)),
+        "accuracy": round(float(hit.mean()), 4),
+        "log_loss": round(float(-np.mean(y * np.log(pc) + (1 - y) * np.log(1 - pc))), 4),
+        "brier": round(float(np.mean((p - y) ** 2)), 4),
+        "ece": round(ece, 4),
+        "calibration": calibration,
+    }
+
+
+def run_backtest(workers=None, since=None, shards_per_worker=4, in_sample=False) -> dict:
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    bouts_through = served_bouts_through()
+    all_bouts = load_bouts(since)
+    bouts = all_bouts
+    if not in_sample and bouts_through:
+        cutoff = date.fromisoformat(str(bouts_through)[:10])
+        bouts = [b for b in all_bouts if b["date"] > cutoff]
+    matchups = point_in_time_matchups(bouts)
+    t1 = time.perf_counter()
+
+    n_shards = max(1, min(len(matchups), workers * shards_per_worker))
+    shards = [matchups[i::n_shards] for i in range(n_shards)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(score_shard, shards))
+    else:
+        parts = [score_shard(s) for s in shards]
+    t2 = time.perf_counter()
+
+    y = np.array([v for part in parts for v in part["y"]], dtype=bool)
+    grid = flag_grid()
+    report = {
+        "bouts": len(bouts),
+        "decided_bouts": len(matchups),
+        "tossups": sum(part["tossups"] for part in parts),
+        "since": since,
+        "model_version": utils.MODEL_VERSION,
+        "model_bouts_through": bouts_through,
+        # True when the replayed bouts overlap the served model's training data
+        "in_sample": bool(in_sample or not bouts_through),
+        "in_sample_bouts_skipped": len(all_bouts) - len(bouts),
+        "apply_opp_strength_boost": config.APPLY_OPP_STRENGTH_BOOST,
+        "model": metrics(y, np.array([v for part in parts for v in part["raw"]])),
+        "combinations": [
+            {"flags": flags, **metrics(y, np.array([v for part in parts for v in part["served"][c]]))}
+            for c, flags in enumerate(grid)
+        ],
+        "timing_s": {"features": round(t1 - t0, 2), "scoring": round(t2 - t1, 2), "workers": workers},
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--since", type=int, default=None, help="only bouts from this year on")
+    parser.add_argument("--in-sample", action="store_true",
+                        help="also replay bouts the served model was trained on")
+    parser.add_argument("--out", default=str(REPORT_PATH))
+    args = parser.parse_args()
+
+    report = run_backtest(args.workers, args.since, in_sample=args.in_sample)
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"📈 {report['decided_bouts']} decided bouts ({report['tossups']} toss-ups left out), "
+          f"features {report['timing_s']['features']}s, scoring {report['timing_s']['scoring']}s "
+          f"on {report['timing_s']['workers']} workers")
+    if report["in_sample"]:
+        print(f"⚠️ In-sample: {report['model_version']} was trained on these bouts "
+              f"(bouts_through {report['model_bouts_through'] or 'unknown'}); this measures fit, not skill")
+    else:
+        print(f"   Out-of-sample: bouts after {report['model_bouts_through']} "
+              f"({report['in_sample_bouts_skipped']} training-period bouts skipped)")
+    m = report["model"]
+    if not m["n"]:
+        return
+    print(f"   {'raw model':<28} acc={m['accuracy']:.3f}  logloss={m['log_loss']:.3f}  "
+          f"brier={m['brier']:.3f}  ece={m['ece']:.3f}")
+    for combo in report["combinations"]:
+        label = " ".join(("+" if on else "-") + k.split("_")[1].lower() for k, on in combo["flags"].items())
+        print(f"   {label:<28} acc={combo['accuracy']:.3f}  logloss={combo['log_loss']:.3f}  "
+              f"brier={combo['brier']:.3f}  ece={combo['ece']:.3f}")
+    print(f"💾 Report → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# app/batching.py
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import Counter
+
+from app import config
+from app.utils import prepare_match, score_matches, finalize_match
+
+
+class InferenceBatcher:
+    """
+    Coalesces concurrent predict requests into micro-batches.
+
+    The first request to arrive opens a window of `window_ms`; everything that
+    lands before it closes (or until `max_batch_size` is reached) goes through
+    the scaler and model as a single call on a worker thread. Each caller gets
+    its own future back, resolved with the same tuple `predict_match` returns.
+    """
+
+    def __init__(self, window_ms: float = 5.0, max_batch_size: int = 64):
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self._queue = None
+        self._loop = None
+        self._worker = None
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = Counter()
+        self.total_wait_ms = 0.0
+        self.total_batch_ms = 0.0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+        # New (or restarted) event loop, e.g. after a reload or in tests
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._worker = loop.create_task(self._run())
+
+    async def submit(self, f1: dict, f2: dict):
+        """Queue one matchup and wait for its prediction tuple."""
+        self._ensure_started()
+        future = self._loop.create_future()
+        # Carry the caller's context (request id, trace) into the batch thread
+        ctx = contextvars.copy_context()
+        await self._queue.put((f1, f2, future, ctx, time.perf_counter()))
+        self.submitted += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.window_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            # Drain whatever is already waiting before sleeping on the window
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            outcomes = await self._loop.run_in_executor(None, self._run_batch, batch)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            with self._lock:
+                self.batches += 1
+                self.batch_sizes[len(batch)] += 1
+                self.last_batch_size = len(batch)
+                self.last_batch_ms = elapsed_ms
+                self.total_batch_ms += elapsed_ms
+                self.total_wait_ms += sum((started - item[4]) * 1000 for item in batch)
+
+            for (_, _, future, _, _), (result, error) in zip(batch, outcomes):
+                if future.done():
+                    continue  # caller went away
+                if error is not None:
+                    self.failed += 1
+                    future.set_exception(error)
+                else:
+                    self.completed += 1
+                    future.set_result(result)
+
+    @staticmethod
+    def _run_batch(batch):
+        """Prepare per item, score once, finalize per item. Runs on a worker thread."""
+        prepared = []
+        errors = []
+        for f1, f2, _, ctx, _ in batch:
+            try:
+                prepared.append(ctx.run(prepare_match, f1, f2))
+                errors.append(None)
+            except Exception as e:
+                prepared.append({"result": None})
+                errors.append(e)
+
+        try:
+            probas = score_matches([p for p, e in zip(prepared, errors) if e is None])
+        except Exception as e:
+            return [(None, err or e) for err in errors]
+
+        outcomes = []
+        proba_iter = iter(probas)
+        for (_, _, _, ctx, _), p, err in zip(batch, prepared, errors):
+            if err is not None:
+                outcomes.append((None, err))
+                continue
+            try:
+                outcomes.append((ctx.run(finalize_match, p, next(proba_iter)), None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+
+    def stats(self) -> dict:
+        with self._lock:
+            batches = self.batches
+            return {
+                "window_ms": self.window_ms,
+                "max_batch_size": self.max_batch_size,
+                "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+                "max_queue_depth": self.max_queue_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "batches": batches,
+                "avg_batch_size": round((self.completed + self.failed) / batches, 2) if batches else 0.0,
+                "avg_queue_wait_ms": round(self.total_wait_ms / max(self.completed + self.failed, 1), 3),
+                "avg_batch_ms": round(self.total_batch_ms / batches, 3) if batches else 0.0,
+                "last_batch_size": self.last_batch_size,
+                "last_batch_ms": round(self.last_batch_ms, 3),
+                "batch_size_histogram": {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            }
+
+
+inference_batcher = InferenceBatcher(
+    window_ms=config.BATCH_WINDOW_MS,
+    max_batch_size=config.BATCH_MAX_SIZE,
+)
@@ -10,11 +10,59 @@ APPLY_STAT_DOMINANCE_BONUS = True
 # Toggle UI-only champion badge
 DISPLAY_CHAMPION_BADGE = True
 
-# Logging verbosity
-DEBUG_LOGGING = True
+# Logging verbosity: traces every request and echoes trace events to stdout
+DEBUG_LOGGING = False
+
+# Structured prediction traces, retrievable at /debug/traces/{request_id}
+TRACE_SAMPLE_RATE = 0.0  # fraction of requests traced; an X-Trace: 1 header forces one
+TRACE_BUFFER_SIZE = 500  # finished traces kept in memory
+
+# Toggle opponent-quality boost (UFC win% of past opponents)
+APPLY_OPP_STRENGTH_BOOST = True
 
 # Max allowed confidence boost above raw model base
 MAX_BOOST = 35.0
 
-# Static model version
-MODEL_VERSION = "v1.2.3"
\ No newline at end of file
+# Win probability given to the recent-rematch override's pick (shown as 90 confidence).
+# A fixed prior, not a model output; the card simulator and backtest draw from it
+REMATCH_OVERRIDE_PROBA = 0.9
+
+# Check registered model files against their manifest hashes at startup
+# (the served model version comes from the promoted manifest, see app/model_registry.py)
+MODEL_REGISTRY_VERIFY = True
+
+# Micro-batching for /predict: requests arriving within the window share one model call
+BATCHING_ENABLED = True
+BATCH_WINDOW_MS = 5.0
+BATCH_MAX_SIZE = 64
+
+# Prediction log sink (logs/predictions.log): batched background writes, rotated + gzipped
+PREDICTION_LOG_FLUSH_RECORDS = 200
+PREDICTION_LOG_FLUSH_SECONDS = 1.0
+PREDICTION_LOG_MAX_BYTES = 20 * 1024 * 1024
+PREDICTION_LOG_BACKUPS = 14
+
+# Shadow evaluation: challenger models scored on /predict traffic off the request path (logs/shadow.log)
+SHADOW_CHALLENGERS = []  # registry versions or model dirs, e.g. ["v1.1.0"] or ["saved/old_model_info"]
+SHADOW_BATCH_SIZE = 256
+SHADOW_FLUSH_SECONDS = 2.0
+SHADOW_QUEUE_SIZE = 10_000  # matchups waiting beyond this are dropped, never waited on
+
+# /explain: exact TreeSHAP results cached per (data version, matchup)
+ATTRIBUTION_CACHE_SIZE = 4096
+
+# Monte Carlo card simulator (/simulate): default draws per card, hard cap, default RNG seed
+SIMULATION_DEFAULT_SIMS = 1_000_000
+SIMULATION_MAX_SIMS = 10_000_000
+SIMULATION_SEED = 1234
+
+# Pre-compressed fighter payloads (/full_fighters, /ufc_only_fighters); built once per data version
+PAYLOAD_GZIP_LEVEL = 9
+PAYLOAD_BROTLI_QUALITY = 8
+
+# On-demand profiling (/debug/profile, /debug/memory, X-Profile: 1); nothing runs while this is off
+PROFILING_ENABLED = False
+PROFILE_SAMPLE_INTERVAL_MS = 5.0
+PROFILE_MAX_REQUESTS = 1000        # cap on requests one session may cover
+PROFILE_SESSIONS_KEPT = 20
+PROFILE_MEMORY_SNAPSHOTS_KEPT = 10
@@ -0,0 +1,271 @@
+# app/feature_store.py
+"""
+Point-in-time fighter features.
+
+One row per (fighter, fight date) holds the fighter's state after that
+day's UFC fights: cumulative record, minutes, strikes landed/absorbed and
+takedowns, career and last-5-fight rates, form and win streak. Rows live in
+flat numpy arrays sorted by a (fighter id, day) int64 key, so an as-of
+lookup for any number of (fighter, date) pairs is one np.searchsorted: the
+row just before the key is the fighter's state going into that date, and
+fights on the date itself are never visible.
+
+Appending keeps a small per-fighter tail (the last row and last five
+fights), so new fights extend the store without replaying history. Fights
+must come after the fighter's latest row; the sort runs once, lazily, on
+the first lookup after an append.
+
+form and win_streak follow utils.recent_form_score / win_streak_score over
+the last five fights (fight histories carry no per-fight date, so the
+serving code weighs all five equally; form here does the same). Strikes
+absorbed come from the opponent's side of the bout and only count when the
+opponent is in the DB.
+
+    store = FeatureStore.from_fighters(utils.fighters_df)
+    values, found = store.as_of(store.ids(["Jon Jones"] * 2), store.days(["2015-01-03", "2020-02-08"]))
+"""
+
+from collections import deque
+from datetime import date
+
+import numpy as np
+
+COLUMNS = [
+    "fights", "wins", "losses", "draws",
+    "minutes", "strikes", "takedowns", "absorbed", "absorbed_minutes",
+    "slpm", "sapm", "td_avg",            # career rates (td per 15 min, like TD Avg.)
+    "slpm_last5", "td_avg_last5",        # same rates over the last five fights
+    "form", "win_streak",
+]
+COL = {c: i for i, c in enumerate(COLUMNS)}
+
+_EPOCH = date(1970, 1, 1).toordinal()
+_DAY_OFFSET = 1 << 20  # keeps the day part of the key positive
+
+
+def _norm(name) -> str:
+    return " ".join((name or "").lower().split())
+
+
+def to_day(value) -> int:
+    """date / datetime / 'YYYY-MM-DD' -> days since 1970-01-01."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.toordinal() - _EPOCH
+
+
+def _keys(fid: np.ndarray, day: np.ndarray) -> np.ndarray:
+    return (fid.astype(np.int64) << 32) | (day.astype(np.int64) + _DAY_OFFSET)
+
+
+class _Tail:
+    """What the next row of one fighter is computed from."""
+
+    __slots__ = ("row", "day", "last5")
+
+    def __init__(self):
+        self.row = [0.0] * len(COLUMNS)
+        self.day = None
+        self.last5 = deque(maxlen=5)  # (result, strikes, takedowns, minutes), oldest first
+
+
+class FeatureStore:
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+        self._tails = []
+        self._fid = np.empty(0, dtype=np.int32)
+        self._day = np.empty(0, dtype=np.int32)
+        self._values = np.empty((0, len(COLUMNS)))
+        self._keys = np.empty(0, dtype=np.int64)
+        self._pending = []  # (fid, day, values) rows not merged yet
+
+    def __len__(self):
+        return len(self._fid) + len(self._pending)
+
+    # --- ids and days ---
+
+    def id_for(self, name, create: bool = False):
+        key = _norm(name)
+        fid = self._ids.get(key)
+        if fid is None and create:
+            fid = self._ids[key] = len(self.names)
+            self.names.append(name)
+            self._tails.append(_Tail())
+        return fid
+
+    def ids(self, names) -> np.ndarray:
+        """Fighter ids for names; -1 for fighters the store has never seen."""
+        get = self._ids.get
+        return np.fromiter((get(_norm(n), -1) for n in names), dtype=np.int64)
+
+    @staticmethod
+    def days(values) -> np.ndarray:
+        """Day numbers for dates, ISO strings or a datetime64 array."""
+        if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+            return values.astype("datetime64[D]").astype(np.int64)
+        return np.fromiter((to_day(v) for v in values), dtype=np.int64)
+
+    # --- writes ---
+
+    def append(self, fights) -> int:
+        """
+        Add fights: dicts with fighter, date, result ('win'/'loss'/'draw'/'nc'),
+        strikes, takedowns, minutes and absorbed (None when unknown). A
+        fighter's fights must be dated after their latest row; same-day fights
+        in one call become a single row. Returns the number of rows added.
+        """
+        by_row = {}
+        for fight in fights:
+            fid = self.id_for(fight["fighter"], create=True)
+            day = to_day(fight["date"])
+            tail = self._tails[fid]
+            if tail.day is not None and day <= tail.day:
+                raise ValueError(f"{fight['fighter']}: {fight['date']} is not after the latest row")
+            by_row.setdefault((fid, day), []).append(fight)
+
+        for (fid, day), day_fights in sorted(by_row.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+            tail = self._tails[fid]
+            row = list(tail.row)
+            for f in day_fights:
+                result = (f.get("result") or "").lower()
+                row[COL["fights"]] += 1
+                row[COL["wins"]] += result == "win"
+                row[COL["losses"]] += result == "loss"
+                row[COL["draws"]] += result in ("draw", "nc")
+                row[COL["minutes"]] += f.get("minutes") or 0.0
+                row[COL["strikes"]] += f.get("strikes") or 0
+                row[COL["takedowns"]] += f.get("takedowns") or 0
+                if f.get("absorbed") is not None:
+                    row[COL["absorbed"]] += f["absorbed"]
+                    row[COL["absorbed_minutes"]] += f.get("minutes") or 0.0
+                tail.last5.append((result, f.get("strikes") or 0, f.get("takedowns") or 0, f.get("minutes") or 0.0))
+            self._derive(row, tail.last5)
+            tail.row, tail.day = row, day
+            self._pending.append((fid, day, row))
+        return len(by_row)
+
+    @staticmethod
+    def _derive(row: list, last5):
+        minutes, abs_minutes = row[COL["minutes"]], row[COL["absorbed_minutes"]]
+        row[COL["slpm"]] = row[COL["strikes"]] / minutes if minutes else 0.0
+        row[COL["td_avg"]] = row[COL["takedowns"]] * 15 / minutes if minutes else 0.0
+        row[COL["sapm"]] = row[COL["absorbed"]] / abs_minutes if abs_minutes else 0.0
+
+        recent_minutes = sum(m for *_, m in last5)
+        row[COL["slpm_last5"]] = sum(s for _, s, _, _ in last5) / recent_minutes if recent_minutes else 0.0
+        row[COL["td_avg_last5"]] = sum(t for _, _, t, _ in last5) * 15 / recent_minutes if recent_minutes else 0.0
+
+        scores = [1.0 if r == "win" else -1.0 if r == "loss" else 0.0 for r, *_ in last5]
+        row[COL["form"]] = round(sum(scores) / len(scores), 4) if scores else 0.0
+        streak = 0
+        for r, *_ in reversed(last5):
+            if r == "win":
+                streak += 1
+            elif r in ("draw", "nc"):
+                continue
+            else:
+                break
+        row[COL["win_streak"]] = streak
+
+    def _merge(self):
+        if not self._pending:
+            return
+        fid = np.concatenate([self._fid, np.fromiter((p[0] for p in self._pending), dtype=np.int32)])
+        day = np.concatenate([self._day, np.fromiter((p[1] for p in self._pending), dtype=np.int32)])
+        values = np.vstack([self._values, np.array([p[2] for p in self._pending])])
+        keys = _keys(fid, day)
+        order = np.argsort(keys, kind="stable")
+        self._fid, self._day, self._values, self._keys = fid[order], day[order], values[order], keys[order]
+        self._pending = []
+
+    # --- reads ---
+
+    def as_of(self, fids, days, columns=None):
+        """
+        State of each fighter going into each day (fights on that day excluded).
+        Returns (values [n x len(columns)], found [n]); rows with no earlier
+        fight (or an unknown fighter, id -1) are zeros with found False.
+        """
+        self._merge()
+        fids = np.asarray(fids, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        cols = [COL[c] for c in (columns or COLUMNS)]
+
+        idx = np.searchsorted(self._keys, _keys(fids, days), side="left") - 1
+        found = (idx >= 0) & (fids >= 0)
+        found[found] &= self._fid[idx[found]] == fids[found]
+        out = np.zeros((len(fids), len(cols)))
+        out[found] = self._values[np.ix_(idx[found], cols)]
+        return out, found
+
+    def history(self, name) -> dict:
+        """Every row of one fighter, as {column: array} plus day."""
+        self._merge()
+        fid = self.id_for(name)
+        if fid is None:
+            return {"day": np.empty(0, dtype=np.int32), **{c: np.empty(0) for c in COLUMNS}}
+        lo, hi = np.searchsorted(self._keys, [fid << 32, (fid + 1) << 32])
+        return {"day": self._day[lo:hi], **{c: self._values[lo:hi, i] for i, c in enumerate(COLUMNS)}}
+
+    # --- building from the fighter DB ---
+
+    @classmethod
+    def from_fighters(cls, fighters_df, history=None):
+        """Store over every dated UFC fight in a fighters_df (utils layout)."""
+        store = cls()
+        store.append(fights_from_fighters(fighters_df, history))
+        return store
+
+
+def minutes_fought(fight: dict) -> float:
+    """Fight length from the round it ended in and the time on the clock."""
+    try:
+        rnd = int(fight.get("round") or 0)
+        mm, ss = (fight.get("time") or "0:00").split(":")
+        return max(0.0, (rnd - 1) * 5 + int(mm) + int(ss) / 60)
+    except ValueError:
+        return 0.0
+
+
+def _int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def fights_from_fighters(fighters_df, history=None) -> list:
+    """
+    Store input rows for every dated UFC fight in the DB, oldest first.
+    history(row) returns a row's fight_history (utils.fighter_history by default).
+    """
+    from app.utils import parse_event_date, fighter_history
+    history = history or fighter_history
+
+    entries = []
+    landed = {}  # (fighter, opponent, day) -> strikes landed, for the other side's "absorbed"
+    for _, row in fighters_df.iterrows():
+        for fight in history(row) or []:
+            if "UFC" not in fight.get("event", ""):
+                continue
+            day = parse_event_date(fight.get("event"))
+            if day is None:
+                continue
+            me, opp = _norm(row["name"]), _norm(fight.get("opponent"))
+            landed[(me, opp, day)] = _int(fight.get("STR"))
+            entries.append((day, row["name"], me, opp, fight))
+
+    entries.sort(key=lambda e: e[0])
+    return [
+        {
+            "fighter": name,
+            "date": day,
+            "result": (fight.get("result") or "").lower(),
+            "strikes": _int(fight.get("STR")),
+            "takedowns": _int(fight.get("TD")),
+            "minutes": minutes_fought(fight),
+            "absorbed": landed.get((opp, me, day)),
+        }
+        for day, name, me, opp, fight in entries
+    ]
@@ -0,0 +1,263 @@
+# app/fighter_index.py
+"""
+Columnar index over ufc_fighters.json for /fighters/query.
+
+Built once per data version: every filterable/sortable attribute becomes a
+numpy column, and every sortable column gets a precomputed stable order
+(ties broken by name) plus its inverse rank. A query is then a boolean mask
+over the columns, a gather through the chosen order, and a searchsorted on
+the rank of the cursor row — no per-fighter Python work except building the
+projected rows of the returned page.
+
+Cursors are opaque and tied to the data version they were issued for.
+"""
+
+import base64
+import json
+from datetime import date
+
+import numpy as np
+
+from app.payloads import FileBackedValue
+from app.utils import parse_event_date
+
+# Same thresholds the client uses in Fighters.tsx (inferDivisionFromWeight)
+DIVISIONS = [
+    (115, "Strawweight"),
+    (125, "Flyweight"),
+    (135, "Bantamweight"),
+    (145, "Featherweight"),
+    (155, "Lightweight"),
+    (170, "Welterweight"),
+    (185, "Middleweight"),
+    (205, "Light Heavyweight"),
+    (float("inf"), "Heavyweight"),
+]
+DIVISION_NAMES = [name for _, name in DIVISIONS]
+
+STAT_FIELDS = {
+    "slpm": "SLpM", "sapm": "SApM", "tdAvg": "TD Avg.", "tdDef": "TD Def.",
+    "strAcc": "Str. Acc.", "strDef": "Str. Def", "subAvg": "Sub. Avg.",
+}
+DEFAULT_FIELDS = ["name", "nickname", "record", "ufc_record", "division", "is_champion"]
+SORTABLE = ["name", "weight", "height", "reach", "ufc_wins", "ufc_fights", "ufc_win_pct", "last_fight",
+            *STAT_FIELDS]
+MAX_LIMIT = 500
+
+
+class CursorError(ValueError):
+    pass
+
+
+def _num(value):
+    try:
+        return float(str(value).replace("%", "").replace('"', "").replace(" lbs.", "").strip())
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _height_inches(value):
+    try:
+        feet, _, rest = str(value).partition("'")
+        return int(feet) * 12 + (int(rest.replace('"', "").strip() or 0))
+    except ValueError:
+        return np.nan
+
+
+def division_of(weight_lbs) -> str:
+    if weight_lbs is None or np.isnan(weight_lbs):
+        return None
+    for limit, name in DIVISIONS:
+        if weight_lbs <= limit:
+            return name
+
+
+class FighterIndex:
+    def __init__(self, fighters: list, version: str):
+        self.version = version
+        n = len(fighters)
+        self.n = n
+        self.fighters = fighters
+
+        self.name = np.array([f.get("name", "") for f in fighters], dtype=object)
+        self.weight = np.array([_num(f.get("weight")) for f in fighters])
+        self.height = np.array([_height_inches(f.get("height")) for f in fighters], dtype=float)
+        self.reach = np.array([_num(f.get("reach")) for f in fighters])
+        self.is_champion = np.array([bool(f.get("is_champion", False)) for f in fighters], dtype=bool)
+
+        division = [division_of(w) for w in self.weight]
+        self.division = np.array([DIVISION_NAMES.index(d) if d else -1 for d in division], dtype=np.int8)
+
+        wins = np.zeros(n, dtype=np.int32)
+        losses = np.zeros(n, dtype=np.int32)
+        draws = np.zeros(n, dtype=np.int32)
+        last_fight = np.zeros(n, dtype=np.int64)  # date ordinal, 0 = unknown
+        for i, f in enumerate(fighters):
+            history = f.get("fight_history", [])
+            for fight in history:
+                if "UFC" not in fight.get("event", ""):
+                    continue
+                result = fight.get("result", "").lower()
+                if result == "win":
+                    wins[i] += 1
+                elif result == "loss":
+                    losses[i] += 1
+                elif result in {"draw", "nc"}:
+                    draws[i] += 1
+            dates = [parse_event_date(fight.get("event")) for fight in history]
+            dates = [d for d in dates if d]
+            if dates:
+                last_fight[i] = max(dates).toordinal()
+        self.ufc_wins, self.ufc_losses, self.ufc_draws = wins, losses, draws
+        self.ufc_fights = wins + losses + draws
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.ufc_win_pct = np.where(self.ufc_fights > 0, wins / np.maximum(self.ufc_fights, 1), np.nan)
+        self.last_fight = last_fight
+
+        self.stats = {
+            key: np.array([_num(f.get("stats", {}).get(src)) for f in fighters])
+            for key, src in STAT_FIELDS.items()
+        }
+
+        # Stable orders per sortable column: ties by name, unknown values last
+        lower = [s.lower() for s in self.name]
+        by_name = np.array(sorted(range(n), key=lambda i: lower[i]), dtype=np.int64)
+        name_rank = np.empty(n, dtype=np.int64)
+        name_rank[by_name] = np.arange(n)
+        self._orders = {}
+        for key in SORTABLE:
+            if key == "name":
+                orders = {"asc": by_name, "desc": by_name[::-1]}
+            else:
+                col = self.column(key).astype(float)
+                if key == "last_fight":
+                    col = np.where(col > 0, col, np.nan)
+                # lexsort: last key is primary; NaN sorts to the end either way
+                orders = {"asc": np.lexsort((name_rank, col)), "desc": np.lexsort((name_rank, -col))}
+            for direction, order in orders.items():
+                rank = np.empty(n, dtype=np.int64)
+                rank[order] = np.arange(n)
+                self._orders[(key, direction)] = (order, rank)
+
+        raw_fields = set()
+        for f in fighters:
+            raw_fields.update(f.keys())
+        self.fields = raw_fields | {"division", "ufc_record", "ufc_wins", "ufc_losses", "ufc_draws",
+                                    "ufc_fights", "ufc_win_pct", "last_fight"} | set(STAT_FIELDS)
+
+    def column(self, key):
+        if key in self.stats:
+            return self.stats[key]
+        return getattr(self, key)
+
+    # --- projection ---
+
+    def row(self, i: int, fields: list) -> dict:
+        f = self.fighters[i]
+        out = {}
+        for field in fields:
+            if field == "division":
+                d = int(self.division[i])
+                out[field] = DIVISION_NAMES[d] if d >= 0 else None
+            elif field == "ufc_record":
+                out[field] = f"{self.ufc_wins[i]}-{self.ufc_losses[i]}-{self.ufc_draws[i]}"
+            elif field in ("ufc_wins", "ufc_losses", "ufc_draws", "ufc_fights"):
+                out[field] = int(self.column(field)[i])
+            elif field == "ufc_win_pct":
+                v = self.ufc_win_pct[i]
+                out[field] = None if np.isnan(v) else round(float(v), 4)
+            elif field == "last_fight":
+                out[field] = date.fromordinal(int(self.last_fight[i])).isoformat() if self.last_fight[i] else None
+            elif field in self.stats:
+                v = self.stats[field][i]
+                out[field] = None if np.isnan(v) else float(v)
+            else:
+                out[field] = f.get(field)
+        return out
+
+    # --- cursors ---
+
+    def encode_cursor(self, sort: str, rank: int) -> str:
+        raw = json.dumps({"v": self.version, "s": sort, "r": int(rank)}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str, sort: str) -> int:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, json.JSONDecodeError):
+            raise CursorError("Malformed cursor")
+        if not isinstance(data, dict):
+            raise CursorError("Malformed cursor")
+        if data.get("v") != self.version:
+            raise CursorError("Cursor is from an older data version; restart from the first page")
+        if data.get("s") != sort:
+            raise CursorError("Cursor was issued for a different sort")
+        try:
+            rank = int(data["r"])
+        except (KeyError, TypeError, ValueError):
+            raise CursorError("Malformed cursor")
+        if rank < 0:
+            raise CursorError("Malformed cursor")
+        return rank
+
+    # --- query ---
+
+    def query(self, fields=None, division=None, champion=None, min_ufc_fights=None, active_since=None,
+              sort="name", limit=50, cursor=None) -> dict:
+        fields = fields or DEFAULT_FIELDS
+        unknown = set(fields) - self.fields
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        key, direction = (sort[1:], "desc") if sort.startswith("-") else (sort, "asc")
+        if key not in SORTABLE:
+            raise ValueError(f"Cannot sort by {key!r}; choose from {', '.join(SORTABLE)}")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+
+        mask = np.ones(self.n, dtype=bool)
+        if division:
+            wanted = []
+            for name in division:
+                matches = [i for i, d in enumerate(DIVISION_NAMES) if d.lower() == name.strip().lower()]
+                if not matches:
+                    raise ValueError(f"Unknown division {name!r}")
+                wanted.extend(matches)
+            mask &= np.isin(self.division, wanted)
+        if champion is not None:
+            mask &= self.is_champion == bool(champion)
+        if min_ufc_fights:
+            mask &= self.ufc_fights >= int(min_ufc_fights)
+        if active_since:
+            mask &= self.last_fight >= active_since.toordinal()
+
+        order, rank = self._orders[(key, direction)]
+        matched = order[mask[order]]
+        start = 0
+        if cursor:
+            start = int(np.searchsorted(rank[matched], self.decode_cursor(cursor, sort), side="right"))
+        page = matched[start:start + limit]
+
+        next_cursor = None
+        if start + limit < len(matched):
+            next_cursor = self.encode_cursor(sort, rank[page[-1]])
+
+        return {
+            "version": self.version,
+            "total": int(len(matched)),
+            "items": [self.row(int(i), fields) for i in page],
+            "next_cursor": next_cursor,
+        }
+
+
+class FighterIndexSource(FileBackedValue):
+    """A FighterIndex over one JSON file, rebuilt when the file's content changes."""
+
+    def __init__(self, path):
+        super().__init__([path], None)
+
+    def _make(self, raw: dict, digest: str) -> FighterIndex:
+        data = raw[self.sources[0]]
+        if data is None:
+            raise FileNotFoundError(self.sources[0])
+        return FighterIndex(json.loads(data), digest)
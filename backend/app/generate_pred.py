@@ -1,24 +1,33 @@
+"""
+Tracked predictions for the upcoming cards.
+
+Cards and odds are read straight from data/ (joined exactly as /upcoming
+serves them), so the API doesn't need to be running. Every fight's inputs
+(both fighters' stats, their opponents' current records, the odds and the
+model) are hashed, and only fights whose hash differs from the stored
+record are re-predicted, all in one batched model call. Unchanged fights keep their record and timestamp; when
+a re-prediction changes the pick or confidence, the superseded prediction
+is appended to the record's pick_history.
+"""
+
 import sys
 import os
 import json
-from pathlib import Path
+import hashlib
 from datetime import datetime
 
-# Add backend root to import app.*
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
-from app.utils import get_fighter_stats, predict_match
-import requests
-
-# Save to: backend/logs/tracked_predictions.json
-TRACKING_LOG = Path(__file__).resolve().parent.parent / "data" / "tracked_predictions.json"
+# Add backend root to import app.* (every path below is absolute, so any cwd works)
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BACKEND_DIR)
 
+from app import config
+from app.utils import (
+    get_fighter_stats, predict_match, predict_matches, combined_opponent_record, model_path, MODEL_VERSION,
+)
+from app.upcoming import load_upcoming_events
+from app.snapshot import snapshot_version
+from app.tracked_store import tracked_store, fight_key
 
-def fetch_upcoming_events():
-    url = "http://localhost:8000/upcoming"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
 
 def make_json_safe(obj):
     if hasattr(obj, "to_dict"):
@@ -32,10 +41,87 @@ def make_json_safe(obj):
     else:
         return str(obj)  # fallback
 
+def model_fingerprint() -> str:
+    """Model files plus everything in config that changes a prediction."""
+    h = hashlib.sha256(snapshot_version("", model_path).encode())
+    h.update(json.dumps([
+        MODEL_VERSION, config.APPLY_FORM_BOOST, config.APPLY_STREAK_BOOST,
+        config.APPLY_STAT_DOMINANCE_BONUS, config.APPLY_OPP_STRENGTH_BOOST, config.MAX_BOOST,
+    ]).encode())
+    return h.hexdigest()[:16]
+
+def input_hash(f1: dict, f2: dict, odds1, odds2, model_version: str) -> str:
+    # The opponent-strength boost reads the opponents' records at predict time
+    doc = [f1, f2, combined_opponent_record(f1), combined_opponent_record(f2), odds1, odds2, model_version]
+    return hashlib.sha256(json.dumps(doc, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def prediction_record(base: dict, result) -> dict:
+    winner, confidence, raw_diffs, last5_f1, last5_f2, rematch, top_contributors, _, __ = result
+    return {
+        **base,
+        "winner": winner,
+        "confidence": round(confidence, 2),
+        "rematch": rematch,
+        "last_5_results_f1": last5_f1,
+        "last_5_results_f2": last5_f2,
+        "raw_feature_diffs": make_json_safe(raw_diffs),
+        "shap_weights": {},
+        "weighted_feature_diffs": {},
+        "top_3_contributors": make_json_safe(top_contributors),
+        "is_tossup": winner == "Toss Up",  # Add flag for toss-up
+    }
+
+def fallback_record(base: dict, f1: dict, f2: dict) -> dict:
+    return {
+        **base,
+        "winner": "Toss Up",
+        "confidence": 50.0,
+        "rematch": False,
+        "last_5_results_f1": f1.get("last_results", []),
+        "last_5_results_f2": f2.get("last_results", []),
+        "raw_feature_diffs": {},
+        "shap_weights": {},
+        "weighted_feature_diffs": {},
+        "top_3_contributors": [],
+        "is_tossup": True,
+    }
+
+def predict_changed(stale: list) -> list:
+    """One batched call for every stale fight; if the batch fails, fall back to one fight at a time."""
+    pairs = [(f1, f2) for _, f1, f2 in stale]
+    try:
+        results = predict_matches(pairs)
+    except Exception as e:
+        print(f"⚠️ Batched prediction failed ({e}); predicting fights one by one")
+        results = []
+        for f1, f2 in pairs:
+            try:
+                results.append(predict_match(f1, f2))
+            except Exception as e:
+                print(f"⚠️ Exception during prediction of {f1['name']} vs {f2['name']}: {e}")
+                results.append(None)
+    return [
+        prediction_record(base, result) if result is not None else fallback_record(base, f1, f2)
+        for (base, f1, f2), result in zip(stale, results)
+    ]
+
+def merge_previous(record: dict, previous: dict) -> dict:
+    """Carry the history forward; a changed pick or confidence pushes the old prediction onto it."""
+    history = list(previous.get("pick_history", []))
+    if (previous.get("winner"), previous.get("confidence")) != (record["winner"], record["confidence"]):
+        history.append({k: previous.get(k) for k in ("timestamp", "winner", "confidence", "odds1", "odds2")})
+    else:
+        record["timestamp"] = previous.get("timestamp", record["timestamp"])
+    record["pick_history"] = history
+    return record
+
 def build_tracking_log():
-    events = fetch_upcoming_events()
-    logs = []
+    """Records to upsert (changed or new fights only) and the number of fights left as they were."""
+    events = load_upcoming_events()
+    model_version = model_fingerprint()
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+    fights = []
     for event in events:
         event_name = event.get("event_name") or event.get("event") or "Unknown Event"
         event_date = event.get("date") or "Unknown Date"  # ✅ Pull date from upcoming data
@@ -56,76 +142,40 @@ def build_tracking_log():
                 print(f"⚠️ Skipping: Stats missing for {f1_name} or {f2_name}")
                 continue
 
-            try:
-                (
-                    winner,
-                    confidence,
-                    raw_diffs,
-                    last5_f1,
-                    last5_f2,
-                    rematch,
-                    top_contributors,
-                    _,
-                    __
-                ) = predict_match(f1, f2)
-
-                log = {
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "event": event_name,
-                    "date": event_date,  # ✅ Added date field
-                    "fighter1": f1_name,
-                    "fighter2": f2_name,
-                    "winner": winner,
-                    "confidence": round(confidence, 2),
-                    "rematch": rematch,
-                    "last_5_results_f1": last5_f1,
-                    "last_5_results_f2": last5_f2,
-                    "raw_feature_diffs": make_json_safe(raw_diffs),
-                    "shap_weights": {},
-                    "weighted_feature_diffs": {},
-                    "top_3_contributors": make_json_safe(top_contributors),
-                    "odds1": fight.get("odds1", "N/A"),
-                    "odds2": fight.get("odds2", "N/A"),
-                    "actual_result": None,
-                    "correct": None,
-                    "is_tossup": winner == "Toss Up"  # Add flag for toss-up
-                }
+            odds1, odds2 = fight.get("odds1", "N/A"), fight.get("odds2", "N/A")
+            base = {
+                "timestamp": now,
+                "event": event_name,
+                "date": event_date,  # ✅ Added date field
+                "fighter1": f1_name,
+                "fighter2": f2_name,
+                "odds1": odds1,
+                "odds2": odds2,
+                "actual_result": None,
+                "correct": None,
+                "input_hash": input_hash(f1, f2, odds1, odds2, model_version),
+            }
+            fights.append((base, f1, f2))
+
+    stored = tracked_store.records(fight_key(b["event"], b["fighter1"], b["fighter2"]) for b, _, _ in fights)
+    stale = [
+        (base, f1, f2) for base, f1, f2 in fights
+        if stored.get(fight_key(base["event"], base["fighter1"], base["fighter2"]), {}).get("input_hash") != base["input_hash"]
+    ]
+    print(f"🔁 {len(stale)} of {len(fights)} fights changed since the last run")
 
-            except Exception as e:
-                print(f"⚠️ Exception during prediction: {e}")
-                log = {
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "event": event_name,
-                    "date": event_date,  # ✅ Added date field
-                    "fighter1": f1_name,
-                    "fighter2": f2_name,
-                    "winner": "Toss Up",
-                    "confidence": 50.0,
-                    "rematch": False,
-                    "last_5_results_f1": f1.get("last_results", []) if f1 else [],
-                    "last_5_results_f2": f2.get("last_results", []) if f2 else [],
-                    "raw_feature_diffs": {},
-                    "shap_weights": {},
-                    "weighted_feature_diffs": {},
-                    "top_3_contributors": [],
-                    "odds1": fight.get("odds1", "N/A"),
-                    "odds2": fight.get("odds2", "N/A"),
-                    "actual_result": None,
-                    "correct": None,
-                    "is_tossup": True  # Add flag for toss-up
-                }
-
-            logs.append(log)
-
-    return logs
+    logs = []
+    for record in predict_changed(stale) if stale else []:
+        previous = stored.get(fight_key(record["event"], record["fighter1"], record["fighter2"]))
+        logs.append(merge_previous(record, previous) if previous else {**record, "pick_history": []})
+    return logs, len(fights) - len(stale)
 
 
 if __name__ == "__main__":
-    logs = build_tracking_log()
-
-    TRACKING_LOG.parent.mkdir(parents=True, exist_ok=True)
+    logs, unchanged = build_tracking_log()
 
-    with TRACKING_LOG.open("w", encoding="utf-8") as f:
-        json.dump(make_json_safe(logs), f, indent=2)
+    # Upsert by (event, fighters); already resolved fights keep their results
+    counts = tracked_store.upsert_many(make_json_safe(logs))
 
-    print(f"\n📦 Saved {len(logs)} predictions to {TRACKING_LOG}")
+    print(f"\n📦 {len(logs)} predictions → {tracked_store.path} "
+          f"({counts['inserted']} new, {counts['updated']} updated, {unchanged + counts['unchanged']} unchanged)")
@@ -0,0 +1,194 @@
+# app/logsink.py
+"""
+Background sink for logs/predictions.log.
+
+Request handlers only serialize a record and put it on a queue. A writer
+thread drains the queue, and flushes a batch when it reaches
+PREDICTION_LOG_FLUSH_RECORDS lines or PREDICTION_LOG_FLUSH_SECONDS have
+passed. Each flush happens under an exclusive lock on a sidecar .lock file,
+so several uvicorn workers can share one log: rotation is decided and done
+by one process at a time, and a batch of whole lines lands with a single
+O_APPEND write.
+
+The file rotates when it passes PREDICTION_LOG_MAX_BYTES or when the day
+changes; rotated files are gzip-compressed and only the newest
+PREDICTION_LOG_BACKUPS are kept.
+"""
+
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app import config
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: single process, no cross-process lock
+    fcntl = None
+
+LOG_PATH = Path(__file__).resolve().parent.parent / "logs" / "predictions.log"
+
+_STOP = object()
+
+
+class _FileLock:
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+class PredictionLogSink:
+    def __init__(self, path, flush_records=200, flush_seconds=1.0, max_bytes=20 * 1024 * 1024,
+                 backups=14, max_queue=100_000):
+        self.path = str(path)
+        self.flush_records = flush_records
+        self.flush_seconds = flush_seconds
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.rotations = 0
+
+    def write(self, record: dict):
+        """Queue one record; never blocks the caller."""
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(json.dumps(record, default=str) + "\n")
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prediction-log-sink", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: float = 5.0):
+        """Flush everything queued so far and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        pending = []
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush(pending)
+                return
+            if item is not None:
+                pending.append(item)
+
+            if len(pending) >= self.flush_records or time.monotonic() >= deadline:
+                self._flush(pending)
+                pending = []
+                deadline = time.monotonic() + self.flush_seconds
+
+    def _flush(self, lines):
+        if not lines:
+            return
+        data = "".join(lines).encode("utf-8")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            with _FileLock(self.path + ".lock"):
+                rotated = self._maybe_rotate(len(data))
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    view = memoryview(data)
+                    while view:
+                        view = view[os.write(fd, view):]
+                finally:
+                    os.close(fd)
+        except OSError as e:
+            print(f"⚠️ Prediction log flush failed: {e}")
+            self.dropped += len(lines)
+            return
+        self.written += len(lines)
+        self.flushes += 1
+        if rotated:
+            self._compress(rotated)
+
+    def _maybe_rotate(self, incoming: int):
+        """Rename the live file aside if it is too big or from a previous day. Caller holds the lock."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        if st.st_size == 0:
+            return None
+        too_big = st.st_size + incoming > self.max_bytes
+        stale = datetime.fromtimestamp(st.st_mtime).date() != datetime.now().date()
+        if not (too_big or stale):
+            return None
+
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = f"{self.path}.{stamp}.{os.getpid()}"
+        os.replace(self.path, rotated)
+        self.rotations += 1
+        return rotated
+
+    def _compress(self, rotated: str):
+        try:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+        except OSError as e:
+            print(f"⚠️ Failed to compress {rotated}: {e}")
+            return
+        backups = sorted(glob.glob(self.path + ".*.gz"))
+        for old in backups[:-self.backups] if self.backups else backups:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "rotations": self.rotations,
+        }
+
+
+prediction_log = PredictionLogSink(
+    LOG_PATH,
+    flush_records=config.PREDICTION_LOG_FLUSH_RECORDS,
+    flush_seconds=config.PREDICTION_LOG_FLUSH_SECONDS,
+    max_bytes=config.PREDICTION_LOG_MAX_BYTES,
+    backups=config.PREDICTION_LOG_BACKUPS,
+)
+atexit.register(prediction_log.close)
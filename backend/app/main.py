@@ -1,8 +1,23 @@
-from fastapi import FastAPI
+import threading
+import time
+from app.profiling import startup_profile, profile_manager
+
+# Before app.routes is imported: that import loads the fighter DB and model
+startup_profile.begin()
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import router
+from app.routes import router, full_fighters_payload, ufc_only_payload, fighter_index, search_index
+from app.attribution import attribution_engine
+from app.batching import inference_batcher
+from app.logsink import prediction_log
+from app.shadow import shadow_evaluator
+from app.metrics import REQUESTS, REQUEST_LATENCY
+from app import config, utils
+from app.serialization import FastJSONResponse
+from app.tracing import begin_request, end_request, new_request_id
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,3 +28,66 @@ app.add_middleware(
 )
 
 app.include_router(router)
+
+
+def _route_label(request: Request) -> str:
+    # The matched route's template keeps label cardinality bounded (/explain, not one per path)
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+@app.middleware("http")
+async def attach_request_trace(request: Request, call_next):
+    started = time.perf_counter()
+    request_id = request.headers.get("x-request-id") or new_request_id()
+    trace = begin_request(request_id, request.url.path, force=request.headers.get("x-trace") == "1")
+    profile = None
+    if config.PROFILING_ENABLED:
+        profile = profile_manager.begin_request(request_id, request.url.path,
+                                                force=request.headers.get("x-profile") == "1")
+    try:
+        response = await call_next(request)
+    except Exception:
+        end_request(trace, 500)
+        REQUESTS.inc(_route_label(request), request.method, "500")
+        raise
+    finally:
+        if profile is not None:
+            profile_manager.end_request(profile)
+    end_request(trace, response.status_code)
+    if profile is not None:
+        response.headers["X-Profile-ID"] = profile.id
+    route = _route_label(request)
+    REQUESTS.inc(route, request.method, str(response.status_code))
+    REQUEST_LATENCY.observe(time.perf_counter() - started, route, request.method)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+def _warm_caches():
+    try:
+        sources = [full_fighters_payload, ufc_only_payload]
+        # Snapshot workers build the in-memory indexes on first use, not all at once up front
+        if utils.snapshot is None:
+            sources += [fighter_index, search_index]
+        for payload in sources:
+            try:
+                payload.get()
+            except Exception as e:
+                print(f"⚠️ Could not prebuild fighter data: {e}")
+        attribution_engine.precompute_upcoming()
+    finally:
+        startup_profile.end()
+
+
+@app.on_event("startup")
+async def warm_caches():
+    # Off the event loop so startup isn't held up by compression or the card
+    threading.Thread(target=_warm_caches, name="cache-warmup", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await inference_batcher.stop()
+    prediction_log.close()
+    shadow_evaluator.close()
@@ -0,0 +1,297 @@
+# app/metrics.py
+"""
+Prometheus text-format metrics for GET /metrics.
+
+Counters and histograms are plain in-process objects: an update is one lock
+acquire plus a dict/list increment (histograms find their bucket with
+bisect), so the instrumentation stays on in production. Values that other
+components already track (attribution cache, payload rebuilds, the inference
+batcher, data file ages, scraper runs) are read by collectors at scrape time
+instead of being counted on the hot path.
+
+Metrics are per process; with several workers each scrape sees the worker
+that answered it (ufc_process_start_time_seconds tells restarts apart).
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans a sub-millisecond cache hit up to a slow cold request
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+# Model calls are labelled by batch-size range rather than exact size to bound cardinality
+BATCH_SIZE_RANGES = ((1, "1"), (4, "2-4"), (16, "5-16"), (64, "17-64"), (float("inf"), "65+"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SCRAPER_RUNS_PATH = os.path.join(os.path.dirname(__file__), "..", "logs", "scraper_runs.json")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = f'le="{_num(bound)}"'
+                yield f"{self.name}_bucket", _labels(self.labelnames, labels, [le]), cumulative
+            yield f"{self.name}_sum", _labels(self.labelnames, labels), series[-1]
+            yield f"{self.name}_count", _labels(self.labelnames, labels), cumulative
+
+
+class Collected:
+    """
+    Read at scrape time: fn() -> number, or {label values tuple: number}.
+    kind="counter" for totals some other component already keeps.
+    """
+
+    def __init__(self, name: str, help: str, fn, labelnames=(), kind="gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def samples(self):
+        value = self.fn()
+        if isinstance(value, dict):
+            for labels, v in sorted(value.items()):
+                if v is not None:
+                    yield self.name, _labels(self.labelnames, labels), v
+        elif value is not None:
+            yield self.name, "", value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collected(self, name, help, fn, labelnames=(), kind="gauge"):
+        return self.register(Collected(name, help, fn, labelnames, kind))
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:  # one broken collector shouldn't take down the scrape
+                print(f"⚠️ Metric {metric.name} failed: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_num(value)}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+registry = Registry()
+
+# --- request path ---
+
+REQUESTS = registry.counter(
+    "ufc_http_requests_total", "HTTP requests by route template, method and status.",
+    ("route", "method", "status"))
+REQUEST_LATENCY = registry.histogram(
+    "ufc_http_request_duration_seconds", "Time from request received to response headers, by route.",
+    ("route", "method"))
+
+# --- prediction internals ---
+
+PREDICT_STAGE = registry.histogram(
+    "ufc_predict_stage_seconds",
+    "Per-stage /predict time: lookup, features, scaler, model, boosts, logging, serialization.",
+    ("stage",), STAGE_BUCKETS)
+SHORT_CIRCUITS = registry.counter(
+    "ufc_predict_short_circuits_total",
+    "Predictions answered without the model (tossup, debut) or overridden after it (rematch).",
+    ("kind",))
+MODEL_INFERENCE = registry.histogram(
+    "ufc_model_inference_seconds", "Scaler + model call time by batch size range.",
+    ("batch_size",), STAGE_BUCKETS)
+
+
+def batch_size_label(n: int) -> str:
+    for limit, label in BATCH_SIZE_RANGES:
+        if n <= limit:
+            return label
+
+
+# --- scrape-time collectors ---
+
+_STARTED = time.time()
+registry.collected("ufc_process_start_time_seconds", "Unix time this worker started.", lambda: _STARTED)
+
+
+def _cache_stats():
+    from app.attribution import attribution_engine
+    from app.routes import full_fighters_payload, ufc_only_payload, upcoming_payload, fighter_index, search_index
+
+    out = {
+        ("attribution", "hit"): attribution_engine.hits,
+        ("attribution", "miss"): attribution_engine.misses,
+    }
+    for name, source in (("full_fighters", full_fighters_payload), ("ufc_only_fighters", ufc_only_payload),
+                         ("upcoming", upcoming_payload), ("fighter_index", fighter_index),
+                         ("search_index", search_index)):
+        out[(name, "hit")] = source.hits
+        out[(name, "miss")] = source.rebuilds
+    return out
+
+
+registry.collected(
+    "ufc_cache_lookups_total", "Cache lookups by cache and outcome (hit ratio = hit / (hit + miss)).",
+    _cache_stats, ("cache", "outcome"), kind="counter")
+
+
+def _batcher_stats():
+    from app.batching import inference_batcher
+    stats = inference_batcher.stats()
+    return {(key,): stats[key] for key in ("queue_depth", "max_queue_depth", "batches", "submitted", "failed")}
+
+
+registry.collected("ufc_inference_batcher", "Micro-batcher state for /predict.", _batcher_stats, ("stat",))
+
+
+def _shadow_stats():
+    from app.shadow import shadow_evaluator
+    return {(key,): value for key, value in shadow_evaluator.stats().items()}
+
+
+registry.collected("ufc_shadow_evaluator", "Shadow challenger queue and scoring counts.", _shadow_stats, ("stat",))
+
+
+def _data_ages():
+    from app import utils
+    now = time.time()
+    paths = {
+        "fighters": utils.FIGHTERS_JSON,
+        "upcoming_cards": os.path.join("data", "upcoming_cards.json"),
+        "odds": os.path.join("data", "ufc_odds.json"),
+    }
+    if utils.SNAPSHOT_DIR:
+        paths["snapshot"] = os.path.join(utils.SNAPSHOT_DIR, "manifest.json")
+    ages = {}
+    for name, path in paths.items():
+        try:
+            ages[(name,)] = round(now - os.path.getmtime(path), 3)
+        except OSError:
+            ages[(name,)] = None
+    return ages
+
+
+registry.collected("ufc_data_age_seconds", "Seconds since each data file (or the worker snapshot) was written.",
+                   _data_ages, ("source",))
+
+
+def _scraper_runs():
+    try:
+        with open(SCRAPER_RUNS_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _scraper_stat(key):
+    return lambda: {(name,): run.get(key) for name, run in _scraper_runs().items()}
+
+
+# Written by scraper/run_stats.py at the end of every scraper run
+registry.collected("ufc_scraper_runs_total", "Scraper runs recorded.",
+                   _scraper_stat("runs"), ("scraper",), kind="counter")
+registry.collected("ufc_scraper_errors_total", "Errors logged across all runs of each scraper.",
+                   _scraper_stat("errors"), ("scraper",), kind="counter")
+registry.collected("ufc_scraper_duration_seconds_total", "Time spent in all runs of each scraper.",
+                   _scraper_stat("total_duration_s"), ("scraper",), kind="counter")
+registry.collected("ufc_scraper_last_duration_seconds", "Duration of the last run.",
+                   _scraper_stat("last_duration_s"), ("scraper",))
+registry.collected("ufc_scraper_last_errors", "Errors logged during the last run.",
+                   _scraper_stat("last_errors"), ("scraper",))
+registry.collected("ufc_scraper_last_run_timestamp_seconds", "Unix time the last run finished.",
+                   _scraper_stat("last_finished"), ("scraper",))
+registry.collected("ufc_scraper_last_success", "1 if the last run finished without raising.",
+                   _scraper_stat("last_success"), ("scraper",))
+
+
+def render() -> bytes:
+    return registry.render()
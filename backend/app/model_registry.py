@@ -0,0 +1,347 @@
+# app/model_registry.py
+"""
+Versioned, content-hashed model artifacts.
+
+Every registered model is an immutable directory under ml/registry/versions/
+with a manifest listing the sha256 of each file, the feature list, the
+estimator settings, training metadata and metrics. current.json names the
+version the API serves and the versions promoted before it; promote and
+rollback rewrite it with os.replace, so a reader sees either the old or the
+new pointer, never a partial one.
+
+Layout:
+    ml/registry/current.json               {"version": ..., "history": [...], "promoted_at": ...}
+    ml/registry/versions/<version>/
+        manifest.json
+        mlp_model.joblib                   uncompressed so joblib can mmap its arrays
+        scaler.joblib
+        feature_list.csv
+        shap_feature_weights.npy
+        trees/*.npy                        flattened GBM (snapshot.FlatGradientBoosting)
+
+load() memory-maps the tree arrays, scaler and weights and checks them
+against the manifest (file hashes, feature list, input widths) before
+anything is served. The served MODEL_VERSION is the manifest's version.
+
+    python -m app.model_registry register ml/model --version v1.2.3 --promote
+    python -m app.model_registry register saved/old_model_info --version v1.1.0
+    python -m app.model_registry list
+    python -m app.model_registry promote v1.1.0
+    python -m app.model_registry rollback
+    python -m app.model_registry verify [version]
+
+register reads a directory in the ml/model layout, plus training_info.json
+when mlp_model.py wrote one.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+REGISTRY_DIR = os.path.join(os.path.dirname(__file__), "..", "ml", "registry")
+
+ARTIFACTS = ["mlp_model.joblib", "scaler.joblib", "feature_list.csv", "shap_feature_weights.npy"]
+
+
+class RegistryError(Exception):
+    """A version that doesn't exist, or artifacts that don't match their manifest."""
+
+
+class RegisteredModel:
+    """One loaded version: the estimator, scaler, features and weights, plus its manifest."""
+
+    def __init__(self, path, manifest, model, scaler, feature_names, shap_weights):
+        self.path = path
+        self.manifest = manifest
+        self.model = model
+        self.scaler = scaler
+        self.feature_names = feature_names
+        self.shap_weights = shap_weights
+
+    @property
+    def version(self):
+        return self.manifest["version"]
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_json(path: str, doc):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _versions_dir(registry_dir):
+    return os.path.join(registry_dir, "versions")
+
+
+def version_dir(version: str, registry_dir=REGISTRY_DIR) -> str:
+    return os.path.join(_versions_dir(registry_dir), version)
+
+
+def _model_params(model) -> dict:
+    params = model.get_params() if hasattr(model, "get_params") else {}
+    return {k: v for k, v in params.items() if isinstance(v, (int, float, str, bool)) or v is None}
+
+
+# === Writes ===
+
+def register(model, scaler, feature_names, shap_weights, version=None, training=None, metrics=None,
+             parent=None, registry_dir=REGISTRY_DIR) -> dict:
+    """
+    Write a new immutable version and return its manifest. Without a version
+    name one is made from the date and content hash. Registering identical
+    artifacts under an existing name returns that manifest; different
+    artifacts under a taken name raise RegistryError.
+    """
+    from app.snapshot import _flatten_gbm
+
+    os.makedirs(_versions_dir(registry_dir), exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".version-", dir=_versions_dir(registry_dir))
+    try:
+        feature_names = [str(f) for f in feature_names]
+        shap_weights = np.asarray(shap_weights, dtype=np.float64)
+        joblib.dump(model, os.path.join(tmp, "mlp_model.joblib"))
+        joblib.dump(scaler, os.path.join(tmp, "scaler.joblib"))
+        pd.DataFrame({"feature": feature_names}).to_csv(os.path.join(tmp, "feature_list.csv"), index=False)
+        np.save(os.path.join(tmp, "shap_feature_weights.npy"), shap_weights)
+
+        model_kind = "joblib"
+        if type(model).__name__ == "GradientBoostingClassifier" and len(getattr(model, "classes_", [])) == 2:
+            flat = _flatten_gbm(model)
+            os.makedirs(os.path.join(tmp, "trees"))
+            for name, arr in flat.items():
+                if name == "meta":
+                    with open(os.path.join(tmp, "trees", "meta.json"), "w", encoding="utf-8") as f:
+                        json.dump(arr, f)
+                else:
+                    np.save(os.path.join(tmp, "trees", f"{name}.npy"), arr)
+            model_kind = "flat_gbm"
+
+        files = {}
+        for root, _, names in os.walk(tmp):
+            for name in names:
+                rel = os.path.relpath(os.path.join(root, name), tmp).replace(os.sep, "/")
+                files[rel] = _sha256(os.path.join(root, name))
+        content_hash = hashlib.sha256(json.dumps(sorted(files.items())).encode()).hexdigest()
+
+        version = version or f"v{datetime.now():%Y%m%d}-{content_hash[:8]}"
+        manifest = {
+            "version": version,
+            "content_hash": content_hash,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "parent": parent,
+            "model_kind": model_kind,
+            "model_class": type(model).__name__,
+            "params": _model_params(model),
+            "features": feature_names,
+            "shap_weights": dict(zip(feature_names, shap_weights.round(6).tolist())),
+            "files": dict(sorted(files.items())),
+            "training": training or {},
+            "metrics": metrics or {},
+        }
+        _write_json(os.path.join(tmp, "manifest.json"), manifest)
+
+        dest = version_dir(version, registry_dir)
+        if os.path.exists(dest):
+            existing = read_manifest(version, registry_dir)
+            if existing["content_hash"] != content_hash:
+                raise RegistryError(f"Version {version} already exists with different artifacts")
+            return existing
+        os.replace(tmp, dest)
+        return manifest
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def register_dir(src: str, version=None, registry_dir=REGISTRY_DIR, **kwargs) -> dict:
+    """Register loose artifacts in the ml/model layout (training_info.json is optional)."""
+    missing = [name for name in ARTIFACTS if not os.path.exists(os.path.join(src, name))]
+    if missing:
+        raise RegistryError(f"{src} is missing {', '.join(missing)}")
+    info = {}
+    info_path = os.path.join(src, "training_info.json")
+    if os.path.exists(info_path):
+        with open(info_path, encoding="utf-8") as f:
+            info = json.load(f)
+    return register(
+        joblib.load(os.path.join(src, "mlp_model.joblib")),
+        joblib.load(os.path.join(src, "scaler.joblib")),
+        pd.read_csv(os.path.join(src, "feature_list.csv"))["feature"].tolist(),
+        np.load(os.path.join(src, "shap_feature_weights.npy")),
+        version=version,
+        training={"source": os.path.abspath(src), **info.get("training", {})},
+        metrics=info.get("metrics"),
+        registry_dir=registry_dir,
+        **kwargs,
+    )
+
+
+def _read_current(registry_dir) -> dict:
+    try:
+        with open(os.path.join(registry_dir, "current.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version": None, "history": []}
+
+
+def promote(version: str, registry_dir=REGISTRY_DIR) -> dict:
+    """Serve `version` from the next process start; the one it replaces can be rolled back to."""
+    load(version, registry_dir)  # refuse to point at a version that doesn't validate
+    state = _read_current(registry_dir)
+    if state["version"] == version:
+        return state
+    history = state["history"] + ([state["version"]] if state["version"] else [])
+    state = {"version": version, "history": history, "promoted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    _write_json(os.path.join(registry_dir, "current.json"), state)
+    return state
+
+
+def rollback(registry_dir=REGISTRY_DIR) -> dict:
+    """Go back to the version promoted before the current one."""
+    state = _read_current(registry_dir)
+    if not state["history"]:
+        raise RegistryError("Nothing to roll back to")
+    version = state["history"][-1]
+    load(version, registry_dir)
+    state = {"version": version, "history": state["history"][:-1],
+             "promoted_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    _write_json(os.path.join(registry_dir, "current.json"), state)
+    return state
+
+
+# === Reads ===
+
+def current_version(registry_dir=REGISTRY_DIR):
+    return _read_current(registry_dir)["version"]
+
+
+def read_manifest(version: str, registry_dir=REGISTRY_DIR) -> dict:
+    path = os.path.join(version_dir(version, registry_dir), "manifest.json")
+    if not os.path.exists(path):
+        raise RegistryError(f"Unknown model version {version}")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_versions(registry_dir=REGISTRY_DIR) -> list:
+    """Manifests of every registered version, oldest first."""
+    root = _versions_dir(registry_dir)
+    if not os.path.isdir(root):
+        return []
+    manifests = [read_manifest(v, registry_dir) for v in os.listdir(root)
+                 if os.path.exists(os.path.join(root, v, "manifest.json"))]
+    return sorted(manifests, key=lambda m: m["created_at"])
+
+
+def load(version=None, registry_dir=REGISTRY_DIR, verify=True) -> RegisteredModel:
+    """
+    Load a version (the promoted one by default), memory-mapped where the
+    format allows. verify checks every file hash and the feature/shape
+    bookkeeping against the manifest and raises RegistryError on a mismatch.
+    """
+    from app.snapshot import FlatGradientBoosting
+
+    version = version or current_version(registry_dir)
+    if version is None:
+        raise RegistryError("No model version has been promoted")
+    manifest = read_manifest(version, registry_dir)
+    path = version_dir(version, registry_dir)
+
+    if verify:
+        for rel, digest in manifest["files"].items():
+            full = os.path.join(path, rel)
+            if not os.path.exists(full):
+                raise RegistryError(f"{version}: {rel} is missing")
+            if _sha256(full) != digest:
+                raise RegistryError(f"{version}: {rel} does not match its manifest hash")
+
+    if manifest["model_kind"] == "flat_gbm":
+        model = FlatGradientBoosting(os.path.join(path, "trees"))
+    else:
+        model = joblib.load(os.path.join(path, "mlp_model.joblib"), mmap_mode="r")
+    scaler = joblib.load(os.path.join(path, "scaler.joblib"), mmap_mode="r")
+    feature_names = pd.read_csv(os.path.join(path, "feature_list.csv"))["feature"].tolist()
+    shap_weights = np.load(os.path.join(path, "shap_feature_weights.npy"), mmap_mode="r")
+
+    if verify:
+        n = len(manifest["features"])
+        if feature_names != manifest["features"]:
+            raise RegistryError(f"{version}: feature_list.csv does not match the manifest")
+        widths = {
+            "model": getattr(model, "n_features_in_", n),
+            "scaler": getattr(scaler, "n_features_in_", n),
+            "shap weights": len(shap_weights),
+        }
+        for name, width in widths.items():
+            if width != n:
+                raise RegistryError(f"{version}: {name} expects {width} features, manifest lists {n}")
+
+    return RegisteredModel(path, manifest, model, scaler, feature_names, shap_weights)
+
+
+def load_current(registry_dir=REGISTRY_DIR, verify=True):
+    """The promoted version, or None when nothing has been promoted yet."""
+    if current_version(registry_dir) is None:
+        return None
+    return load(registry_dir=registry_dir, verify=verify)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Register, promote and roll back model versions")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    reg = sub.add_parser("register", help="register a directory in the ml/model layout")
+    reg.add_argument("src")
+    reg.add_argument("--version")
+    reg.add_argument("--promote", action="store_true")
+    sub.add_parser("list")
+    pro = sub.add_parser("promote")
+    pro.add_argument("version")
+    sub.add_parser("rollback")
+    ver = sub.add_parser("verify")
+    ver.add_argument("version", nargs="?")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "register":
+            manifest = register_dir(args.src, args.version, registry_dir=args.registry,
+                                    parent=current_version(args.registry))
+            print(f"📦 Registered {manifest['version']} ({manifest['content_hash'][:12]}, "
+                  f"{len(manifest['features'])} features)")
+            if args.promote:
+                promote(manifest["version"], args.registry)
+                print(f"🚀 Promoted {manifest['version']}")
+        elif args.command == "list":
+            current = current_version(args.registry)
+            for m in list_versions(args.registry):
+                mark = "*" if m["version"] == current else " "
+                metrics = ", ".join(f"{k} {v}" for k, v in m.get("metrics", {}).items())
+                print(f"{mark} {m['version']:<24} {m['created_at']}  {len(m['features'])} features  {metrics}")
+        elif args.command == "promote":
+            promote(args.version, args.registry)
+            print(f"🚀 Promoted {args.version}")
+        elif args.command == "rollback":
+            state = rollback(args.registry)
+            print(f"↩️ Rolled back to {state['version']}")
+        elif args.command == "verify":
+            loaded = load(args.version, args.registry)
+            print(f"✅ {loaded.version} matches its manifest")
+    except RegistryError as e:
+        raise SystemExit(f"❌ {e}")
@@ -0,0 +1,17 @@
+# app/odds.py
+"""
+Betting-line helpers shared by the card simulator, the tracked predictions
+store and the prediction pipeline. No app imports, so importing this never
+loads the model or the fighter DB.
+"""
+
+
+def american_to_decimal(odds):
+    """'-435' -> 1.2299, '+325' -> 4.25; None if unparseable."""
+    try:
+        v = float(str(odds).replace("+", "").strip())
+    except ValueError:
+        return None
+    if v == 0:
+        return None
+    return 1 + (v / 100 if v > 0 else 100 / -v)
@@ -0,0 +1,213 @@
+# app/payloads.py
+"""
+Pre-serialized JSON documents derived from files on disk.
+
+A FileBackedValue stats its source files on every get(); only when an
+mtime/size changes are the files re-read and hashed, and only when the
+content hash changes is the value rebuilt. FileBackedPayload keeps a JSON
+document that way as ready bytes with an ETag, so serving it is a dict
+lookup plus, for clients that already hold the current version, a 304.
+
+Payloads built with compress=True also keep gzip and (when the brotli
+package is installed) brotli copies, chosen per request from
+Accept-Encoding. Each encoding has its own ETag derived from the version.
+
+A built Payload can be written to a directory with write_payload() and
+served from there by MappedPayload, which maps the files instead of holding
+a copy: that is how workers sharing a snapshot serve the fighter documents
+the parent encoded once.
+"""
+
+import gzip
+import hashlib
+import mmap
+import os
+import threading
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app import config
+from app.serialization import dumps
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+
+class Payload:
+    __slots__ = ("body", "etag", "version", "encoded")
+
+    def __init__(self, body: bytes, version: str, compress: bool = False):
+        self.body = body
+        self.version = version
+        self.etag = f'"{version}"'
+        self.encoded = {}
+        if compress:
+            self.encoded["gzip"] = gzip.compress(body, compresslevel=config.PAYLOAD_GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self.encoded["br"] = brotli.compress(body, quality=config.PAYLOAD_BROTLI_QUALITY)
+
+    def etag_for(self, encoding) -> str:
+        return self.etag if encoding is None else f'"{self.version}-{encoding}"'
+
+
+class FileBackedValue:
+    """Any object derived from source files, rebuilt only when their content changes."""
+
+    def __init__(self, sources, build):
+        """
+        sources: paths the value depends on (missing ones hash as absent).
+        build:   fn({path: bytes or None}) -> value.
+        """
+        self.sources = [str(p) for p in sources]
+        self.build = build
+        self._lock = threading.Lock()
+        self._signature = None
+        self._digest = None
+        self._value = None
+        self.rebuilds = 0
+        self.hits = 0
+
+    @property
+    def version(self):
+        return self._digest
+
+    def _stat_signature(self):
+        sig = []
+        for path in self.sources:
+            try:
+                st = os.stat(path)
+                sig.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _make(self, raw: dict, digest: str):
+        return self.build(raw)
+
+    def get(self):
+        signature = self._stat_signature()
+        if signature == self._signature and self._value is not None:
+            self.hits += 1
+            return self._value
+
+        with self._lock:
+            if signature == self._signature and self._value is not None:
+                return self._value
+
+            raw, h = {}, hashlib.sha256()
+            for path in self.sources:
+                try:
+                    with open(path, "rb") as f:
+                        raw[path] = f.read()
+                except FileNotFoundError:
+                    raw[path] = None
+                h.update(b"\0" if raw[path] is None else hashlib.sha256(raw[path]).digest())
+            digest = h.hexdigest()[:16]
+
+            if digest != self._digest or self._value is None:
+                # build() may raise; the previous value stays in place
+                self._value = self._make(raw, digest)
+                self._digest = digest
+                self.rebuilds += 1
+            self._signature = signature
+            return self._value
+
+
+class FileBackedPayload(FileBackedValue):
+    def __init__(self, sources, build, compress: bool = False):
+        """
+        build:    fn({path: bytes or None}) -> JSON-able document.
+        compress: also keep gzip/brotli encodings of the body.
+        """
+        super().__init__(sources, build)
+        self.compress = compress
+
+    def _make(self, raw: dict, digest: str) -> Payload:
+        return Payload(dumps(self.build(raw)), digest, self.compress)
+
+
+_SUFFIXES = {None: ".json", "gzip": ".json.gz", "br": ".json.br"}
+
+
+def write_payload(payload: Payload, directory: str, name: str) -> dict:
+    """Write the body and every encoding as <name>.json[.gz|.br]; returns the manifest entry."""
+    os.makedirs(directory, exist_ok=True)
+    for encoding, data in [(None, payload.body)] + list(payload.encoded.items()):
+        with open(os.path.join(directory, name + _SUFFIXES[encoding]), "wb") as f:
+            f.write(data)
+    return {"version": payload.version, "encodings": list(payload.encoded)}
+
+
+def _map(path: str) -> memoryview:
+    with open(path, "rb") as f:
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+class MappedPayload:
+    """
+    A payload written by write_payload, with the get() interface of a
+    FileBackedValue. Its files never change, so it never rebuilds.
+    """
+
+    rebuilds = 0
+
+    def __init__(self, directory: str, name: str, entry: dict):
+        self._payload = Payload(_map(os.path.join(directory, name + _SUFFIXES[None])), entry["version"])
+        for encoding in entry["encodings"]:
+            self._payload.encoded[encoding] = _map(os.path.join(directory, name + _SUFFIXES[encoding]))
+        self.hits = 0
+
+    @property
+    def version(self):
+        return self._payload.version
+
+    def get(self) -> Payload:
+        self.hits += 1
+        return self._payload
+
+
+def etag_matches(request: Request, payload: Payload) -> bool:
+    """If-None-Match against any encoding of the current version."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    current = {payload.etag_for(None)} | {payload.etag_for(e) for e in payload.encoded}
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") in current for t in tags)
+
+
+def negotiate(request: Request, payload: Payload):
+    """Best available encoding the client accepts: br, then gzip, else identity."""
+    if not payload.encoded:
+        return None
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    for encoding in ("br", "gzip"):
+        if encoding in payload.encoded and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def payload_response(request: Request, payload: Payload) -> Response:
+    encoding = negotiate(request, payload)
+    headers = {"ETag": payload.etag_for(encoding), "Cache-Control": "no-cache"}
+    if payload.encoded:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request, payload):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        return Response(content=payload.body, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=payload.encoded[encoding], media_type="application/json", headers=headers)
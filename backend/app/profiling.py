@@ -0,0 +1,352 @@
+# app/profiling.py
+"""
+Opt-in profiling: sampled CPU profiles of live requests, tracemalloc
+snapshots, and a profile of the startup/data-load path.
+
+CPU profiles come from a sampling thread that reads sys._current_frames()
+every PROFILE_SAMPLE_INTERVAL_MS and counts whole stacks. Output is in the
+folded format ("frame;frame;frame count" per line) that flamegraph.pl,
+speedscope and inferno read directly. A session covers the next N requests
+(POST /debug/profile) or a single request sent with `X-Profile: 1`; the
+sampler only runs while a session has requests in flight. It samples every
+thread except idle ones, so unprofiled requests running at the same time
+show up too.
+
+Nothing here runs unless PROFILING_ENABLED is on: the request middleware
+checks that one flag, and no sampler thread or tracemalloc hook exists until
+a session or memory trace is started. Startup profiling is separate and is
+switched on per launch with UFC_PROFILE_STARTUP=1 (or =memory to also keep
+a tracemalloc snapshot labelled "startup"); it samples from before the
+fighter DB and model load until the startup cache warm-up finishes, and
+writes logs/profile-startup.folded.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+
+from app import config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_PROFILE_PATH = os.path.join(BACKEND_DIR, "logs", "profile-startup.folded")
+# Fetching a profile or scraping metrics shouldn't use up a session's requests
+UNPROFILED_PREFIXES = ("/debug/", "/metrics")
+
+# Leaf frames of threads that are parked, not working
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(BACKEND_DIR):
+        path = os.path.relpath(path, BACKEND_DIR)
+    elif "site-packages" in path:
+        path = path.split("site-packages" + os.sep, 1)[1]
+    else:
+        path = os.path.basename(path)
+    # ';' separates frames in folded output
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Counts whole-thread stacks at a fixed interval while gate() is true."""
+
+    def __init__(self, interval_ms: float, gate=None):
+        self.interval = interval_ms / 1000.0
+        self.gate = gate or (lambda: True)
+        self.stacks = Counter()
+        self.samples = 0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if self.gate():
+                self._sample(own)
+
+    def _sample(self, own: int):
+        labels = self._labels
+        for tid, frame in sys._current_frames().items():
+            if tid == own:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _stacks(self) -> Counter:
+        # dict() copies in C, so the sampler thread can't add a stack mid-copy
+        return Counter(dict(self.stacks))
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks().most_common())
+
+    def top(self, n: int = 20) -> dict:
+        """Hottest frames by self samples (leaf) and total samples (anywhere on the stack)."""
+        own, total = Counter(), Counter()
+        for stack, count in self._stacks().items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return {
+            "self": [{"frame": f, "samples": c} for f, c in own.most_common(n)],
+            "total": [{"frame": f, "samples": c} for f, c in total.most_common(n)],
+        }
+
+
+class ProfileSession:
+    def __init__(self, session_id: str, requests: int, interval_ms: float, route_prefix=None):
+        self.id = session_id
+        self.requests = requests
+        self.route_prefix = route_prefix
+        self.taken = 0
+        self.done = 0
+        self.in_flight = 0
+        self.routes = Counter()
+        self.created_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.finished_at = None
+        self.profiler = SamplingProfiler(interval_ms, gate=lambda: self.in_flight > 0)
+
+    def summary(self, top: int = 0) -> dict:
+        out = {
+            "id": self.id,
+            "requests": self.requests,
+            "profiled": self.done,
+            "routes": dict(self.routes),
+            "samples": self.profiler.samples,
+            "interval_ms": self.profiler.interval * 1000,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if top:
+            out["top"] = self.profiler.top(top)
+        return out
+
+
+class ProfileManager:
+    """At most one armed session; finished ones are kept for retrieval."""
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self.armed = None
+        self.finished = OrderedDict()
+        self._lock = threading.Lock()
+
+    def arm(self, requests: int, interval_ms: float = None, route_prefix: str = None,
+            session_id: str = None) -> ProfileSession:
+        with self._lock:
+            if self.armed is not None:
+                raise RuntimeError(f"Profile session {self.armed.id} is still collecting")
+            session = ProfileSession(session_id or uuid.uuid4().hex[:12], requests,
+                                     interval_ms or config.PROFILE_SAMPLE_INTERVAL_MS, route_prefix)
+            session.profiler.start()
+            self.armed = session
+            return session
+
+    def begin_request(self, request_id: str, path: str, force: bool):
+        """Join the armed session (or open a one-request one for X-Profile: 1)."""
+        if path.startswith(UNPROFILED_PREFIXES):
+            return None
+        if self.armed is None and force:
+            try:
+                self.arm(1, session_id=request_id)
+            except RuntimeError:
+                pass
+        with self._lock:
+            session = self.armed
+            if session is None or session.taken >= session.requests:
+                return None
+            if session.route_prefix and not path.startswith(session.route_prefix):
+                return None
+            session.taken += 1
+            session.in_flight += 1
+            session.routes[path] += 1
+            return session
+
+    def end_request(self, session: ProfileSession):
+        with self._lock:
+            session.in_flight -= 1
+            session.done += 1
+            complete = session.done >= session.requests
+            # cancel() (or a newer session) may have replaced it already
+            if complete and self.armed is session:
+                self.armed = None
+        if complete:
+            self._finish(session)
+
+    def cancel(self):
+        with self._lock:
+            session, self.armed = self.armed, None
+        if session is not None:
+            self._finish(session)
+        return session
+
+    def _finish(self, session: ProfileSession):
+        with self._lock:
+            if session.finished_at is not None:  # already finished by cancel() or the last request
+                return
+            session.finished_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        session.profiler.stop()
+        with self._lock:
+            self.finished[session.id] = session
+            while len(self.finished) > self.keep:
+                self.finished.popitem(last=False)
+
+    def get(self, session_id: str):
+        with self._lock:
+            if self.armed is not None and self.armed.id == session_id:
+                return self.armed
+            return self.finished.get(session_id)
+
+    def sessions(self) -> list:
+        with self._lock:
+            sessions = list(self.finished.values())[::-1]
+            if self.armed is not None:
+                sessions.insert(0, self.armed)
+        return [s.summary() for s in sessions]
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots by label, with top-N and diff views."""
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self.snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self):
+        tracemalloc.stop()
+        with self._lock:
+            self.snapshots.clear()
+
+    def snapshot(self, label: str = None) -> str:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running; start it first")
+        snap = tracemalloc.take_snapshot()
+        label = label or time.strftime("%H%M%S")
+        with self._lock:
+            self.snapshots[label] = snap
+            self.snapshots.move_to_end(label)
+            while len(self.snapshots) > self.keep:
+                self.snapshots.popitem(last=False)
+        return label
+
+    def _get(self, label: str):
+        with self._lock:
+            snap = self.snapshots.get(label)
+        if snap is None:
+            raise KeyError(label)
+        return snap
+
+    def top(self, label: str, limit: int = 20, key_type: str = "lineno") -> dict:
+        stats = self._get(label).statistics(key_type)
+        return {
+            "label": label,
+            "total_kib": round(sum(s.size for s in stats) / 1024, 1),
+            "top": [{"where": str(s.traceback), "size_kib": round(s.size / 1024, 1), "count": s.count}
+                    for s in stats[:limit]],
+        }
+
+    def diff(self, before: str, after: str, limit: int = 20, key_type: str = "lineno") -> dict:
+        stats = self._get(after).compare_to(self._get(before), key_type)
+        return {
+            "before": before,
+            "after": after,
+            "total_diff_kib": round(sum(s.size_diff for s in stats) / 1024, 1),
+            "top": [{"where": str(s.traceback), "size_diff_kib": round(s.size_diff / 1024, 1),
+                     "size_kib": round(s.size / 1024, 1), "count_diff": s.count_diff}
+                    for s in stats[:limit]],
+        }
+
+    def labels(self) -> list:
+        with self._lock:
+            return list(self.snapshots)
+
+
+class StartupProfile:
+    """
+    Samples every thread from import time until end(). UFC_PROFILE_STARTUP=1
+    for CPU only; =memory also traces allocations (several times slower).
+    """
+
+    def __init__(self):
+        mode = os.environ.get("UFC_PROFILE_STARTUP", "")
+        self.enabled = mode in ("1", "memory")
+        self.trace_memory = mode == "memory"
+        self.session = None
+        self._t0 = None
+
+    def begin(self):
+        if not self.enabled or self.session is not None:
+            return
+        self._t0 = time.perf_counter()
+        self.session = ProfileSession("startup", 0, config.PROFILE_SAMPLE_INTERVAL_MS)
+        self.session.in_flight = 1
+        self.session.profiler.start()
+        if self.trace_memory:
+            memory_profiler.start(frames=1)
+
+    def end(self):
+        session = self.session
+        if session is None or session.finished_at is not None:
+            return
+        session.in_flight = 0
+        session.profiler.stop()
+        session.finished_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        if self.trace_memory:
+            memory_profiler.snapshot("startup")
+        elapsed = time.perf_counter() - self._t0
+
+        os.makedirs(os.path.dirname(STARTUP_PROFILE_PATH), exist_ok=True)
+        with open(STARTUP_PROFILE_PATH, "w", encoding="utf-8") as f:
+            f.write(session.profiler.folded())
+        with profile_manager._lock:
+            profile_manager.finished[session.id] = session
+
+        print(f"⏱️ Startup took {elapsed:.2f}s ({session.profiler.samples} samples) -> {STARTUP_PROFILE_PATH}")
+        for row in session.profiler.top(10)["total"]:
+            print(f"   {row['samples']:>6}  {row['frame']}")
+
+
+profile_manager = ProfileManager(config.PROFILE_SESSIONS_KEPT)
+memory_profiler = MemoryProfiler(config.PROFILE_MEMORY_SNAPSHOTS_KEPT)
+startup_profile = StartupProfile()
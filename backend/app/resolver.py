@@ -0,0 +1,125 @@
+# app/resolver.py
+"""
+Fill in actual_result/correct for tracked predictions from scraped fight histories.
+
+Every fight in ufc_fighters.json's fight_history becomes an entry in an
+outcome index keyed by the fighter pair and the event date, with the event
+name as a second key for cards whose date didn't parse. Resolving a pending
+prediction is then a dict lookup, and all resolutions are written in one
+TrackedStore transaction, which also updates the accuracy aggregates
+incrementally.
+
+Winners are recorded by name; draws and no contests are recorded as
+"Draw" / "No Contest" and count as misses, like any pick that didn't win.
+Toss-ups get their actual_result too (ml/update_model.py trains on it) but
+no correct flag.
+
+Run after a scrape (scraper.py does this itself):
+    python -m app.resolver [path/to/ufc_fighters.json]
+"""
+
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from app.tracked_store import tracked_store, parse_card_date
+
+FIGHTERS_PATH = Path(__file__).resolve().parent.parent / "data" / "ufc_fighters.json"
+
+# fight_history events end in the card date: "UFC 300: Pereira vs. Hill Apr. 13, 2024"
+_EVENT_DATE = re.compile(r"\s*([A-Za-z]{3})[a-z]*\.? (\d{1,2}), (\d{4})\s*$")
+
+
+def _norm(name) -> str:
+    return " ".join((name or "").lower().split())
+
+
+def _pair(a, b) -> tuple:
+    return tuple(sorted([_norm(a), _norm(b)]))
+
+
+def split_event(event: str):
+    """'UFC 300: Pereira vs. Hill Apr. 13, 2024' -> ('ufc 300: pereira vs. hill', '2024-04-13')."""
+    m = _EVENT_DATE.search(event or "")
+    if not m:
+        return _norm(event), None
+    try:
+        day = datetime.strptime(f"{m.group(1).title()} {m.group(2)} {m.group(3)}", "%b %d %Y").date().isoformat()
+    except ValueError:
+        day = None
+    return _norm(event[:m.start()]), day
+
+
+def _outcome(fighter: str, fight: dict):
+    result = (fight.get("result") or "").lower()
+    if result == "win":
+        return fighter
+    if result == "loss":
+        return fight.get("opponent")
+    if result == "draw":
+        return "Draw"
+    if result == "nc":
+        return "No Contest"
+    return None  # upcoming / unknown
+
+
+def build_outcome_index(fighters: list) -> dict:
+    """{(fighter pair, event date or event name): winner name / "Draw" / "No Contest"}."""
+    index = {}
+    for fighter in fighters:
+        name = fighter.get("name")
+        for fight in fighter.get("fight_history") or []:
+            outcome = _outcome(name, fight)
+            if outcome is None or not fight.get("opponent"):
+                continue
+            pair = _pair(name, fight["opponent"])
+            event_name, day = split_event(fight.get("event"))
+            if day:
+                index.setdefault((pair, day), outcome)
+            if event_name:
+                index.setdefault((pair, event_name), outcome)
+    return index
+
+
+def lookup(index: dict, record: dict):
+    pair = _pair(record.get("fighter1"), record.get("fighter2"))
+    day = parse_card_date(record.get("date"))
+    outcome = index.get((pair, day)) if day else None
+    if outcome is None:
+        outcome = index.get((pair, _norm(record.get("event"))))
+    if outcome is None:
+        return None
+    # Report the winner with the record's own spelling of the name
+    for key in ("fighter1", "fighter2"):
+        if _norm(record.get(key)) == _norm(outcome):
+            return record[key]
+    return outcome
+
+
+def resolve_pending(fighters=None, store=tracked_store) -> dict:
+    """Resolve every pending tracked prediction the fight histories have a result for."""
+    if fighters is None:
+        with open(FIGHTERS_PATH, "r", encoding="utf-8") as f:
+            fighters = json.load(f)
+    index = build_outcome_index(fighters)
+    pending = store.pending()
+
+    results = []
+    for record in pending:
+        outcome = lookup(index, record)
+        if outcome is not None:
+            results.append((record.get("event"), record.get("fighter1"), record.get("fighter2"), outcome))
+    resolved = store.resolve_many(results)
+    return {"pending": len(pending), "resolved": resolved, "still_pending": len(pending) - resolved}
+
+
+if __name__ == "__main__":
+    fighters = None
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r", encoding="utf-8") as f:
+            fighters = json.load(f)
+    counts = resolve_pending(fighters)
+    print(f"✅ Resolved {counts['resolved']} of {counts['pending']} pending predictions "
+          f"({counts['still_pending']} still pending) → {tracked_store.path}")
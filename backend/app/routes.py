@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from app.utils import (
     get_all_fighters, get_fighter_stats, predict_match, fighters_df,
     build_placeholder_fighter, compute_shap_for_pair
@@ -17,6 +18,28 @@ from app.utils import (
 
 
 from app import config
+from app import utils
+from app.batching import inference_batcher
+from app.tracing import current_trace, trace_buffer
+from app.logsink import prediction_log
+from app.attribution import attribution_engine, orient
+from app.utils import should_be_tossup
+from app.simulation import simulate_card
+from app.payloads import FileBackedPayload, payload_response
+from app.upcoming import UPCOMING_PATH, ODDS_PATH, join_upcoming_odds
+from app.fighter_index import FighterIndexSource
+from app.search import SearchIndexSource
+from app.serialization import FastJSONResponse, finite_or_zero
+from app.tracked_store import tracked_store
+from app.shadow import shadow_evaluator, report as shadow_report
+from app import metrics
+from app.metrics import PREDICT_STAGE, SHORT_CIRCUITS
+from app.profiling import profile_manager, memory_profiler
+from fastapi.responses import PlainTextResponse
+from fastapi.responses import Response
+import sqlite3
+from fastapi import Query
+from datetime import date
 import numpy as np
 import pandas as pd
 import json
@@ -37,35 +60,25 @@ class TrackedFight(BaseModel):
     correct: Optional[bool]
 
 router = APIRouter()
-MODEL_VERSION = "v1.2.3"
 TRACKING_FILE = Path("data/prediction_logs.json")
 
-shap_weights = np.load("ml/model/shap_feature_weights.npy")
-feature_list = pd.read_csv("ml/model/feature_list.csv")["feature"].tolist()
+# Served model (the promoted registry version, see app/model_registry.py)
+MODEL_VERSION = utils.MODEL_VERSION
+shap_weights = utils.shap_weights
+feature_list = list(utils.feature_names)
 
 class PredictionRequest(BaseModel):
     fighter1: str
     fighter2: str
 
 def convert_to_builtin_type(val):
-    if isinstance(val, (np.integer, np.floating)):
-        return val.item()
-    if isinstance(val, np.bool_):
-        return bool(val)
-    return val
-
-def safe_json(val):
-    if isinstance(val, (np.integer, np.floating)):
-        val = float(val)
-        return 0.0 if (math.isnan(val) or math.isinf(val)) else val
-    if isinstance(val, float):
-        return 0.0 if (math.isnan(val) or math.isinf(val)) else val
     if isinstance(val, np.bool_):
         return bool(val)
-    if isinstance(val, dict):
-        return {str(k): safe_json(v) for k, v in val.items()}
-    if isinstance(val, list):
-        return [safe_json(v) for v in val]
+    if isinstance(val, np.integer):
+        return val.item()
+    if isinstance(val, (float, np.floating)):
+        # Missing numeric stats have always been sent as 0.0
+        return finite_or_zero(val)
     return val
 
 
@@ -107,27 +120,37 @@ def normalize_keys(fighter: dict) -> dict:
 
 @router.get("/fighters")
 def fetch_fighters():
-    print("GET /fighters called")
-    return get_all_fighters()
+    return FastJSONResponse(get_all_fighters())
 
 @router.get("/fighters_legacy")
 def get_all_fighters_legacy():
     return fighters_df["name"].dropna().unique().tolist()
 
+def load_matchup(request: PredictionRequest):
+    """Load both fighters, falling back to placeholders for anyone not in the DB."""
+    with PREDICT_STAGE.time("lookup"):
+        f1_raw = get_fighter_stats(request.fighter1)
+        f2_raw = get_fighter_stats(request.fighter2)
+    f1 = f1_raw or build_placeholder_fighter(request.fighter1)
+    f2 = f2_raw or build_placeholder_fighter(request.fighter2)
+    return f1, f2, bool(f1_raw), bool(f2_raw)
+
+
+def lookup_pair(name1, name2):
+    """Both fighters' stats; None for anyone not in the DB."""
+    return get_fighter_stats(name1), get_fighter_stats(name2)
+
+
 @router.post("/predict")
 @router.post("/predict")
-def predict_fight(request: PredictionRequest):
-    print(f"\n🔮 Predicting: {request.fighter1} vs {request.fighter2}")
+async def predict_fight(request: PredictionRequest):
+    tr = current_trace()
+    if tr:
+        tr.event("request", fighter1=request.fighter1, fighter2=request.fighter2)
 
     try:
         # 1) Load fighters; allow missing by using placeholders
-        f1_raw = get_fighter_stats(request.fighter1)
-        f2_raw = get_fighter_stats(request.fighter2)
-        fighter1_has_stats = bool(f1_raw)
-        fighter2_has_stats = bool(f2_raw)
-
-        f1 = f1_raw or build_placeholder_fighter(request.fighter1)
-        f2 = f2_raw or build_placeholder_fighter(request.fighter2)
+        f1, f2, fighter1_has_stats, fighter2_has_stats = await run_in_threadpool(load_matchup, request)
 
         # 2) Weight class check: allow if either weight is unknown (typical for debutants)
         def normalize_weight(w):
@@ -151,7 +174,8 @@ def predict_fight(request: PredictionRequest):
 
         w1 = normalize_weight(f1.get("weight"))
         w2 = normalize_weight(f2.get("weight"))
-        print(f"DEBUG: {f1['name']} weight: {w1} | {f2['name']} weight: {w2}")
+        if tr:
+            tr.event("weights", fighter1=f1["name"], weight1=w1, fighter2=f2["name"], weight2=w2)
 
         if not in_same_weight_class(w1, w2):
             raise HTTPException(status_code=400, detail="Fighters are not in the same weight class")
@@ -166,7 +190,9 @@ def predict_fight(request: PredictionRequest):
         is_f2_debut = is_debut_like(f2, fighter2_has_stats)
 
         if is_f1_debut or is_f2_debut:
-            print("⚠️ Debut/missing stats detected — defaulting to 50/50 prediction")
+            SHORT_CIRCUITS.inc("debut")
+            if tr:
+                tr.event("debut", f1_debut=is_f1_debut, f2_debut=is_f2_debut)
             winner = f1["name"]  # arbitrary; UI shows 50/50
             confidence = 50.0
             feature_diffs = {str(feature): 0.0 for feature in feature_list if feature}
@@ -178,9 +204,13 @@ def predict_fight(request: PredictionRequest):
             weighted_feature_diffs = {}
             debut_prediction = True
         else:
-            # 4) Normal prediction path
+            # 4) Normal prediction path (coalesced with concurrent requests when batching is on)
+            if config.BATCHING_ENABLED:
+                prediction = await inference_batcher.submit(f1, f2)
+            else:
+                prediction = await run_in_threadpool(predict_match, f1, f2)
             (winner, confidence, feature_diffs, f1_last5, f2_last5,
-             rematch, stat_favors, red_name, blue_name) = predict_match(f1, f2)
+             rematch, stat_favors, red_name, blue_name) = prediction
 
             shap_weights_arr = shap_weights.tolist()
             feature_list_local = list(feature_diffs.keys())
@@ -196,15 +226,18 @@ def predict_fight(request: PredictionRequest):
             top_3_contributors = [f"{k} ({v:+.3f})" for k, v in top_3]
             debut_prediction = False
 
+            # Challenger models score the same matchup on a background thread
+            if shadow_evaluator.enabled:
+                shadow_evaluator.submit(f1, f2, str(winner))
+
         # 5) Normalize fighter objects for UI
         normalized_f1 = normalize_keys(f1)
         normalized_f2 = normalize_keys(f2)
 
         # 6) Optional logging (only when we had a real model prediction)
         if not debut_prediction:
-            log_path = Path("logs/predictions.log")
-            log_path.parent.mkdir(parents=True, exist_ok=True)
-            log_data = {
+            log_started = time.perf_counter()
+            prediction_log.write({
                 "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
                 "fighter1": request.fighter1,
                 "fighter2": request.fighter2,
@@ -215,82 +248,196 @@ def predict_fight(request: PredictionRequest):
                 "shap_weights": shap_weight_map,
                 "weighted_feature_diffs": weighted_feature_diffs,
                 "top_3_contributors": top_3_contributors
-            }
-            with log_path.open("a", encoding="utf-8") as log_file:
-                log_file.write(json.dumps(log_data) + "\n")
+            })
+            PREDICT_STAGE.observe(time.perf_counter() - log_started, "logging")
 
         # 7) Response — include flags so UI can show “Debut / No stats” icon
-        return safe_json({
-            "model_version": MODEL_VERSION,
-            "predicted_winner": str(winner),
-            "confidence": float(confidence),
-            "feature_differences": feature_diffs,
-            "fighter1_last5": list(map(str, f1_last5)),
-            "fighter2_last5": list(map(str, f2_last5)),
-            "fighter1": str(f1["name"]),
-            "fighter2": str(f2["name"]),
-            "fighter1_data": normalized_f1,
-            "fighter2_data": normalized_f2,
-            "rematch": bool(rematch),
-            "stat_favors": [{"stat": str(sf["stat"]), "favors": str(sf["favors"])} for sf in stat_favors],
-            "is_champion": bool(f1["is_champion"]) if winner == f1["name"] else bool(f2["is_champion"]),
-            "debut_prediction": debut_prediction,
-            "fighter1_has_stats": bool(fighter1_has_stats),
-            "fighter2_has_stats": bool(fighter2_has_stats),
-        })
+        with PREDICT_STAGE.time("serialization"):
+            response = FastJSONResponse({
+                "model_version": MODEL_VERSION,
+                "predicted_winner": str(winner),
+                "confidence": finite_or_zero(confidence),
+                "feature_differences": {str(k): finite_or_zero(v) for k, v in feature_diffs.items()},
+                "fighter1_last5": list(map(str, f1_last5)),
+                "fighter2_last5": list(map(str, f2_last5)),
+                "fighter1": str(f1["name"]),
+                "fighter2": str(f2["name"]),
+                "fighter1_data": normalized_f1,
+                "fighter2_data": normalized_f2,
+                "rematch": bool(rematch),
+                "stat_favors": [{"stat": str(sf["stat"]), "favors": str(sf["favors"])} for sf in stat_favors],
+                "is_champion": bool(f1["is_champion"]) if winner == f1["name"] else bool(f2["is_champion"]),
+                "debut_prediction": debut_prediction,
+                "fighter1_has_stats": bool(fighter1_has_stats),
+                "fighter2_has_stats": bool(fighter2_has_stats),
+            })
+        return response
 
     except HTTPException as http_err:
         raise http_err
     except Exception as e:
         print(f"[Prediction Error] {e}")
+        if tr:
+            tr.event("error", error=repr(e))
         raise HTTPException(status_code=500, detail="Prediction failed due to an unexpected error.")
 
-@router.get("/upcoming")
-def get_upcoming_cards():
-    upcoming_path = Path("data/upcoming_cards.json")
-    odds_path = Path("data/ufc_odds.json")
+@router.get("/shadow/report")
+async def get_shadow_report():
+    """Challenger vs champion agreement on /predict traffic, and accuracy on resolved fights."""
+    try:
+        return FastJSONResponse(await run_in_threadpool(shadow_report))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="ufc_fighters.json not found")
 
-    if not upcoming_path.exists():
-        raise HTTPException(status_code=404, detail="upcoming_cards.json not found")
+@router.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of this worker's request, prediction, cache and scraper metrics."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
-    try:
-        with upcoming_path.open("r", encoding="utf-8") as f:
-            cards = json.load(f)
 
-        odds_data = []
-        if odds_path.exists():
-            with odds_path.open("r", encoding="utf-8") as f:
-                odds_data = json.load(f)
+@router.get("/debug/traces")
+def list_traces(limit: int = 50):
+    return [
+        {"request_id": t.request_id, "route": t.route, "started_at": t.started_at,
+         "duration_ms": t.duration_ms, "status": t.status, "events": len(t.events)}
+        for t in trace_buffer.recent(limit)
+    ]
+
+@router.get("/debug/traces/{request_id}")
+def get_trace(request_id: str):
+    trace = trace_buffer.get(request_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (not sampled or already evicted).")
+    return trace.to_dict()
+
+class ProfileRequest(BaseModel):
+    requests: int = 20
+    interval_ms: Optional[float] = None
+    route_prefix: Optional[str] = None
 
-        def normalize(name: str) -> str:
-            return name.lower().strip()
 
-        for event in cards:
-            for fight in event.get("fights", []):
-                red = normalize(fight.get("fighter_red", ""))
-                blue = normalize(fight.get("fighter_blue", ""))
+def require_profiling():
+    if not config.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (config.PROFILING_ENABLED)")
 
-                match_found = False
-                
-                if isinstance(odds_data, dict):
-                    for event in cards:
-                        for fight in event.get("fights", []):
-                            red = normalize(fight.get("fighter_red", ""))
-                            blue = normalize(fight.get("fighter_blue", ""))
-                            key = "|".join(sorted([red, blue]))
-                            odds = odds_data.get(key)
 
-                            if odds:
-                                fight["odds1"] = odds.get(red, "N/A")
-                                fight["odds2"] = odds.get(blue, "N/A")
-                else:
-                    print("⚠️ odds_data is not a dict — check the JSON format.")
+@router.post("/debug/profile")
+def start_profile(req: ProfileRequest):
+    """Sample the next N requests (optionally only those under route_prefix)."""
+    require_profiling()
+    if not 1 <= req.requests <= config.PROFILE_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"requests must be 1..{config.PROFILE_MAX_REQUESTS}")
+    if req.interval_ms is not None and req.interval_ms < 0.5:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 0.5")
+    try:
+        session = profile_manager.arm(req.requests, req.interval_ms, req.route_prefix)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return session.summary()
+
+@router.delete("/debug/profile")
+def cancel_profile():
+    """Stop the armed session early, keeping what it has sampled."""
+    require_profiling()
+    session = profile_manager.cancel()
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profile session is collecting")
+    return session.summary()
+
+@router.get("/debug/profile")
+def list_profiles():
+    require_profiling()
+    return profile_manager.sessions()
+
+@router.get("/debug/profile/{session_id}")
+def get_profile(session_id: str, format: str = Query("folded", pattern="^(folded|json)$"), top: int = 20):
+    """folded: one "frame;frame;... count" line per stack, for flamegraph.pl or speedscope."""
+    require_profiling()
+    session = profile_manager.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profile not found (unknown id or already evicted)")
+    if format == "json":
+        return session.summary(top=top)
+    return PlainTextResponse(session.profiler.folded())
+
+@router.post("/debug/memory/start")
+def start_memory_trace(frames: int = Query(1, ge=1, le=50)):
+    """Start tracemalloc; frames > 1 keeps deeper tracebacks at a higher cost."""
+    require_profiling()
+    memory_profiler.start(frames)
+    return {"tracing": memory_profiler.tracing, "snapshots": memory_profiler.labels()}
+
+@router.post("/debug/memory/stop")
+def stop_memory_trace():
+    require_profiling()
+    memory_profiler.stop()
+    return {"tracing": memory_profiler.tracing}
+
+@router.post("/debug/memory/snapshot")
+def take_memory_snapshot(label: Optional[str] = None, limit: int = 20):
+    require_profiling()
+    try:
+        label = memory_profiler.snapshot(label)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return memory_profiler.top(label, limit)
+
+@router.get("/debug/memory/diff")
+def diff_memory_snapshots(before: str, after: str, limit: int = 20,
+                          key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$")):
+    """Allocation growth between two labelled snapshots, largest first."""
+    require_profiling()
+    try:
+        return memory_profiler.diff(before, after, limit, key_type)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"No snapshot labelled {e}")
+
+@router.get("/debug/memory/{label}")
+def get_memory_snapshot(label: str, limit: int = 20,
+                        key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$")):
+    require_profiling()
+    try:
+        return memory_profiler.top(label, limit, key_type)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No snapshot labelled {label!r}")
+
+@router.get("/predict/queue")
+def get_predict_queue_stats():
+    return inference_batcher.stats()
 
 
-        return JSONResponse(content=cards)
+upcoming_payload = FileBackedPayload([UPCOMING_PATH, ODDS_PATH], join_upcoming_odds)
 
+
+@router.get("/upcoming")
+def get_upcoming_cards(request: Request):
+    try:
+        payload = upcoming_payload.get()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="upcoming_cards.json not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load upcoming cards: {e}")
+    return payload_response(request, payload)
+
+class SimulationRequest(BaseModel):
+    event: Optional[str] = None
+    sims: Optional[int] = None
+    seed: Optional[int] = None
+    parlays: List[List[str]] = []
+
+
+@router.post("/simulate")
+async def simulate_upcoming(req: SimulationRequest):
+    """Monte Carlo outcome distributions and parlay hit rates for upcoming cards."""
+    if req.sims is not None and req.sims <= 0:
+        raise HTTPException(status_code=400, detail="sims must be positive")
+    try:
+        results = await run_in_threadpool(simulate_card, req.event, req.sims, req.seed, req.parlays)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="upcoming_cards.json not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(results)
 
 @router.get("/config")
 def get_config():
@@ -298,30 +445,25 @@ def get_config():
         "APPLY_FORM_BOOST": config.APPLY_FORM_BOOST,
         "APPLY_STREAK_BOOST": config.APPLY_STREAK_BOOST,
         "APPLY_STAT_DOMINANCE_BONUS": config.APPLY_STAT_DOMINANCE_BONUS,
+        "APPLY_OPP_STRENGTH_BOOST": config.APPLY_OPP_STRENGTH_BOOST,
         "DISPLAY_CHAMPION_BADGE": config.DISPLAY_CHAMPION_BADGE,
         "DEBUG_LOGGING": config.DEBUG_LOGGING,
+        "TRACE_SAMPLE_RATE": config.TRACE_SAMPLE_RATE,
         "MAX_BOOST": config.MAX_BOOST,
-        "MODEL_VERSION": config.MODEL_VERSION
+        "MODEL_VERSION": MODEL_VERSION
     }
 
-@router.get("/full_fighters")
-def get_full_fighters():
-    path = Path("data/ufc_fighters.json")
-    if not path.exists():
-        return JSONResponse(status_code=404, content={"error": "File not found"})
+FIGHTERS_PATH = Path("data/ufc_fighters.json")
 
-    with open(path, "r", encoding="utf-8") as f:
-        fighters = json.load(f)
-    return JSONResponse(content=fighters)
 
-@router.get("/ufc_only_fighters")
-def get_ufc_only_fighters():
-    path = Path("data/ufc_fighters.json")
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="ufc_fighters.json not found")
+def _full_fighters(raw: dict):
+    if raw[str(FIGHTERS_PATH)] is None:
+        raise FileNotFoundError(FIGHTERS_PATH)
+    return json.loads(raw[str(FIGHTERS_PATH)])
+
 
-    with open(path, "r", encoding="utf-8") as f:
-        fighters = json.load(f)
+def _ufc_only_fighters(raw: dict):
+    fighters = _full_fighters(raw)
 
     ufc_fighter_stats = []
     for fighter in fighters:
@@ -341,30 +483,117 @@ def get_ufc_only_fighters():
             fighter_copy["ufc_draws"] = ufc_draws
             ufc_fighter_stats.append(fighter_copy)
 
-    return JSONResponse(content=ufc_fighter_stats)
+    return ufc_fighter_stats
 
-@router.get("/tracked")
-def get_tracked_predictions():
-    path = Path("data/tracked_predictions.json")
 
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Tracked predictions file not found.")
+def _fighters_payload(name: str, build):
+    # Snapshot workers serve the copy the parent encoded into the snapshot (see app.snapshot)
+    payload = utils.snapshot.load_payload(name) if utils.snapshot is not None else None
+    return payload or FileBackedPayload([FIGHTERS_PATH], build, compress=True)
+
+
+full_fighters_payload = _fighters_payload("full_fighters", _full_fighters)
+ufc_only_payload = _fighters_payload("ufc_only_fighters", _ufc_only_fighters)
+
+
+@router.get("/full_fighters")
+def get_full_fighters(request: Request):
+    try:
+        payload = full_fighters_payload.get()
+    except FileNotFoundError:
+        return JSONResponse(status_code=404, content={"error": "File not found"})
+    return payload_response(request, payload)
+
+@router.get("/ufc_only_fighters")
+def get_ufc_only_fighters(request: Request):
+    try:
+        payload = ufc_only_payload.get()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="ufc_fighters.json not found")
+    return payload_response(request, payload)
+
+fighter_index = FighterIndexSource(FIGHTERS_PATH)
+
+
+@router.get("/fighters/query")
+def query_fighters(
+    fields: Optional[str] = Query(None, description="Comma-separated projection, e.g. name,record,division"),
+    division: Optional[str] = Query(None, description="Comma-separated division names"),
+    champion: Optional[bool] = None,
+    min_ufc_fights: Optional[int] = Query(None, ge=0),
+    active_since: Optional[date] = Query(None, description="Last fight on or after YYYY-MM-DD"),
+    sort: str = Query("name", description="Sort key, prefix with - for descending"),
+    limit: int = Query(50, ge=1),
+    cursor: Optional[str] = None,
+):
+    try:
+        index = fighter_index.get()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="ufc_fighters.json not found")
 
+    split = lambda v: [x.strip() for x in v.split(",") if x.strip()] if v else None
     try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Invalid JSON in tracked_predictions.json.")
+        return FastJSONResponse(index.query(
+            fields=split(fields),
+            division=split(division),
+            champion=champion,
+            min_ufc_fights=min_ufc_fights,
+            active_since=active_since,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+search_index = SearchIndexSource(FIGHTERS_PATH)
+
+
+@router.get("/fighters/search")
+def search_fighters(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    """Ranked, typo-tolerant typeahead over fighter names and nicknames."""
+    try:
+        index = search_index.get()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="ufc_fighters.json not found")
+    return FastJSONResponse(index.search(q, limit))
+
+@router.get("/tracked")
+def get_tracked_predictions():
+    try:
+        body = tracked_store.all_records_json()
+    except (sqlite3.Error, json.JSONDecodeError) as e:
+        raise HTTPException(status_code=500, detail=f"Tracked predictions store unavailable: {e}")
+    return Response(content=body, media_type="application/json")
+
+@router.get("/tracked/query")
+def query_tracked_predictions(
+    event: Optional[str] = None,
+    fighter: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = Query(None, description="pending, resolved, correct or wrong"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    try:
+        return FastJSONResponse(tracked_store.query(event, fighter, date_from, date_to, status, limit, offset))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/tracked/aggregates")
+def get_tracked_aggregates():
+    """Hit rate by confidence bucket, by event, favorite vs underdog, and flat-stake ROI."""
+    return FastJSONResponse(tracked_store.aggregates())
     
 class ExplainRequest(BaseModel):
     fighter1: str
     fighter2: str
 
 @router.post("/explain")
-def explain_fight(req: ExplainRequest):
-    # 1) Pull stats just like /predict
-    f1 = get_fighter_stats(req.fighter1)
-    f2 = get_fighter_stats(req.fighter2)
+async def explain_fight(req: ExplainRequest):
+    # 1) Pull stats just like /predict (off the event loop)
+    f1, f2 = await run_in_threadpool(lookup_pair, req.fighter1, req.fighter2)
 
     if not f1 or not f2:
         # fighter not in DB → not explainable
@@ -385,9 +614,16 @@ def explain_fight(req: ExplainRequest):
             "top_contributors": [],
         }
 
-    # 2) Reuse the same logic you trust from predict_match to get features & top factors
+    if should_be_tossup(f1, f2):
+        return {
+            "explainable": False,
+            "reason": "Too few UFC fights — showing 50/50 by design.",
+            "top_contributors": [],
+        }
+
+    # 2) Exact TreeSHAP over the served model, cached per matchup + data version
     try:
-        winner, confidence, feature_diffs, *_rest = predict_match(f1, f2)
+        result = await run_in_threadpool(attribution_engine.explain, f1, f2)
     except Exception as e:
         # Fall back safely
         return {
@@ -396,35 +632,24 @@ def explain_fight(req: ExplainRequest):
             "top_contributors": [],
         }
 
-    # predict_match already computes “top_contributors” internally,
-    # but it returns them as strings if you log; we’ll compute here again so we have values.
-    # If you have ml/model/shap_feature_weights.npy, we can apply it. Otherwise weight=1.0
-    import numpy as np
-
-    feature_names = list(feature_diffs.keys())
-    raw_vals = [float(feature_diffs[k]) for k in feature_names]
-
-    try:
-        weights = np.load("ml/model/shap_feature_weights.npy").tolist()
-        # If file exists but lengths don’t match, ignore
-        if len(weights) != len(feature_names):
-            weights = [1.0] * len(feature_names)
-    except Exception:
-        weights = [1.0] * len(feature_names)
-
-    weighted = [
-        (feature_names[i], round(raw_vals[i] * float(weights[i]), 4))
-        for i in range(len(feature_names))
-    ]
+    # Log-odds contributions, signed so that positive favours req.fighter1
+    result = orient(result, f1["name"])
+    weighted = [(k, round(v, 4)) for k, v in zip(result["features"], result["shap_values"])]
     top = sorted(weighted, key=lambda kv: abs(kv[1]), reverse=True)[:5]
 
-    return {
+    return FastJSONResponse({
         "explainable": True,
         "reason": None,
-        "features": feature_names,
-        # Not true SHAP, but still meaningful magnitudes the UI can show:
+        "features": result["features"],
+        "feature_values": result["feature_values"],
         "shap_values": [v for _, v in weighted],
-        "expected_value": 0.0,
-        "model_proba_canonical_f1": None,
+        "expected_value": result["expected_value"],
+        "model_proba_canonical_f1": result["model_proba_canonical_f1"],
+        "canonical_order": result["canonical_order"],
         "top_contributors": [{"feature": k, "value": v} for k, v in top],
-    }
\ No newline at end of file
+    })
+
+
+@router.get("/explain/cache")
+def explain_cache_stats():
+    return attribution_engine.stats()
@@ -0,0 +1,200 @@
+# app/search.py
+"""
+Fighter typeahead for /fighters/search.
+
+Names and nicknames are normalized (accents stripped, lowercase, quotes and
+punctuation dropped) and indexed two ways:
+
+- a prefix index: every name/nickname token in one sorted array, so a trie
+  node is just the bisect range of a prefix. Short prefixes (which would
+  match thousands of tokens at 100k fighters) keep a precomputed list of
+  their best candidates instead.
+- a trigram index: posting arrays of fighter-field ids per trigram. Counting
+  shared rare trigrams with one np.bincount gives typo-tolerant candidates
+  ("khabib nurmagomedv", "makachev"), rescored by exact trigram similarity.
+
+Trigram matching only runs when prefix matches can't fill the page.
+Candidates are ranked by match type (exact, full-name prefix,
+every query token prefixing a name token, nickname, fuzzy) then trigram
+similarity, with a small boost for fighters with more UFC fights.
+"""
+
+import bisect
+import json
+import math
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+from app.payloads import FileBackedValue
+
+SHORT_PREFIX = 3        # prefixes up to this length use precomputed candidate lists
+SHORT_PREFIX_CAP = 100  # candidates kept per short prefix
+PREFIX_CAP = 500        # ids gathered for a longer prefix
+PREFIX_CANDIDATES = 100 # prefix matches scored per query
+FUZZY_CANDIDATES = 64   # trigram candidates scored per query
+COMMON_GRAM_MIN = 2000  # postings longer than this and...
+COMMON_GRAM_FRACTION = 0.02  # ...this share of fields don't generate fuzzy candidates
+MAX_LIMIT = 50
+
+_PUNCT = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize(text) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace("'", "").replace("’", "")
+    return " ".join(_PUNCT.sub(" ", text).split())
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, fighters: list):
+        n = len(fighters)
+        self.n = n
+        self.names = [f.get("name", "") for f in fighters]
+        self.nicknames = [f.get("nickname", "") or "" for f in fighters]
+        self.norm_names = [normalize(x) for x in self.names]
+        self.norm_nicks = [normalize(x) for x in self.nicknames]
+        self.name_tokens = [set(x.split()) for x in self.norm_names]
+        self.nick_tokens = [set(x.split()) for x in self.norm_nicks]
+
+        ufc_fights = np.array([
+            sum(1 for fight in f.get("fight_history", []) if "UFC" in fight.get("event", ""))
+            for f in fighters
+        ], dtype=float)
+        # 0..1, just enough to order otherwise equal matches by prominence
+        self.prior = np.log1p(ufc_fights) / max(math.log1p(ufc_fights.max(initial=0)), 1.0)
+        by_prior = sorted(range(n), key=lambda i: (-self.prior[i], self.norm_names[i]))
+        rank = {i: r for r, i in enumerate(by_prior)}
+
+        # Prefix index: sorted unique tokens -> fighter ids (ids ordered by prior)
+        postings = defaultdict(set)
+        for i in range(n):
+            for tok in self.name_tokens[i] | self.nick_tokens[i]:
+                postings[tok].add(i)
+        self.tokens = sorted(postings)
+        self.token_ids = [sorted(postings[t], key=rank.__getitem__) for t in self.tokens]
+        self.token_cum = np.concatenate([[0], np.cumsum([len(ids) for ids in self.token_ids])])
+        self.all_tokens = [a | b for a, b in zip(self.name_tokens, self.nick_tokens)]
+
+        short = defaultdict(set)
+        for tok, ids in postings.items():
+            for length in range(1, min(SHORT_PREFIX, len(tok)) + 1):
+                short[tok[:length]].update(ids)
+        self.short = {p: sorted(ids, key=rank.__getitem__)[:SHORT_PREFIX_CAP] for p, ids in short.items()}
+
+        # Trigram index over fields: id i < n is fighter i's name, n + i its nickname
+        self.fields = self.norm_names + self.norm_nicks
+        grams = defaultdict(list)
+        for i, text in enumerate(self.fields):
+            if text:
+                for g in trigrams(text):
+                    grams[g].append(i)
+        self.grams = {g: np.array(ids, dtype=np.int32) for g, ids in grams.items()}
+
+    def _prefix_range(self, token: str):
+        lo = bisect.bisect_left(self.tokens, token)
+        return lo, bisect.bisect_left(self.tokens, token + "\uffff", lo)
+
+    def _prefix_count(self, token: str) -> int:
+        lo, hi = self._prefix_range(token)
+        return int(self.token_cum[hi] - self.token_cum[lo])
+
+    def _prefix_ids(self, token: str) -> list:
+        if len(token) <= SHORT_PREFIX:
+            return self.short.get(token, [])
+        lo, hi = self._prefix_range(token)
+        out = []
+        for j in range(lo, hi):
+            out.extend(self.token_ids[j][:PREFIX_CAP - len(out)])
+            if len(out) >= PREFIX_CAP:
+                break
+        return out
+
+    def _fuzzy(self, query: str) -> dict:
+        """fighter id -> best trigram dice similarity over name/nickname."""
+        q = trigrams(query)
+        lists = sorted((self.grams[g] for g in q if g in self.grams), key=len)
+        if not lists:
+            return {}
+        # Candidates come from the rarer trigrams only; the very common ones
+        # (" jo", "on ") cost the most and barely discriminate
+        cutoff = max(COMMON_GRAM_MIN, int(COMMON_GRAM_FRACTION * 2 * self.n))
+        rare = [ids for ids in lists if len(ids) <= cutoff] or lists[:3]
+        counts = np.bincount(np.concatenate(rare))
+        top = np.flatnonzero(counts)
+        if top.size > FUZZY_CANDIDATES:
+            top = top[np.argpartition(-counts[top], FUZZY_CANDIDATES)[:FUZZY_CANDIDATES]]
+
+        out = {}
+        for field in top.tolist():
+            tg = trigrams(self.fields[field])
+            score = 2.0 * len(q & tg) / (len(q) + len(tg))
+            i = field % self.n
+            if score > out.get(i, 0.0):
+                out[i] = score
+        return out
+
+    def search(self, q: str, limit: int = 10) -> list:
+        query = normalize(q)
+        if not query:
+            return []
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        qtokens = query.split()
+
+        # Prefix matches in prior order: driven by the most selective token
+        # (fewest postings), the others checked against each candidate's tokens
+        driver = min(qtokens, key=self._prefix_count)
+        rest = [t for t in qtokens if t is not driver]
+        candidates = [
+            i for i in self._prefix_ids(driver)
+            if all(any(tok.startswith(t) for tok in self.all_tokens[i]) for t in rest)
+        ][:PREFIX_CANDIDATES]
+
+        # Typo tolerance only when prefixes don't already fill the page
+        fuzzy = self._fuzzy(query) if len(candidates) < limit else {}
+        seen = set(candidates)
+        candidates += [i for i in fuzzy if i not in seen]
+        scored = []
+        for i in candidates:
+            name = self.norm_names[i]
+            in_name = [any(tok.startswith(t) for tok in self.name_tokens[i]) for t in qtokens]
+            in_nick = [any(tok.startswith(t) for tok in self.nick_tokens[i]) for t in qtokens]
+            if query == name:
+                tier, match = 5, "exact"
+            elif name.startswith(query):
+                tier, match = 4, "prefix"
+            elif any(in_name) and all(a or b for a, b in zip(in_name, in_nick)):
+                tier, match = 3, "tokens"
+            elif all(in_nick):
+                tier, match = 2, "nickname"
+            else:
+                tier, match = 1, "fuzzy"
+            score = tier + fuzzy.get(i, 0.0) * 0.9 + self.prior[i] * 0.1
+            scored.append((score, i, match))
+
+        scored.sort(key=lambda s: (-s[0], self.norm_names[s[1]]))
+        return [
+            {"name": self.names[i], "nickname": self.nicknames[i], "score": round(score, 4), "match": match}
+            for score, i, match in scored[:limit]
+        ]
+
+
+class SearchIndexSource(FileBackedValue):
+    """A SearchIndex over one JSON file, rebuilt when the file's content changes."""
+
+    def __init__(self, path):
+        super().__init__([path], None)
+
+    def _make(self, raw: dict, digest: str) -> SearchIndex:
+        data = raw[self.sources[0]]
+        if data is None:
+            raise FileNotFoundError(self.sources[0])
+        return SearchIndex(json.loads(data))
@@ -0,0 +1,78 @@
+# app/serialization.py
+"""
+One JSON encoding path for every response.
+
+FastJSONResponse (the app's default response class) encodes with orjson:
+NumPy scalars and arrays natively, pandas Series/Timestamps and dates via
+_default. NaN/Inf become null, so a stray NaN can no longer turn a response
+into a 500. Handlers that return a FastJSONResponse themselves also skip
+FastAPI's jsonable_encoder pass.
+
+Without orjson installed, the stdlib json module is used with the same
+rules; it is slower but produces equivalent JSON.
+"""
+
+import json
+import math
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional; stdlib fallback below
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, pd.Series):
+        return obj.to_dict()
+    if isinstance(obj, (pd.Timestamp, datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj):
+    """Stdlib fallback only: NaN/Inf -> None, keys -> str."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {str(k): _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    if isinstance(obj, (np.generic, np.ndarray, pd.Series, set, frozenset)):
+        return _finite(_default(obj))
+    return obj
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+else:
+    def dumps(obj) -> bytes:
+        return json.dumps(_finite(obj), default=_default, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+
+
+def finite_or_zero(value) -> float:
+    """Float for the /predict payload, where missing numbers have always been 0.0."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if math.isfinite(value) else 0.0
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
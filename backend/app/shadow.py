@@ -0,0 +1,323 @@
+# app/shadow.py
+"""
+Shadow (champion / challenger) evaluation on /predict traffic.
+
+When config.SHADOW_CHALLENGERS lists registry versions or model directories
+(e.g. "v1.1.0" or "saved/old_model_info"), /predict hands each scored
+matchup to shadow_evaluator.submit(). That call is one put_nowait on a
+bounded queue; when the queue is full the matchup is dropped and counted,
+and the response never waits. A daemon thread takes up to SHADOW_BATCH_SIZE
+matchups at a time and builds the feature matrix for the union of every
+model's features in one vectorized pass (utils.build_feature_matrix).
+Each model (the served champion included, so its raw probability is on
+record) then gets one scaler + predict_proba call over its own columns.
+The results are written through a PredictionLogSink to logs/shadow.log
+(batched, locked, rotated like predictions.log), one short line per
+matchup:
+
+    {"ts": "2025-08-09T21:14:03", "a": "Fighter A", "b": "Fighter B", "w": "Fighter A",
+     "c": "v1.2.3", "p": {"v1.2.3": 0.6123, "v1.1.0": 0.5871}}
+
+a / b are in the canonical (alphabetical) order the model sees, p is each
+model's raw P(a wins) before boosts, and w is the winner the API returned.
+Toss-ups are not scored.
+
+report() reads the log and its rotated .gz files. For each challenger it
+gives pick agreement with the champion and the mean absolute probability
+gap over all traffic. Once the fighter DB has a result for a matchup (the
+pair's first fight on or after the prediction day), it also gives accuracy
+and log loss for both models on each resolved fight, using the last
+prediction made before it.
+
+    python -m app.shadow [path/to/ufc_fighters.json]
+"""
+
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app import config
+from app.logsink import PredictionLogSink
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+LOG_PATH = BACKEND_DIR / "logs" / "shadow.log"
+FIGHTERS_PATH = BACKEND_DIR / "data" / "ufc_fighters.json"
+
+_STOP = object()
+
+
+def load_challenger(spec: str):
+    """(model, scaler, feature_names) for a registry version or a directory in the ml/model layout."""
+    from app import model_registry
+
+    path = spec if os.path.isabs(spec) else os.path.join(BACKEND_DIR, spec)
+    if os.path.isdir(path):
+        model = joblib.load(os.path.join(path, "mlp_model.joblib"))
+        scaler = joblib.load(os.path.join(path, "scaler.joblib"))
+        feature_names = pd.read_csv(os.path.join(path, "feature_list.csv"))["feature"].tolist()
+        return model, scaler, feature_names
+    registered = model_registry.load(spec)
+    return registered.model, registered.scaler, registered.feature_names
+
+
+class ShadowEvaluator:
+    def __init__(self, challengers, sink, batch_size=256, flush_seconds=2.0, max_queue=10_000):
+        self.challengers = list(challengers)
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._models = None
+        self.submitted = 0
+        self.scored = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.challengers)
+
+    def submit(self, f1: dict, f2: dict, served_winner: str):
+        """Queue one matchup for the challengers; never blocks the caller."""
+        if not self.challengers:
+            return
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait((f1, f2, served_winner, time.strftime("%Y-%m-%dT%H:%M:%S")))
+            self.submitted += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: float = 5.0):
+        """Score everything queued so far, stop the thread and flush the log."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+        self.sink.close()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0.0)))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            items = [item for item in batch if item is not _STOP]
+            if items:
+                try:
+                    self._score(items)
+                except Exception as e:
+                    self.failed += len(items)
+                    print(f"⚠️ Shadow batch failed: {e}")
+            if stop:
+                return
+
+    def _load_models(self) -> dict:
+        """{label: (model, scaler, feature_names)}, champion first; loaded in the worker thread."""
+        from app import utils
+
+        models = {utils.MODEL_VERSION: (utils.model, utils.scaler, list(utils.feature_names))}
+        for spec in self.challengers:
+            try:
+                models[spec] = load_challenger(spec)
+            except Exception as e:
+                print(f"⚠️ Shadow challenger {spec} not loaded: {e}")
+        return models
+
+    def _score(self, items):
+        from app import utils
+
+        if self._models is None:
+            self._models = self._load_models()
+
+        rows, records = [], []
+        for f1, f2, served_winner, ts in items:
+            if utils.should_be_tossup(f1, f2):
+                continue
+            if f1["name"].strip().lower() > f2["name"].strip().lower():
+                f1, f2 = f2, f1
+            rows.append((f1, f2))
+            records.append({"ts": ts, "a": f1["name"], "b": f2["name"], "w": served_winner,
+                            "c": utils.MODEL_VERSION, "p": {}})
+        if not rows:
+            return
+
+        columns = list(dict.fromkeys(name for _, _, names in self._models.values() for name in names))
+        X = utils.build_feature_matrix(rows, columns)
+        for label, (model, scaler, names) in self._models.items():
+            try:
+                proba = model.predict_proba(scaler.transform(X[names]))[:, 1]
+            except Exception as e:
+                print(f"⚠️ Shadow model {label} failed: {e}")
+                continue
+            for record, p in zip(records, proba):
+                record["p"][label] = round(float(p), 4)
+
+        for record in records:
+            self.sink.write(record)
+        self.scored += len(records)
+        self.batches += 1
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "submitted": self.submitted,
+            "scored": self.scored,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+# === Report ===
+
+def read_log(path=LOG_PATH) -> list:
+    """Every record in the shadow log and its rotated (.gz) files, oldest first."""
+    path = str(path)
+    records = []
+    for name in sorted(glob.glob(path + ".*.gz")) + [path]:
+        if not os.path.exists(name):
+            continue
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(name, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    records.sort(key=lambda r: r.get("ts", ""))
+    return records
+
+
+def fight_outcomes(fighters: list) -> dict:
+    """{fighter pair: [(day, winner name), ...]} for decided fights, oldest first."""
+    from app.resolver import _outcome, _pair, split_event
+
+    outcomes = {}
+    for fighter in fighters:
+        for fight in fighter.get("fight_history") or []:
+            winner = _outcome(fighter.get("name"), fight)
+            _, day = split_event(fight.get("event"))
+            if winner in (None, "Draw", "No Contest") or not day or not fight.get("opponent"):
+                continue
+            outcomes.setdefault(_pair(fighter.get("name"), fight["opponent"]), set()).add((day, winner))
+    return {pair: sorted(fights) for pair, fights in outcomes.items()}
+
+
+def _resolve(outcomes: dict, record: dict):
+    """(fight day, 1 if a won) for the pair's first decided fight on or after the prediction day."""
+    from app.resolver import _norm, _pair
+
+    day = record["ts"][:10]
+    for fight_day, winner in outcomes.get(_pair(record["a"], record["b"]), []):
+        if fight_day >= day:
+            return fight_day, int(_norm(winner) == _norm(record["a"]))
+    return None
+
+
+def _log_loss(y, p) -> float:
+    p = np.clip(np.asarray(p, dtype=float), 1e-6, 1 - 1e-6)
+    y = np.asarray(y, dtype=float)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def report(records=None, fighters=None) -> dict:
+    """Agreement over all shadow traffic, and accuracy over resolved fights, per challenger."""
+    records = read_log() if records is None else records
+    if fighters is None:
+        with open(FIGHTERS_PATH, "r", encoding="utf-8") as f:
+            fighters = json.load(f)
+    outcomes = fight_outcomes(fighters)
+
+    # Last prediction before each resolved fight
+    resolved = {}
+    for record in records:
+        hit = _resolve(outcomes, record)
+        if hit is not None:
+            resolved[(record["a"].lower(), record["b"].lower(), hit[0])] = (record, hit[1])
+
+    out = {"records": len(records), "resolved_fights": len(resolved), "challengers": {}}
+    challengers = sorted({label for r in records for label in r["p"] if label != r["c"]})
+    for label in challengers:
+        both = [(r["p"][r["c"]], r["p"][label]) for r in records if label in r["p"] and r["c"] in r["p"]]
+        if not both:
+            continue
+        champ, chall = np.array(both).T
+        entry = {
+            "scored": len(both),
+            "agreement": round(float(np.mean((champ >= 0.5) == (chall >= 0.5))), 4),
+            "mean_abs_diff": round(float(np.mean(np.abs(champ - chall))), 4),
+            "champions": sorted({r["c"] for r in records if label in r["p"]}),
+        }
+        fights = [(r["p"][r["c"]], r["p"][label], y) for r, y in resolved.values() if label in r["p"]]
+        entry["resolved"] = len(fights)
+        if fights:
+            champ_p, chall_p, y = (np.array(col) for col in zip(*fights))
+            entry.update({
+                "accuracy": round(float(np.mean((chall_p >= 0.5) == y)), 4),
+                "champion_accuracy": round(float(np.mean((champ_p >= 0.5) == y)), 4),
+                "log_loss": round(_log_loss(y, chall_p), 4),
+                "champion_log_loss": round(_log_loss(y, champ_p), 4),
+            })
+        out["challengers"][label] = entry
+    return out
+
+
+shadow_log = PredictionLogSink(
+    LOG_PATH,
+    flush_records=config.SHADOW_BATCH_SIZE,
+    flush_seconds=config.SHADOW_FLUSH_SECONDS,
+    max_bytes=config.PREDICTION_LOG_MAX_BYTES,
+    backups=config.PREDICTION_LOG_BACKUPS,
+)
+shadow_evaluator = ShadowEvaluator(
+    config.SHADOW_CHALLENGERS,
+    shadow_log,
+    batch_size=config.SHADOW_BATCH_SIZE,
+    flush_seconds=config.SHADOW_FLUSH_SECONDS,
+    max_queue=config.SHADOW_QUEUE_SIZE,
+)
+atexit.register(shadow_evaluator.close)
+
+
+if __name__ == "__main__":
+    import sys
+
+    fighters = None
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r", encoding="utf-8") as f:
+            fighters = json.load(f)
+    result = report(fighters=fighters)
+    print(f"🕵️ {result['records']} shadow predictions, {result['resolved_fights']} resolved fights")
+    for label, entry in result["challengers"].items():
+        line = (f"  {label:<24} agreement {entry['agreement']:.1%}  mean |Δp| {entry['mean_abs_diff']:.3f}"
+                f"  ({entry['scored']} scored vs {', '.join(entry['champions'])})")
+        if entry["resolved"]:
+            line += (f"\n  {'':<24} accuracy {entry['accuracy']:.1%} vs champion {entry['champion_accuracy']:.1%},"
+                     f" log loss {entry['log_loss']:.3f} vs {entry['champion_log_loss']:.3f}"
+                     f" over {entry['resolved']} fights")
+        print(line)
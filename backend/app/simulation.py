@@ -0,0 +1,215 @@
+# app/simulation.py
+"""
+Monte Carlo simulation of whole fight cards.
+
+Every bout on a card is scored with one batched predict_matches call; each
+bout's win probability is the served pick's boosted probability (the model's
+P(win) after the confidence boosts; config.REMATCH_OVERRIDE_PROBA when the
+recent-rematch override decides the pick, 0.5 for toss-ups). The displayed
+confidence is a 50-75 UI score, not a probability, and is not used. The card is
+then simulated as a (sims x bouts) matrix of Bernoulli draws in fixed-size
+chunks, so a million simulations of a 13-fight card stay well under a second
+and use bounded memory. Bouts are treated as independent.
+
+    python -m app.simulation --sims 1000000 --seed 7
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app import config
+from app import utils
+from app.odds import american_to_decimal
+from app.upcoming import UPCOMING_PATH, ODDS_PATH
+
+
+CHUNK_SIZE = 250_000
+
+
+def _norm(name) -> str:
+    return (name or "").lower().strip()
+
+
+def load_cards(path=UPCOMING_PATH) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_odds(path=ODDS_PATH) -> dict:
+    if not Path(path).exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        odds = json.load(f)
+    return odds if isinstance(odds, dict) else {}
+
+
+def card_bouts(event: dict, odds: dict) -> list:
+    """Per-bout pick probabilities for one event, from a single batched model call."""
+    fights = [f for f in event.get("fights", []) if f.get("fighter_red") and f.get("fighter_blue")]
+    pairs = [(utils.get_fighter_stats(f["fighter_red"]), utils.get_fighter_stats(f["fighter_blue"])) for f in fights]
+    results = utils.predict_matches(pairs, with_proba=True)
+
+    bouts = []
+    for fight, (result, p_red) in zip(fights, results):
+        red, blue = fight["fighter_red"], fight["fighter_blue"]
+        winner = result[0]
+        tossup = winner == "Toss Up"
+        pick = red if tossup or _norm(winner) == _norm(red) else blue
+        other = blue if pick == red else red
+        p_pick = 0.5 if tossup else min(max(p_red if pick == red else 1 - p_red, 0.0), 1.0)
+
+        line = odds.get("|".join(sorted([_norm(red), _norm(blue)])), {})
+        dec_pick = american_to_decimal(line.get(_norm(pick))) if line else None
+        dec_other = american_to_decimal(line.get(_norm(other))) if line else None
+        favorite = None
+        if dec_pick and dec_other:
+            favorite = pick if dec_pick <= dec_other else other
+
+        bouts.append({
+            "fighter_red": red,
+            "fighter_blue": blue,
+            "pick": pick,
+            "opponent": other,
+            "p_pick": p_pick,
+            "tossup": tossup,
+            "favorite": favorite,
+            "decimal_odds_pick": dec_pick,
+            "decimal_odds_opponent": dec_other,
+        })
+    return bouts
+
+
+def _parlay_legs(bouts: list, legs: list):
+    """Map fighter names to (bout index, pick must win) pairs."""
+    index = {}
+    for i, b in enumerate(bouts):
+        index[_norm(b["pick"])] = (i, True)
+        index[_norm(b["opponent"])] = (i, False)
+    resolved = []
+    for name in legs:
+        if _norm(name) not in index:
+            raise ValueError(f"{name} is not on this card")
+        resolved.append(index[_norm(name)])
+    return resolved
+
+
+def simulate_bouts(bouts: list, sims: int, seed=None, parlays=None) -> dict:
+    """Simulate `sims` runs of the card; parlays is a list of fighter-name lists."""
+    n = len(bouts)
+    parlays = parlays or []
+    rng = np.random.default_rng(seed)
+    p = np.array([b["p_pick"] for b in bouts], dtype=np.float32)
+    has_fav = np.array([b["favorite"] is not None for b in bouts])
+    fav_is_pick = np.array([b["favorite"] == b["pick"] for b in bouts])
+    order = np.argsort(-p, kind="stable")
+    resolved = [_parlay_legs(bouts, legs) for legs in parlays]
+
+    correct_counts = np.zeros(n + 1, dtype=np.int64)
+    fav_counts = np.zeros(int(has_fav.sum()) + 1, dtype=np.int64)
+    topk_hits = np.zeros(n, dtype=np.int64)
+    parlay_hits = np.zeros(len(resolved), dtype=np.int64)
+
+    done = 0
+    while done < sims:
+        m = min(CHUNK_SIZE, sims - done)
+        hits = rng.random((m, n), dtype=np.float32) < p  # True = model pick wins
+        correct_counts += np.bincount(hits.sum(axis=1), minlength=n + 1)
+        if has_fav.any():
+            fav_won = (hits[:, has_fav] == fav_is_pick[has_fav]).sum(axis=1)
+            fav_counts += np.bincount(fav_won, minlength=fav_counts.size)
+        if n:
+            topk_hits += np.logical_and.accumulate(hits[:, order], axis=1).sum(axis=0)
+        for j, legs in enumerate(resolved):
+            idx = [i for i, _ in legs]
+            want = np.array([w for _, w in legs])
+            parlay_hits[j] += (hits[:, idx] == want).all(axis=1).sum()
+        done += m
+
+    def distribution(counts):
+        probs = counts / sims
+        return {
+            "mean": float(np.dot(np.arange(counts.size), probs)),
+            "probabilities": [round(float(x), 6) for x in probs],
+        }
+
+    top_k = []
+    for k in range(1, n + 1):
+        legs = [bouts[i] for i in order[:k]]
+        payout = np.prod([b["decimal_odds_pick"] for b in legs]) if all(b["decimal_odds_pick"] for b in legs) else None
+        hit = topk_hits[k - 1] / sims
+        top_k.append({
+            "legs": [b["pick"] for b in legs],
+            "hit_rate": round(float(hit), 6),
+            "exact": round(float(np.prod(p[order[:k]].astype(np.float64))), 6),
+            "decimal_payout": round(float(payout), 3) if payout else None,
+            "expected_return": round(float(hit * payout - 1), 4) if payout else None,
+        })
+
+    custom = []
+    for legs, names, hit in zip(resolved, parlays, parlay_hits):
+        exact = np.prod([p[i] if w else 1 - p[i] for i, w in legs], dtype=np.float64)
+        custom.append({"legs": names, "hit_rate": round(float(hit / sims), 6), "exact": round(float(exact), 6)})
+
+    return {
+        "sims": sims,
+        "seed": seed,
+        "bouts": bouts,
+        "expected_correct_picks": round(float(p.astype(np.float64).sum()), 4),
+        "correct_picks": distribution(correct_counts),
+        "favorites_winning": {"bouts_with_odds": int(has_fav.sum()), **distribution(fav_counts)},
+        "top_k_parlays": top_k,
+        "parlays": custom,
+    }
+
+
+def simulate_card(event_name=None, sims=None, seed=None, parlays=None, cards=None, odds=None) -> list:
+    """Simulate one named event (or every upcoming event)."""
+    sims = min(int(sims or config.SIMULATION_DEFAULT_SIMS), config.SIMULATION_MAX_SIMS)
+    seed = config.SIMULATION_SEED if seed is None else seed
+    cards = load_cards() if cards is None else cards
+    odds = load_odds() if odds is None else odds
+
+    events = [e for e in cards if event_name is None or _norm(e.get("event_name")) == _norm(event_name)]
+    if not events:
+        raise ValueError(f"No upcoming event named {event_name!r}")
+
+    out = []
+    for event in events:
+        bouts = card_bouts(event, odds)
+        # Custom parlays only apply to the event holding all their legs
+        names = {_norm(b["pick"]) for b in bouts} | {_norm(b["opponent"]) for b in bouts}
+        own = [legs for legs in (parlays or []) if all(_norm(x) in names for x in legs)]
+        if event_name is not None and len(own) != len(parlays or []):
+            raise ValueError("Every parlay leg must be a fighter on this card")
+        out.append({
+            "event_name": event.get("event_name"),
+            "date": event.get("date"),
+            **simulate_bouts(bouts, sims, seed, own),
+        })
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--event", default=None)
+    parser.add_argument("--sims", type=int, default=config.SIMULATION_DEFAULT_SIMS)
+    parser.add_argument("--seed", type=int, default=config.SIMULATION_SEED)
+    args = parser.parse_args()
+
+    cards = load_cards()
+    events = [e.get("event_name") for e in cards] if args.event is None else [args.event]
+    for name in events:
+        t0 = time.perf_counter()
+        result = simulate_card(name, args.sims, args.seed, cards=cards)[0]
+        elapsed = (time.perf_counter() - t0) * 1000
+        all_in = result["top_k_parlays"][-1]["hit_rate"] if result["top_k_parlays"] else None
+        print(f"🎲 {result['event_name']}: {len(result['bouts'])} bouts, "
+              f"E[correct]={result['expected_correct_picks']}, all-picks parlay={all_in}, "
+              f"{args.sims:,} sims in {elapsed:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# app/snapshot.py
+"""
+Read-only, memory-mapped snapshot of the fighter DB and model.
+
+The production entry point (serve.py) builds one snapshot directory before
+starting workers; every worker then attaches to the same files with
+np.load(mmap_mode="r"), so the numeric columns, string tables, fight
+histories and tree arrays live once in the OS page cache instead of once per
+process.
+
+Layout of a snapshot directory:
+    manifest.json          version hash, row count, column names
+    numeric.npy            float64 (n_fighters, n_numeric)
+    is_champion.npy        bool (n_fighters,)
+    strings.npy            uint8 blob of every string column, utf-8
+    string_offsets.npy     int64 (n_string_cols, n_fighters + 1)
+    history.npy            uint8 blob of per-fighter fight_history JSON
+    history_offsets.npy    int64 (n_fighters + 1,)
+    trees/*.npy            flattened GradientBoosting trees (when applicable)
+    scaler.joblib          uncompressed so joblib can mmap its arrays
+    mlp_model.joblib       fallback for non-GBM estimators
+    feature_list.csv
+    shap_feature_weights.npy
+    payloads/*.json[.gz|.br] pre-encoded fighter documents (app.payloads.write_payload)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+
+NUMERIC_COLUMNS = ["weight", "height", "reach", "SLpM", "SApM", "TD Avg.", "TD Def.", "Str. Acc.", "Str. Def"]
+STRING_COLUMNS = ["name", "nickname", "dob", "record"]
+
+
+def _pack_strings(values):
+    encoded = [(v if isinstance(v, str) else "").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return b"".join(encoded), offsets
+
+
+def _flatten_gbm(model):
+    """Pad every tree of a binary GradientBoostingClassifier into shared 2-D arrays."""
+    trees = [est[0].tree_ for est in model.estimators_]
+    n_trees = len(trees)
+    max_nodes = max(t.node_count for t in trees)
+
+    left = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+    right = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+    feature = np.zeros((n_trees, max_nodes), dtype=np.int32)
+    threshold = np.zeros((n_trees, max_nodes), dtype=np.float64)
+    value = np.zeros((n_trees, max_nodes), dtype=np.float64)
+    cover = np.zeros((n_trees, max_nodes), dtype=np.float64)
+
+    for i, t in enumerate(trees):
+        n = t.node_count
+        left[i, :n] = t.children_left
+        right[i, :n] = t.children_right
+        feature[i, :n] = np.maximum(t.feature, 0)
+        threshold[i, :n] = t.threshold
+        value[i, :n] = t.value[:, 0, 0]
+        cover[i, :n] = t.weighted_n_node_samples
+
+    init_raw = float(model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0, 0])
+    return {
+        "left": left, "right": right, "feature": feature, "threshold": threshold,
+        "value": value, "cover": cover,
+        "meta": {"learning_rate": float(model.learning_rate), "init_raw": init_raw,
+                 "n_features": int(model.n_features_in_), "max_depth": int(max(t.max_depth for t in trees))},
+    }
+
+
+class FlatGradientBoosting:
+    """
+    Drop-in predict_proba for a binary GradientBoostingClassifier whose trees
+    were flattened by build_snapshot. Traverses all trees at once per depth
+    level and accumulates stages in the same order sklearn does, so the
+    probabilities match the original estimator bit for bit.
+    """
+
+    def __init__(self, tree_dir: str, mmap_mode="r"):
+        load = lambda name: np.load(os.path.join(tree_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+        self.left = load("left")
+        self.right = load("right")
+        self.feature = load("feature")
+        self.threshold = load("threshold")
+        self.value = load("value")
+        self.cover = load("cover")
+        with open(os.path.join(tree_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.learning_rate = meta["learning_rate"]
+        self.init_raw = meta["init_raw"]
+        self.n_features_in_ = meta["n_features"]
+        self.max_depth = meta["max_depth"]
+        self.n_trees = self.left.shape[0]
+        self.classes_ = np.array([0, 1])
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf index reached in every tree, shape (n_samples, n_trees)."""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        tree_idx = np.arange(self.n_trees)[None, :]
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.zeros((X.shape[0], self.n_trees), dtype=np.int64)
+        for _ in range(self.max_depth):
+            left = self.left[tree_idx, node]
+            is_leaf = left == -1
+            if is_leaf.all():
+                break
+            go_left = X[rows, self.feature[tree_idx, node]] <= self.threshold[tree_idx, node]
+            node = np.where(is_leaf, node, np.where(go_left, left, self.right[tree_idx, node]))
+        return node
+
+    def decision_function(self, X) -> np.ndarray:
+        leaf_values = self.value[np.arange(self.n_trees)[None, :], self.apply(X)]
+        raw = np.full(leaf_values.shape[0], self.init_raw)
+        for t in range(self.n_trees):
+            raw += self.learning_rate * leaf_values[:, t]
+        return raw
+
+    def predict_proba(self, X) -> np.ndarray:
+        p = expit(self.decision_function(X))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
+
+
+def snapshot_version(fighters_json: str, model_dir: str) -> str:
+    """Content hash of everything a snapshot is built from."""
+    h = hashlib.sha256()
+    paths = [fighters_json] + [os.path.join(model_dir, n) for n in sorted(os.listdir(model_dir))]
+    for path in paths:
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def build_snapshot(fighters_df, fight_histories, model, scaler, feature_names, out_dir, version=None,
+                   shap_weights=None, model_version=None, payloads=None):
+    """
+    Write a snapshot of an in-memory fighter frame and model to out_dir.
+    payloads maps names to built app.payloads.Payload objects to store encoded.
+    Files are written to a temp dir next to out_dir and swapped in at the end,
+    so running workers never see a half-written snapshot.
+    """
+    parent = os.path.dirname(os.path.abspath(out_dir)) or "."
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".snapshot-", dir=parent)
+
+    numeric = fighters_df[NUMERIC_COLUMNS].to_numpy(dtype=np.float64, na_value=np.nan)
+    np.save(os.path.join(tmp, "numeric.npy"), numeric)
+    np.save(os.path.join(tmp, "is_champion.npy"), fighters_df["is_champion"].fillna(False).to_numpy(dtype=bool))
+
+    blobs, offsets, base = [], [], 0
+    for col in STRING_COLUMNS:
+        blob, off = _pack_strings(fighters_df[col].tolist())
+        blobs.append(blob)
+        offsets.append(off + base)
+        base += len(blob)
+    np.save(os.path.join(tmp, "strings.npy"), np.frombuffer(b"".join(blobs), dtype=np.uint8))
+    np.save(os.path.join(tmp, "string_offsets.npy"), np.vstack(offsets))
+
+    history_blob, history_offsets = _pack_strings(
+        [json.dumps(h or [], ensure_ascii=False, separators=(",", ":")) for h in fight_histories]
+    )
+    np.save(os.path.join(tmp, "history.npy"), np.frombuffer(history_blob, dtype=np.uint8))
+    np.save(os.path.join(tmp, "history_offsets.npy"), history_offsets)
+
+    model_kind = "joblib"
+    if type(model).__name__ == "GradientBoostingClassifier" and len(getattr(model, "classes_", [])) == 2:
+        flat = _flatten_gbm(model)
+        tree_dir = os.path.join(tmp, "trees")
+        os.makedirs(tree_dir)
+        for name, arr in flat.items():
+            if name == "meta":
+                with open(os.path.join(tree_dir, "meta.json"), "w", encoding="utf-8") as f:
+                    json.dump(arr, f)
+            else:
+                np.save(os.path.join(tree_dir, f"{name}.npy"), arr)
+        model_kind = "flat_gbm"
+    joblib.dump(model, os.path.join(tmp, "mlp_model.joblib"))
+    joblib.dump(scaler, os.path.join(tmp, "scaler.joblib"))
+    pd.DataFrame({"feature": feature_names}).to_csv(os.path.join(tmp, "feature_list.csv"), index=False)
+    if shap_weights is not None:
+        np.save(os.path.join(tmp, "shap_feature_weights.npy"), np.asarray(shap_weights, dtype=np.float64))
+    payload_entries = {}
+    if payloads:
+        from app.payloads import write_payload
+        for name, payload in payloads.items():
+            payload_entries[name] = write_payload(payload, os.path.join(tmp, "payloads"), name)
+
+    manifest = {
+        "version": version,
+        "model_version": model_version,
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "n_fighters": int(len(fighters_df)),
+        "numeric_columns": NUMERIC_COLUMNS,
+        "string_columns": STRING_COLUMNS,
+        "model_kind": model_kind,
+        "payloads": payload_entries,
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(out_dir):
+        old = out_dir.rstrip("/\\") + ".old"
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(out_dir, old)
+        os.replace(tmp, out_dir)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        os.replace(tmp, out_dir)
+    return manifest
+
+
+class FighterSnapshot:
+    """A worker's read-only view of a snapshot directory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode="r")
+        self.numeric = load("numeric.npy")
+        self.is_champion = load("is_champion.npy")
+        self._strings = load("strings.npy")
+        self._string_offsets = load("string_offsets.npy")
+        self._history = load("history.npy")
+        self._history_offsets = load("history_offsets.npy")
+        self._string_cols = {c: i for i, c in enumerate(self.manifest["string_columns"])}
+
+    @property
+    def version(self):
+        return self.manifest.get("version")
+
+    @property
+    def model_version(self):
+        return self.manifest.get("model_version")
+
+    def __len__(self):
+        return self.manifest["n_fighters"]
+
+    def string(self, column: str, i: int) -> str:
+        off = self._string_offsets[self._string_cols[column]]
+        return self._strings[off[i]:off[i + 1]].tobytes().decode("utf-8")
+
+    def strings(self, column: str) -> list:
+        off = self._string_offsets[self._string_cols[column]]
+        raw = self._strings[off[0]:off[-1]].tobytes()
+        base = off[0]
+        return [raw[a - base:b - base].decode("utf-8") for a, b in zip(off[:-1], off[1:])]
+
+    def fight_history(self, i: int) -> list:
+        """Decode one fighter's history on demand; nothing is cached per worker."""
+        a, b = self._history_offsets[i], self._history_offsets[i + 1]
+        return json.loads(self._history[a:b].tobytes().decode("utf-8"))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Lightweight fighters_df for a worker. The numeric columns are one
+        block viewing the mapped numeric.npy (no copy, read-only). Of the
+        string columns only `name`, which every lookup filters on, is decoded;
+        the rest stay as offsets into strings.npy and are read per row with
+        string(). `snap_idx` points back into the snapshot for both.
+        """
+        df = pd.DataFrame(self.numeric, columns=self.manifest["numeric_columns"], copy=False)
+        df["name"] = self.strings("name")
+        df["is_champion"] = np.asarray(self.is_champion)
+        df["snap_idx"] = np.arange(len(df))
+        return df
+
+    def load_model(self):
+        """Return (model, scaler, feature_names) backed by the snapshot files."""
+        if self.manifest.get("model_kind") == "flat_gbm":
+            model = FlatGradientBoosting(os.path.join(self.path, "trees"))
+        else:
+            model = joblib.load(os.path.join(self.path, "mlp_model.joblib"), mmap_mode="r")
+        scaler = joblib.load(os.path.join(self.path, "scaler.joblib"), mmap_mode="r")
+        feature_names = pd.read_csv(os.path.join(self.path, "feature_list.csv"))["feature"].tolist()
+        return model, scaler, feature_names
+
+    def load_payload(self, name: str):
+        """MappedPayload over a stored document, or None if this snapshot has none by that name."""
+        entry = self.manifest.get("payloads", {}).get(name)
+        if entry is None:
+            return None
+        from app.payloads import MappedPayload
+        return MappedPayload(os.path.join(self.path, "payloads"), name, entry)
+
+    def load_shap_weights(self):
+        path = os.path.join(self.path, "shap_feature_weights.npy")
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Build from the regular JSON/joblib sources: python -m app.snapshot <out_dir>
+    out = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "..", "snapshot")
+    from app import utils
+    from app.routes import full_fighters_payload, ufc_only_payload
+
+    manifest = build_snapshot(
+        utils.fighters_df, utils.fighters_df["fight_history"].tolist(),
+        utils.model, utils.scaler, utils.feature_names, out,
+        version=snapshot_version(utils.FIGHTERS_JSON, utils.model_path),
+        shap_weights=utils.shap_weights, model_version=utils.MODEL_VERSION,
+        payloads={"full_fighters": full_fighters_payload.get(), "ufc_only_fighters": ufc_only_payload.get()},
+    )
+    print(f"📦 Snapshot {manifest['version']} with {manifest['n_fighters']} fighters written to {out}")
@@ -0,0 +1,85 @@
+# app/test_feature_store.py
+
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.feature_store import COLUMNS, FeatureStore
+
+
+def _fights(n_fighters=6, n_days=40, seed=0) -> list:
+    """Random fights in date order, at most one per fighter per day."""
+    rng = np.random.default_rng(seed)
+    fights = []
+    start = date(2015, 1, 1)
+    for d in range(n_days):
+        for f in rng.choice(n_fighters, size=rng.integers(1, 4), replace=False):
+            fights.append({
+                "fighter": f"Fighter {f}",
+                "date": (start + timedelta(days=30 * d)).isoformat(),
+                "result": str(rng.choice(["win", "loss", "draw", "nc"], p=[0.5, 0.4, 0.05, 0.05])),
+                "strikes": int(rng.integers(0, 120)),
+                "takedowns": int(rng.integers(0, 6)),
+                "minutes": float(rng.uniform(0.5, 25)),
+                "absorbed": None if rng.random() < 0.2 else int(rng.integers(0, 120)),
+            })
+    return fights
+
+
+def test_same_day_fights_are_not_visible():
+    store = FeatureStore()
+    store.append([{"fighter": "A", "date": "2020-01-01", "result": "win", "strikes": 50, "minutes": 15.0}])
+
+    ids = store.ids(["A", "A", "A"])
+    values, found = store.as_of(ids, store.days(["2019-12-31", "2020-01-01", "2020-01-02"]), ["fights", "wins"])
+    assert found.tolist() == [False, False, True]
+    assert values[1].tolist() == [0.0, 0.0]
+    assert values[2].tolist() == [1.0, 1.0]
+
+
+def test_incremental_appends_match_a_single_pass():
+    fights = _fights()
+    cutoff = fights[len(fights) // 2]["date"]
+
+    single = FeatureStore()
+    single.append(fights)
+    split = FeatureStore()
+    split.append([f for f in fights if f["date"] <= cutoff])
+    split.as_of(split.ids(["Fighter 0"]), split.days([cutoff]))  # merge in between
+    split.append([f for f in fights if f["date"] > cutoff])
+
+    assert len(single) == len(split)
+    names = [f"Fighter {i}" for i in range(6)]
+    days = np.arange(single.days(["2014-12-01"])[0], single.days(["2018-06-01"])[0], 7)
+    grid_names = [n for n in names for _ in days]
+    grid_days = np.tile(days, len(names))
+    a_values, a_found = single.as_of(single.ids(grid_names), grid_days)
+    b_values, b_found = split.as_of(split.ids(grid_names), grid_days)
+    np.testing.assert_array_equal(a_found, b_found)
+    np.testing.assert_array_equal(a_values, b_values)
+    assert a_values.shape[1] == len(COLUMNS)
+
+
+def test_append_rejects_fights_before_the_latest_row():
+    store = FeatureStore()
+    store.append([{"fighter": "A", "date": "2020-05-01", "result": "win"}])
+    with pytest.raises(ValueError):
+        store.append([{"fighter": "A", "date": "2020-03-01", "result": "loss"}])
+    with pytest.raises(ValueError):
+        store.append([{"fighter": "A", "date": "2020-05-01", "result": "loss"}])
+
+
+def test_unknown_fighters_are_not_found():
+    store = FeatureStore()
+    store.append([{"fighter": "A", "date": "2020-01-01", "result": "win"}])
+
+    ids = store.ids(["Nobody", "a "])
+    assert ids.tolist() == [-1, 0]
+    values, found = store.as_of(ids, store.days(["2021-01-01", "2021-01-01"]), ["wins"])
+    assert found.tolist() == [False, True]
+    assert values[0].tolist() == [0.0]
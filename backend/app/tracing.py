@@ -0,0 +1,125 @@
+# app/tracing.py
+"""
+Per-request prediction traces kept in a bounded in-memory ring buffer.
+
+A trace is only created for sampled requests (TRACE_SAMPLE_RATE, or an
+`X-Trace: 1` request header). Hot-path code fetches the active trace once
+with current_trace() and guards every event with `if tr:`, so unsampled
+requests pay one ContextVar lookup and nothing else. With DEBUG_LOGGING on,
+every request is traced and each event is also echoed to stdout.
+"""
+
+import contextvars
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app import config
+
+_current_trace = contextvars.ContextVar("prediction_trace", default=None)
+_current_request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class Trace:
+    __slots__ = ("request_id", "route", "started_at", "_t0", "events", "duration_ms", "status")
+
+    def __init__(self, request_id: str, route: str):
+        self.request_id = request_id
+        self.route = route
+        self.started_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._t0 = time.perf_counter()
+        self.events = []
+        self.duration_ms = None
+        self.status = None
+
+    def event(self, name: str, **fields):
+        self.events.append({
+            "t_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+            "event": name,
+            **fields,
+        })
+        if config.DEBUG_LOGGING:
+            print(f"[trace {self.request_id}] {name}: {fields}")
+
+    def finish(self, status=None):
+        self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+        self.status = status
+
+    def to_dict(self) -> dict:
+        return {
+            "request_id": self.request_id,
+            "route": self.route,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "events": self.events,
+        }
+
+
+class TraceBuffer:
+    """Fixed-size ring of finished traces, indexed by request id."""
+
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces[trace.request_id] = trace
+            self._traces.move_to_end(trace.request_id)
+            while len(self._traces) > self.maxlen:
+                self._traces.popitem(last=False)
+
+    def get(self, request_id: str):
+        with self._lock:
+            return self._traces.get(request_id)
+
+    def recent(self, limit: int = 50) -> list:
+        with self._lock:
+            traces = list(self._traces.values())[-limit:]
+        return traces[::-1]
+
+    def __len__(self):
+        return len(self._traces)
+
+
+trace_buffer = TraceBuffer(config.TRACE_BUFFER_SIZE)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_request_id():
+    return _current_request_id.get()
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def should_sample(force: bool = False) -> bool:
+    if force or config.DEBUG_LOGGING:
+        return True
+    rate = config.TRACE_SAMPLE_RATE
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+def begin_request(request_id: str, route: str, force: bool = False):
+    """Bind the request id (and a trace, if sampled) to the current context."""
+    _current_request_id.set(request_id)
+    if not should_sample(force):
+        return None
+    trace = Trace(request_id, route)
+    _current_trace.set(trace)
+    return trace
+
+
+def end_request(trace, status=None):
+    if trace is None:
+        return
+    trace.finish(status)
+    trace_buffer.add(trace)
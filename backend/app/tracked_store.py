@@ -0,0 +1,365 @@
+# app/tracked_store.py
+"""
+SQLite store for tracked predictions (data/tracked_predictions.db, WAL mode).
+
+One row per fight, keyed by event + both fighter names, with indexes on
+event, date and each fighter. The original record is kept verbatim as JSON
+next to the indexed columns, so /tracked can still return exactly what
+generate_pred.py produced.
+
+Accuracy aggregates live in their own table and are maintained on every
+write: an upsert or a resolved result removes the row's old contribution and
+adds its new one in the same transaction, so reads never rescan the
+predictions. Toss-ups have no pick and are left out of every aggregate.
+
+On first use, an empty store imports data/tracked_predictions.json.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from app.odds import american_to_decimal
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DB_PATH = DATA_DIR / "tracked_predictions.db"
+LEGACY_JSON = DATA_DIR / "tracked_predictions.json"
+
+CONFIDENCE_BUCKETS = [(50, 55), (55, 60), (60, 65), (65, 70), (70, 75), (75, 80), (80, 85), (85, 90), (90, 101)]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fight_key TEXT NOT NULL UNIQUE,
+    event TEXT,
+    event_date TEXT,
+    fighter1 TEXT,
+    fighter2 TEXT,
+    fighter1_lc TEXT,
+    fighter2_lc TEXT,
+    winner TEXT,
+    confidence REAL,
+    is_tossup INTEGER,
+    pick_decimal_odds REAL,
+    pick_is_favorite INTEGER,
+    actual_result TEXT,
+    correct INTEGER,
+    timestamp TEXT,
+    updated_at TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_event ON predictions(event);
+CREATE INDEX IF NOT EXISTS idx_predictions_date ON predictions(event_date);
+CREATE INDEX IF NOT EXISTS idx_predictions_f1 ON predictions(fighter1_lc);
+CREATE INDEX IF NOT EXISTS idx_predictions_f2 ON predictions(fighter2_lc);
+CREATE INDEX IF NOT EXISTS idx_predictions_pending ON predictions(correct);
+CREATE INDEX IF NOT EXISTS idx_predictions_unresolved ON predictions(actual_result);
+
+CREATE TABLE IF NOT EXISTS aggregates (
+    kind TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    staked REAL NOT NULL DEFAULT 0,
+    returned REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, bucket)
+);
+"""
+
+
+def _norm(name) -> str:
+    return (name or "").lower().strip()
+
+
+def fight_key(event, fighter1, fighter2) -> str:
+    return "|".join([_norm(event)] + sorted([_norm(fighter1), _norm(fighter2)]))
+
+
+def parse_card_date(value):
+    """'August 09, 2025' -> '2025-08-09' (None if unparseable)."""
+    for fmt in ("%B %d, %Y", "%b %d, %Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime((value or "").strip(), fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def confidence_bucket(confidence: float) -> str:
+    for lo, hi in CONFIDENCE_BUCKETS:
+        if lo <= confidence < hi:
+            return f"{lo}-{hi}" if hi <= 100 else f"{lo}+"
+    return "<50"
+
+
+def _columns(record: dict) -> dict:
+    winner = record.get("winner")
+    tossup = bool(record.get("is_tossup")) or winner == "Toss Up"
+    pick_odds = opp_odds = None
+    if not tossup:
+        if _norm(winner) == _norm(record.get("fighter1")):
+            pick_odds, opp_odds = record.get("odds1"), record.get("odds2")
+        elif _norm(winner) == _norm(record.get("fighter2")):
+            pick_odds, opp_odds = record.get("odds2"), record.get("odds1")
+    dec_pick, dec_opp = american_to_decimal(pick_odds), american_to_decimal(opp_odds)
+    correct = record.get("correct")
+    return {
+        "fight_key": fight_key(record.get("event"), record.get("fighter1"), record.get("fighter2")),
+        "event": record.get("event"),
+        "event_date": parse_card_date(record.get("date")),
+        "fighter1": record.get("fighter1"),
+        "fighter2": record.get("fighter2"),
+        "fighter1_lc": _norm(record.get("fighter1")),
+        "fighter2_lc": _norm(record.get("fighter2")),
+        "winner": winner,
+        "confidence": float(record.get("confidence") or 0.0),
+        "is_tossup": int(tossup),
+        "pick_decimal_odds": dec_pick,
+        "pick_is_favorite": None if not (dec_pick and dec_opp) else int(dec_pick <= dec_opp),
+        "actual_result": record.get("actual_result"),
+        "correct": None if correct is None else int(bool(correct)),
+        "timestamp": record.get("timestamp"),
+        "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "record": json.dumps(record, ensure_ascii=False, default=str),
+    }
+
+
+def _contributions(row) -> list:
+    """(kind, bucket, n, hits, staked, returned) rows this prediction adds to the aggregates."""
+    if row is None or row["is_tossup"] or row["correct"] is None:
+        return []
+    hit = int(row["correct"])
+    staked = 1.0 if row["pick_decimal_odds"] else 0.0
+    returned = row["pick_decimal_odds"] if (staked and hit) else 0.0
+    side = "no_odds" if row["pick_is_favorite"] is None else ("favorite" if row["pick_is_favorite"] else "underdog")
+    return [
+        (kind, bucket, 1, hit, staked, returned)
+        for kind, bucket in (
+            ("overall", "all"),
+            ("confidence", confidence_bucket(row["confidence"])),
+            ("event", row["event"] or "Unknown Event"),
+            ("side", side),
+        )
+    ]
+
+
+class TrackedStore:
+    def __init__(self, path=DB_PATH, legacy_json=LEGACY_JSON):
+        self.path = str(path)
+        self.legacy_json = legacy_json
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._initialized:
+            self._initialize(conn)
+        return conn
+
+    def _initialize(self, conn):
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn.executescript(SCHEMA)
+            empty = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0] == 0
+            self._initialized = True
+            if empty and self.legacy_json and Path(self.legacy_json).exists():
+                with open(self.legacy_json, "r", encoding="utf-8") as f:
+                    records = json.load(f)
+                self.upsert_many(records, keep_results=False)
+                print(f"📥 Imported {len(records)} tracked predictions from {self.legacy_json}")
+
+    # --- writes ---
+
+    def _apply(self, conn, row, sign: int):
+        for kind, bucket, n, hits, staked, returned in _contributions(row):
+            conn.execute(
+                "INSERT INTO aggregates (kind, bucket, n, hits, staked, returned) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(kind, bucket) DO UPDATE SET n = n + excluded.n, hits = hits + excluded.hits, "
+                "staked = staked + excluded.staked, returned = returned + excluded.returned",
+                (kind, bucket, sign * n, sign * hits, sign * staked, sign * returned),
+            )
+
+    def upsert_many(self, records: list, keep_results: bool = True) -> dict:
+        """
+        Insert or update predictions by (event, fighters). With keep_results, an
+        already resolved fight keeps its actual_result/correct when the incoming
+        record has none (re-running the generator doesn't un-resolve fights).
+        """
+        conn = self._conn()
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for record in records:
+                key = fight_key(record.get("event"), record.get("fighter1"), record.get("fighter2"))
+                old = conn.execute("SELECT * FROM predictions WHERE fight_key = ?", (key,)).fetchone()
+                if old is not None and keep_results and record.get("actual_result") is None:
+                    previous = json.loads(old["record"])
+                    if previous.get("actual_result") is not None:
+                        record = {**record, "actual_result": previous["actual_result"],
+                                  "correct": previous.get("correct")}
+                cols = _columns(record)
+                if old is not None and old["record"] == cols["record"]:
+                    counts["unchanged"] += 1
+                    continue
+
+                self._apply(conn, old, -1)
+                if old is None:
+                    conn.execute(
+                        f"INSERT INTO predictions ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                        tuple(cols.values()),
+                    )
+                    counts["inserted"] += 1
+                else:
+                    conn.execute(
+                        f"UPDATE predictions SET {', '.join(f'{c} = ?' for c in cols)} WHERE fight_key = ?",
+                        (*cols.values(), key),
+                    )
+                    counts["updated"] += 1
+                self._apply(conn, conn.execute("SELECT * FROM predictions WHERE fight_key = ?", (key,)).fetchone(), +1)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return counts
+
+    def resolve(self, event, fighter1, fighter2, actual_result) -> bool:
+        """Record a fight's result; False if the fight isn't tracked."""
+        return self.resolve_many([(event, fighter1, fighter2, actual_result)]) == 1
+
+    def resolve_many(self, results) -> int:
+        """
+        Record many (event, fighter1, fighter2, actual_result) results in one
+        transaction; returns how many were tracked fights.
+        """
+        keys = {fight_key(e, f1, f2): actual for e, f1, f2, actual in results}
+        records = []
+        for key, record in self.records(keys).items():
+            actual_result = keys[key]
+            record["actual_result"] = actual_result
+            record["correct"] = None if record.get("winner") == "Toss Up" else _norm(actual_result) == _norm(record.get("winner"))
+            records.append(record)
+        if records:
+            self.upsert_many(records, keep_results=False)
+        return len(records)
+
+    def rebuild_aggregates(self):
+        """Recompute the aggregates table from scratch (consistency repair)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM aggregates")
+            for row in conn.execute("SELECT * FROM predictions WHERE correct IS NOT NULL").fetchall():
+                self._apply(conn, row, +1)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- reads ---
+
+    def all_records_json(self) -> bytes:
+        """Every record, in insertion order, as one JSON array (no decode/encode round trip)."""
+        rows = self._conn().execute("SELECT record FROM predictions ORDER BY id").fetchall()
+        return ("[" + ",".join(r[0] for r in rows) + "]").encode("utf-8")
+
+    def query(self, event=None, fighter=None, date_from=None, date_to=None, status=None,
+              limit=100, offset=0) -> dict:
+        where, params = [], []
+        if event:
+            where.append("event = ?")
+            params.append(event)
+        if fighter:
+            where.append("(fighter1_lc = ? OR fighter2_lc = ?)")
+            params += [_norm(fighter)] * 2
+        if date_from:
+            where.append("event_date >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            where.append("event_date <= ?")
+            params.append(date_to.isoformat())
+        if status == "pending":
+            where.append("correct IS NULL")
+        elif status == "resolved":
+            where.append("correct IS NOT NULL")
+        elif status == "correct":
+            where.append("correct = 1")
+        elif status == "wrong":
+            where.append("correct = 0")
+        elif status is not None:
+            raise ValueError("status must be one of pending, resolved, correct, wrong")
+
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        conn = self._conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM predictions {clause}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT record FROM predictions {clause} ORDER BY event_date DESC, id LIMIT ? OFFSET ?",
+            (*params, int(limit), int(offset)),
+        ).fetchall()
+        return {"total": total, "items": [json.loads(r[0]) for r in rows]}
+
+    def records(self, keys) -> dict:
+        """Stored records for the given fight keys, as {fight_key: record}; unknown keys are left out."""
+        keys = list(keys)
+        out, conn = {}, self._conn()
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = conn.execute(
+                f"SELECT fight_key, record FROM predictions WHERE fight_key IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            out.update((r["fight_key"], json.loads(r["record"])) for r in rows)
+        return out
+
+    def pending(self) -> list:
+        """Records without an actual_result yet, toss-ups included (their correct stays NULL once resolved)."""
+        rows = self._conn().execute("SELECT record FROM predictions WHERE actual_result IS NULL").fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def resolved_since(self, day=None) -> list:
+        """Records with a result (toss-ups included) whose event_date is after day, oldest first."""
+        sql, params = "SELECT record FROM predictions WHERE actual_result IS NOT NULL", []
+        if day:
+            sql += " AND event_date > ?"
+            params.append(day)
+        rows = self._conn().execute(sql + " ORDER BY event_date, id", params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def aggregates(self) -> dict:
+        rows = self._conn().execute("SELECT * FROM aggregates WHERE n > 0").fetchall()
+
+        def summary(r):
+            return {
+                "n": r["n"],
+                "hits": r["hits"],
+                "hit_rate": round(r["hits"] / r["n"], 4) if r["n"] else None,
+                "staked": round(r["staked"], 2),
+                "profit": round(r["returned"] - r["staked"], 4),
+                "roi": round((r["returned"] - r["staked"]) / r["staked"], 4) if r["staked"] else None,
+            }
+
+        out = {"overall": None, "by_confidence": {}, "by_event": {}, "favorite_vs_underdog": {}}
+        for r in rows:
+            if r["kind"] == "overall":
+                out["overall"] = summary(r)
+            elif r["kind"] == "confidence":
+                out["by_confidence"][r["bucket"]] = summary(r)
+            elif r["kind"] == "event":
+                out["by_event"][r["bucket"]] = summary(r)
+            elif r["kind"] == "side":
+                out["favorite_vs_underdog"][r["bucket"]] = summary(r)
+        out["by_confidence"] = dict(sorted(out["by_confidence"].items(), key=lambda kv: kv[0]))
+        return out
+
+
+tracked_store = TrackedStore()
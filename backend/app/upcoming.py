@@ -0,0 +1,51 @@
+# app/upcoming.py
+"""
+Upcoming cards joined with the scraped odds, exactly as /upcoming serves
+them. The API wraps join_upcoming_odds in a FileBackedPayload;
+generate_pred.py calls load_upcoming_events() without starting the app.
+Only the standard library, so importing this never loads the router, the
+model or the fighter DB.
+"""
+
+import json
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+UPCOMING_PATH = BACKEND_DIR / "data" / "upcoming_cards.json"
+ODDS_PATH = BACKEND_DIR / "data" / "ufc_odds.json"
+
+
+def join_upcoming_odds(raw: dict):
+    """Cards with odds1 / odds2 filled in, from {str(path): file bytes or None}."""
+    upcoming = raw[str(UPCOMING_PATH)]
+    if upcoming is None:
+        raise FileNotFoundError(UPCOMING_PATH)
+    cards = json.loads(upcoming)
+
+    odds_data = json.loads(raw[str(ODDS_PATH)]) if raw[str(ODDS_PATH)] is not None else []
+    if not isinstance(odds_data, dict):
+        print("⚠️ odds_data is not a dict — check the JSON format.")
+        return cards
+
+    def normalize(name: str) -> str:
+        return name.lower().strip()
+
+    # One dict lookup per fight
+    for event in cards:
+        for fight in event.get("fights", []):
+            red = normalize(fight.get("fighter_red", ""))
+            blue = normalize(fight.get("fighter_blue", ""))
+            odds = odds_data.get("|".join(sorted([red, blue])))
+            if odds:
+                fight["odds1"] = odds.get(red, "N/A")
+                fight["odds2"] = odds.get(blue, "N/A")
+    return cards
+
+
+def read_raw() -> dict:
+    """The cards and odds files as bytes (None when missing), keyed like FileBackedPayload."""
+    return {str(path): path.read_bytes() if path.exists() else None for path in (UPCOMING_PATH, ODDS_PATH)}
+
+
+def load_upcoming_events() -> list:
+    return join_upcoming_odds(read_raw())
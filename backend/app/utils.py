@@ -4,23 +4,57 @@ import numpy as np
 import pandas as pd
 import os
 import re
+import time
 from datetime import datetime
+from app.tracing import current_trace
+from app.metrics import PREDICT_STAGE, SHORT_CIRCUITS, MODEL_INFERENCE, batch_size_label
 from app.config import (
     APPLY_FORM_BOOST,
     APPLY_STREAK_BOOST,
     APPLY_STAT_DOMINANCE_BONUS,
-    DEBUG_LOGGING,
+    APPLY_OPP_STRENGTH_BOOST,
     MAX_BOOST,
+    REMATCH_OVERRIDE_PROBA,
+    MODEL_REGISTRY_VERIFY,
 )
 
 # === Load Model & Scaler ===
 model_path = os.path.join(os.path.dirname(__file__), "..", "ml", "model")
-model = joblib.load(os.path.join(model_path, "mlp_model.joblib"))
-scaler = joblib.load(os.path.join(model_path, "scaler.joblib"))
-feature_names = pd.read_csv(os.path.join(model_path, "feature_list.csv"))['feature'].tolist()
-
-# === Load Fighter Data ===
-fighter_data = json.load(open(os.path.join(os.path.dirname(__file__), "..", "data", "ufc_fighters.json"), encoding="utf-8"))
+FIGHTERS_JSON = os.path.join(os.path.dirname(__file__), "..", "data", "ufc_fighters.json")
+
+# Workers started by serve.py attach to a shared, memory-mapped snapshot
+SNAPSHOT_DIR = os.environ.get("UFC_SNAPSHOT_DIR")
+snapshot = None
+
+if SNAPSHOT_DIR:
+    from app.snapshot import FighterSnapshot
+    snapshot = FighterSnapshot(SNAPSHOT_DIR)
+    model, scaler, feature_names = snapshot.load_model()
+    shap_weights = snapshot.load_shap_weights()
+    MODEL_VERSION = snapshot.model_version
+else:
+    # The promoted registry version (app/model_registry.py); loose ml/model files until one exists
+    from app import model_registry
+    registered = model_registry.load_current(verify=MODEL_REGISTRY_VERIFY)
+    if registered is not None:
+        model_path = registered.path
+        model, scaler = registered.model, registered.scaler
+        feature_names, shap_weights = registered.feature_names, registered.shap_weights
+        MODEL_VERSION = registered.version
+    else:
+        from app.snapshot import snapshot_version
+        model = joblib.load(os.path.join(model_path, "mlp_model.joblib"))
+        scaler = joblib.load(os.path.join(model_path, "scaler.joblib"))
+        feature_names = pd.read_csv(os.path.join(model_path, "feature_list.csv"))['feature'].tolist()
+        shap_weights = np.load(os.path.join(model_path, "shap_feature_weights.npy"))
+        MODEL_VERSION = "unregistered-" + snapshot_version("", model_path)[:8]
+
+# Content hash of fighter data + model files; keys every derived cache
+if snapshot is not None:
+    DATA_VERSION = snapshot.version
+else:
+    from app.snapshot import snapshot_version
+    DATA_VERSION = snapshot_version(FIGHTERS_JSON, model_path)
 
 def parse_height(height_str):
     match = re.match(r"(\d+)'[ ]?(\d+)?", height_str)
@@ -36,30 +70,46 @@ def parse_reach(reach_str):
     except:
         return None
 
-fighters_df = pd.DataFrame([
-    {
-        "name": f["name"],
-        "nickname": f.get("nickname", ""),
-        "dob": f.get("dob", None),    
-        "weight": float(f["weight"].replace(" lbs.", "")) if "lbs" in f["weight"] else None,
-        "height": parse_height(f["height"]),
-        "reach": parse_reach(f["reach"]),
-        "SLpM": float(f["stats"].get("SLpM", "0")),
-        "SApM": float(f["stats"].get("SApM", "0")),
-        "TD Avg.": float(f["stats"].get("TD Avg.", "0")),
-        "TD Def.": float(f["stats"].get("TD Def.", "0%").replace("%", "")),
-        "Str. Acc.": float(f["stats"].get("Str. Acc.", "0%").replace("%", "")),
-        "Str. Def": float(f["stats"].get("Str. Def", "0%").replace("%", "")),
-        "fight_history": f.get("fight_history", []),
-        "is_champion": f.get("is_champion", False),
-        "record": f.get("record", "0-0-0")
-    }
-    for f in fighter_data
-])
+def _load_fighters_df():
+    with open(FIGHTERS_JSON, encoding="utf-8") as f:
+        fighter_data = json.load(f)
+    return pd.DataFrame([
+        {
+            "name": f["name"],
+            "nickname": f.get("nickname", ""),
+            "dob": f.get("dob", None),    
+            "weight": float(f["weight"].replace(" lbs.", "")) if "lbs" in f["weight"] else None,
+            "height": parse_height(f["height"]),
+            "reach": parse_reach(f["reach"]),
+            "SLpM": float(f["stats"].get("SLpM", "0")),
+            "SApM": float(f["stats"].get("SApM", "0")),
+            "TD Avg.": float(f["stats"].get("TD Avg.", "0")),
+            "TD Def.": float(f["stats"].get("TD Def.", "0%").replace("%", "")),
+            "Str. Acc.": float(f["stats"].get("Str. Acc.", "0%").replace("%", "")),
+            "Str. Def": float(f["stats"].get("Str. Def", "0%").replace("%", "")),
+            "fight_history": f.get("fight_history", []),
+            "is_champion": f.get("is_champion", False),
+            "record": f.get("record", "0-0-0")
+        }
+        for f in fighter_data
+    ])
 
+fighters_df = snapshot.to_frame() if snapshot is not None else _load_fighters_df()
 fighters_df["name_clean"] = fighters_df["name"].str.lower().str.replace(r"\s+", " ", regex=True).str.strip()
 
 # === Feature Helpers ===
+def fighter_history(row):
+    """A fighters_df row's fight_history, decoded from the snapshot when attached."""
+    if snapshot is not None:
+        return snapshot.fight_history(int(row["snap_idx"]))
+    return row["fight_history"]
+
+def fighter_string(row, column, default=None):
+    """A fighters_df row's nickname / dob / record, read from the snapshot when attached."""
+    if snapshot is not None:
+        return snapshot.string(column, int(row["snap_idx"]))
+    return row.get(column, default)
+
 def get_all_fighters():
     return sorted(fighters_df["name"].tolist())
 
@@ -92,6 +142,18 @@ def fight_recency_weight(fight):
     months_ago = (datetime.now() - fight_date).days / 30.0
     return max(0.0, 1 - months_ago / 24.0)
 
+_EVENT_DATE = re.compile(r"([A-Za-z]{3})[a-z]*\.? (\d{1,2}), (\d{4})\s*$")
+
+def parse_event_date(event: str):
+    """Date at the end of a fight_history event string ("UFC 26: ... Jun. 09, 2000"), or None."""
+    m = _EVENT_DATE.search(event or "")
+    if not m:
+        return None
+    try:
+        return datetime.strptime(f"{m.group(1).title()} {m.group(2)} {m.group(3)}", "%b %d %Y").date()
+    except ValueError:
+        return None
+
 def is_debut(fighter: dict) -> bool:
     return (
         len(fighter.get("fight_history", [])) == 0 or
@@ -278,7 +340,7 @@ def get_fighter_stats(name):
     if row.empty:
         return None
     row = row.iloc[0]
-    all_fights = row["fight_history"] or []
+    all_fights = fighter_history(row) or []
     ufc_fights = [f for f in all_fights if "UFC" in f.get("event", "")]
 
     # UFC-only record
@@ -290,7 +352,7 @@ def get_fighter_stats(name):
 
     return {
         "name": row["name"],
-        "nickname": row.get("nickname", ""),  # ← adds nickname
+        "nickname": fighter_string(row, "nickname", ""),  # ← adds nickname
         "weight": row["weight"],
         "height": row["height"],
         "reach": row["reach"],
@@ -306,42 +368,57 @@ def get_fighter_stats(name):
         "avg_opp_strength": avg_opponent_strength(ufc_fights),
         "last_results": get_last_results(ufc_fights),
         "is_champion": row.get("is_champion", False),
-        "record": row.get("record", "0-0-0"), 
+        "record": fighter_string(row, "record", "0-0-0"), 
         "ufc_wins": ufc_wins,
         "ufc_losses": ufc_losses,
         "ufc_draws": ufc_draws,
         "ko_pct": finish_pcts["ko_pct"],
         "sub_pct": finish_pcts["sub_pct"],
         "dec_pct": finish_pcts["dec_pct"],
-         "age": calculate_age(row.get("dob"))               # ← adds age
+         "age": calculate_age(fighter_string(row, "dob"))               # ← adds age
     }
 
 
 def safe_log(x, base=10):
     return np.log1p(x) / np.log(base)
 
-def build_feature_vector(f1, f2):
+def build_feature_vector(f1, f2, names=None):
+    # names: columns to return (the served model's feature_names by default)
+    return build_feature_matrix([(f1, f2)], names)
+
+
+def build_feature_matrix(pairs, names=None):
+    """Model rows for many (f1, f2) pairs at once: each feature is one array expression over the pairs."""
+    names = feature_names if names is None else names
+    pairs = list(pairs)
+
+    def stat(side, key):
+        return np.array([pair[side][key] for pair in pairs], dtype=np.float64)
+
     # Use safe TD_Def if fighter has < 4 UFC fights
-    td_def_1 = f1["TD Def."] if len(f1["fight_history"]) >= 4 else 50.0
-    td_def_2 = f2["TD Def."] if len(f2["fight_history"]) >= 4 else 50.0
+    seasoned_1 = np.array([len(f1["fight_history"]) >= 4 for f1, _ in pairs], dtype=bool)
+    seasoned_2 = np.array([len(f2["fight_history"]) >= 4 for _, f2 in pairs], dtype=bool)
+    td_def_1, td_def_2 = stat(0, "TD Def."), stat(1, "TD Def.")
+    sapm_1, sapm_2 = stat(0, "SApM"), stat(1, "SApM")
 
     # Compute TD_SApM_combo safely
-    td_sapm_combo = (f2["SApM"] - f1["SApM"]) * (td_def_1 - td_def_2) / 100
-
-    return pd.DataFrame([{k: v for k, v in {
-        "SLpM_diff": 0.5 * (f1["SLpM"] - f2["SLpM"]),
-        "SApM_diff": f1["SApM"] - f2["SApM"],
-        "TD_Avg_diff": f1["TD Avg."] - f2["TD Avg."],
-        "TD_Def_diff": 0.3 * (f1["TD Def."] - f2["TD Def."]),
-        "Str_Acc_diff": f1["Str. Acc."] - f2["Str. Acc."],
-        "Str_Def_diff": 0.5 * (f1["Str. Def"] - f2["Str. Def"]),
-        "Height_diff": 0.25 * (f1["height"] - f2["height"]),
-        "Reach_diff": 0.25 * (f1["reach"] - f2["reach"]),
-        "Recent_form_score_diff": f1["recent_form_score"] - f2["recent_form_score"],
-        "Win_streak_score_diff": 0.4 * (f1["win_streak_score"] - f2["win_streak_score"]),
-        "Avg_opp_strength_diff": f1["avg_opp_strength"] - f2["avg_opp_strength"],
-        "TD_SApM_combo": td_sapm_combo,
-    }.items() if k in feature_names}])[feature_names]
+    td_sapm_combo = (sapm_2 - sapm_1) * (np.where(seasoned_1, td_def_1, 50.0) - np.where(seasoned_2, td_def_2, 50.0)) / 100
+
+    formulas = {
+        "SLpM_diff": lambda: 0.5 * (stat(0, "SLpM") - stat(1, "SLpM")),
+        "SApM_diff": lambda: sapm_1 - sapm_2,
+        "TD_Avg_diff": lambda: stat(0, "TD Avg.") - stat(1, "TD Avg."),
+        "TD_Def_diff": lambda: 0.3 * (td_def_1 - td_def_2),
+        "Str_Acc_diff": lambda: stat(0, "Str. Acc.") - stat(1, "Str. Acc."),
+        "Str_Def_diff": lambda: 0.5 * (stat(0, "Str. Def") - stat(1, "Str. Def")),
+        "Height_diff": lambda: 0.25 * (stat(0, "height") - stat(1, "height")),
+        "Reach_diff": lambda: 0.25 * (stat(0, "reach") - stat(1, "reach")),
+        "Recent_form_score_diff": lambda: stat(0, "recent_form_score") - stat(1, "recent_form_score"),
+        "Win_streak_score_diff": lambda: 0.4 * (stat(0, "win_streak_score") - stat(1, "win_streak_score")),
+        "Avg_opp_strength_diff": lambda: stat(0, "avg_opp_strength") - stat(1, "avg_opp_strength"),
+        "TD_SApM_combo": lambda: td_sapm_combo,
+    }
+    return pd.DataFrame({k: formulas[k]() for k in names}, columns=names)
 
 def get_opponent_ufc_record(opp_name):
     """Return opponent's UFC record as (wins, losses, draws)."""
@@ -362,7 +439,7 @@ def get_opponent_ufc_record(opp_name):
             return (wins, losses, draws)
 
         # Otherwise, reconstruct from fight history
-        fights = row.get("fight_history", [])
+        fights = fighter_history(row) or []
         ufc_fights = [f for f in fights if "UFC" in f.get("event", "")]
         wins = sum(1 for f in ufc_fights if f.get("result", "").lower() == "win")
         losses = sum(1 for f in ufc_fights if f.get("result", "").lower() == "loss")
@@ -466,15 +543,14 @@ def build_placeholder_fighter(name: str) -> dict:
 
 def compute_shap_for_pair(f1: dict, f2: dict, top_k: int = 5) -> dict:
     """
-    Cheap, dependency-free 'explainability':
-    - Build your canonical (f1 - f2) feature vector
-    - Optionally weight features (if a weight file exists)
-    - Return top contributors by absolute weighted magnitude
+    Exact TreeSHAP attributions (log-odds) for a matchup, via the cached
+    attribution engine. Positive values favour f1.
 
     If either fighter is a debut / has no stats, mark as not explainable.
     """
+    from app.attribution import attribution_engine, orient
+
     try:
-        # If either fighter is a debut / no usable UFC stats → skip
         if is_debut(f1) or is_debut(f2):
             return {
                 "explainable": False,
@@ -482,34 +558,9 @@ def compute_shap_for_pair(f1: dict, f2: dict, top_k: int = 5) -> dict:
                 "top_contributors": []
             }
 
-        # Build canonical features (this uses the same canonicalization as predict_match)
-        pair = sorted([f1, f2], key=lambda d: d["name"].strip().lower())
-        f1c, f2c = pair[0], pair[1]
-        X = build_feature_vector(f1c, f2c)  # 1xN DataFrame
-
-        # Try to load weights if they exist; otherwise uniform = 1.0
-        weights = None
-        weights_path = os.path.join(os.path.dirname(__file__), "..", "ml", "model", "shap_feature_weights.npy")
-        try:
-            import numpy as _np
-            if os.path.exists(weights_path):
-                weights = _np.load(weights_path).tolist()
-        except Exception:
-            weights = None
-
-        features = list(X.columns)
-        values = X.iloc[0].to_dict()
-
-        # Build weighted contributions
-        contribs = []
-        for i, feat in enumerate(features):
-            v = float(values.get(feat, 0.0) or 0.0)
-            w = float(weights[i]) if (weights and i < len(weights)) else 1.0
-            contribs.append((feat, round(v * w, 6)))
-
-        # Sort by absolute impact and take top_k
-        contribs.sort(key=lambda kv: abs(kv[1]), reverse=True)
-        top = [{"feature": f, "value": v} for (f, v) in contribs[:top_k]]
+        result = orient(attribution_engine.explain(f1, f2), f1["name"])
+        contribs = sorted(zip(result["features"], result["shap_values"]), key=lambda kv: abs(kv[1]), reverse=True)
+        top = [{"feature": f, "value": round(v, 6)} for (f, v) in contribs[:top_k]]
 
         return {
             "explainable": True,
@@ -524,9 +575,16 @@ def compute_shap_for_pair(f1: dict, f2: dict, top_k: int = 5) -> dict:
         }
 
 
-def predict_match(f1_input, f2_input):
-
-    print(f"ALPHA ORDER: {f1_input['name'] if f1_input else 'Unknown'} (f1) vs {f2_input['name'] if f2_input else 'Unknown'} (f2)")
+def prepare_match(f1_input, f2_input):
+    """
+    First stage of a prediction: toss-up check, alphabetical canonical order
+    and the model input row. Toss-ups come back already finished under "result".
+    """
+    tr = current_trace()
+    if tr:
+        tr.event("matchup",
+                 f1=f1_input["name"] if f1_input else "Unknown",
+                 f2=f2_input["name"] if f2_input else "Unknown")
 
     # Check for toss-up conditions before any processing
     if should_be_tossup(f1_input, f2_input):
@@ -534,7 +592,9 @@ def predict_match(f1_input, f2_input):
         fighter1_name = f1_input['name'] if f1_input else "Unknown Fighter"
         fighter2_name = f2_input['name'] if f2_input else "Unknown Fighter"
 
-        print(f"⚖️ TOSS-UP: Insufficient data or experience for reliable prediction")
+        SHORT_CIRCUITS.inc("tossup")
+        if tr:
+            tr.event("tossup", reason="Insufficient data or experience for reliable prediction")
 
         # Create minimal stat favors for toss-up
         stat_favors = [
@@ -543,7 +603,7 @@ def predict_match(f1_input, f2_input):
             {"stat": "Prediction Confidence", "favors": "Toss-Up"}
         ]
 
-        return (
+        return {"result": (
             "Toss Up",  # winner
             50.0,  # confidence
             {},  # raw feature diffs (empty for toss-up)
@@ -553,7 +613,7 @@ def predict_match(f1_input, f2_input):
             stat_favors,  # stat favors
             fighter1_name,  # f1 name
             fighter2_name   # f2 name
-        )
+        )}
 
     # === Enforce deterministic order: alphabetical by name ===
     f1_name = f1_input["name"].strip().lower()
@@ -564,54 +624,107 @@ def predict_match(f1_input, f2_input):
         f1_input, f2_input = f2_input, f1_input
         reverse = True
 
-    # === Debug: Show fighter stats before feature calculation ===
-    print(f"\n🔴 RED CORNER: {f1_input['name']}")
-    for k, v in f1_input.items():
-        if isinstance(v, (int, float)) and k in ["SLpM", "SApM", "TD Avg.", "TD Def.", "Str. Acc.", "Str. Def"]:
-            print(f"  {k}: {v}")
+    # === Debug: fighter stats before feature calculation ===
+    if tr:
+        corner_stats = ["SLpM", "SApM", "TD Avg.", "TD Def.", "Str. Acc.", "Str. Def"]
+        tr.event("corners", reversed=reverse,
+                 red={"name": f1_input["name"], **{k: float(f1_input[k]) for k in corner_stats}},
+                 blue={"name": f2_input["name"], **{k: float(f2_input[k]) for k in corner_stats}},
+                 sapm_diff=round(float(f1_input["SApM"] - f2_input["SApM"]), 3))
 
-    print(f"\n🔵 BLUE CORNER: {f2_input['name']}")
-    for k, v in f2_input.items():
-        if isinstance(v, (int, float)) and k in ["SLpM", "SApM", "TD Avg.", "TD Def.", "Str. Acc.", "Str. Def"]:
-            print(f"  {k}: {v}")
+    # === Build features as f1 - f2 ===
+    with PREDICT_STAGE.time("features"):
+        X = build_feature_vector(f1_input, f2_input)
 
-    sa_diff = f1_input["SApM"] - f2_input["SApM"]
-    print(f"[SApM] {f1_input['name']}: {f1_input['SApM']} | {f2_input['name']}: {f2_input['SApM']} → Diff: {sa_diff:.3f}")
+    return {"f1": f1_input, "f2": f2_input, "reverse": reverse, "X": X}
 
 
-    # === Build features as f1 - f2 ===
-    X = build_feature_vector(f1_input, f2_input)
+def score_matches(prepared):
+    """
+    Run the scaler and model once over every prepared matchup that still needs
+    a probability. Returns P(canonical f1 wins) per entry, None for toss-ups.
+    """
+    pending = [i for i, p in enumerate(prepared) if "result" not in p]
+    probas = [None] * len(prepared)
+    if not pending:
+        return probas
+
+    t0 = time.perf_counter()
+    X = pd.concat([prepared[i]["X"] for i in pending], ignore_index=True)
     X_scaled = scaler.transform(X)
+    t1 = time.perf_counter()
+    scores = model.predict_proba(X_scaled)[:, 1]
+    t2 = time.perf_counter()
+    PREDICT_STAGE.observe(t1 - t0, "scaler")
+    PREDICT_STAGE.observe(t2 - t1, "model")
+    MODEL_INFERENCE.observe(t2 - t0, batch_size_label(len(pending)))
 
-    raw_proba = model.predict_proba(X_scaled)[0][1]  # prob f1 wins
+    for i, p in zip(pending, scores):
+        probas[i] = p
+    return probas
 
-    # If inputs were reversed, invert probability
-    if reverse:
-        raw_proba = 1 - raw_proba
-        f1_input, f2_input = f2_input, f1_input
-        # rebuild X for debug so stats match displayed order
-        X = build_feature_vector(f1_input, f2_input)
-        X_scaled = scaler.transform(X)
 
-    # === Confidence normalization helper ===
-    def normalize_confidence(p: float, low=50.0, high=75.0) -> float:
-        # Clamp more gently to avoid extreme confidence
-        p = max(0.01, min(p, 0.99))
-        # Symmetric scaling around 0.5
-        scaled = low + abs(p - 0.5) * 2 * (high - low)
-        return round(scaled, 2)
+def finalize_match(prepared, raw_proba, with_proba=False):
+    """
+    Apply boosts and the rematch override to a scored matchup. With
+    with_proba, returns (result, boosted_proba): P(f1 wins) in the caller's
+    order after the boosts, 0.5 for toss-ups. The result's confidence is a
+    UI score squeezed into 50-75 (90 for the rematch override), not a
+    probability; simulations and backtests should draw from boosted_proba.
+    """
+    if "result" in prepared:
+        return (prepared["result"], 0.5) if with_proba else prepared["result"]
+    with PREDICT_STAGE.time("boosts"):
+        result, boosted_proba = _finalize_scored(prepared, raw_proba)
+    return (result, boosted_proba) if with_proba else result
 
 
-    # Store the unmodified raw_proba for boosting
-    boosted_proba = raw_proba
+def normalize_confidence(p: float, low=50.0, high=75.0) -> float:
+    """UI confidence for a win probability, squeezed into [low, high]; not a probability."""
+    # Clamp more gently to avoid extreme confidence
+    p = max(0.01, min(p, 0.99))
+    # Symmetric scaling around 0.5
+    scaled = low + abs(p - 0.5) * 2 * (high - low)
+    return round(scaled, 2)
 
-    # Normalize based on true raw (not max symmetrical)
-    base_confidence = normalize_confidence(raw_proba)
+
+def conf_boost_to_prob(boost_pts, low=50.0, high=85.0):
+    """Convert a boost from confidence points to probability space."""
+    scale = 0.5 / (high - low)  # inverse of normalize_confidence scaling
+    return boost_pts * scale
 
 
+def combined_opponent_record(fighter):
+    """Summed current UFC (wins, losses, draws) of every opponent in a fighter's history."""
+    total_wins = total_losses = total_draws = 0
+    for fight in fighter["fight_history"]:
+        opp_w, opp_l, opp_d = get_opponent_ufc_record(fight.get("opponent"))
+        total_wins += opp_w
+        total_losses += opp_l
+        total_draws += opp_d
+    return total_wins, total_losses, total_draws
+
+
+def apply_boosts(f1_input, f2_input, raw_proba, flags, opp_records=None, stat_favors=None, details=None):
+    """
+    The served boost logic as a pure function: (boosted_proba, winner, confidence).
+
+    raw_proba is the model's P(f1 wins) in display order. flags maps the
+    config names APPLY_FORM_BOOST, APPLY_STREAK_BOOST, APPLY_STAT_DOMINANCE_BONUS
+    and APPLY_OPP_STRENGTH_BOOST to bools; opp_records is the two fighters'
+    combined opponent UFC records, ((w, l, d), (w, l, d)), and is only read
+    when the opponent-strength boost is on. boosted_proba is P(f1 wins) after
+    the boosts and the rematch override; confidence is the UI score. If
+    `details` is a dict, the intermediate values are written into it.
+    """
+    if stat_favors is None:
+        stat_favors = get_stat_favors(f1_input, f2_input)
+
+    # Store the unmodified raw_proba for boosting
+    boosted_proba = raw_proba
+
     # === Stat Favors ===
-    stat_favors = get_stat_favors(f1_input, f2_input)
-    if APPLY_STAT_DOMINANCE_BONUS:
+    if flags["APPLY_STAT_DOMINANCE_BONUS"]:
         initial_winner = f1_input["name"] if boosted_proba >= 0.5 else f2_input["name"]
         winner_count = sum(1 for s in stat_favors if s["favors"] == initial_winner)
         loser_count = sum(1 for s in stat_favors if s["favors"] not in [initial_winner, "Even"])
@@ -625,23 +738,17 @@ def predict_match(f1_input, f2_input):
     streak_diff = f1_input["win_streak_score"] - f2_input["win_streak_score"]
 
     form_boost = 0.0
-    if APPLY_FORM_BOOST:
+    if flags["APPLY_FORM_BOOST"]:
         form_boost = abs(recent_diff) * 6
         if (boosted_proba >= 0.5 and recent_diff < 0) or (boosted_proba < 0.5 and recent_diff > 0):
             form_boost *= -1
 
     streak_boost = 0.0
-    if APPLY_STREAK_BOOST:
+    if flags["APPLY_STREAK_BOOST"]:
         streak_boost = abs(streak_diff) * 12
         if (boosted_proba >= 0.5 and streak_diff < 0) or (boosted_proba < 0.5 and streak_diff > 0):
             streak_boost *= -1
 
-    # === Convert boosts from confidence points → probability space ===
-        # === Convert boosts from confidence points → probability space ===
-    def conf_boost_to_prob(boost_pts, low=50.0, high=85.0):
-        scale = 0.5 / (high - low)  # inverse of normalize_confidence scaling
-        return boost_pts * scale
-
     # === Disable boosts if either fighter has < 4 fights
     min_fight_count = 4
     if len(f1_input["fight_history"]) < min_fight_count or len(f2_input["fight_history"]) < min_fight_count:
@@ -653,7 +760,6 @@ def predict_match(f1_input, f2_input):
     boosted_proba += conf_boost_to_prob(form_boost)
     boosted_proba += conf_boost_to_prob(streak_boost)
 
-
     # Clamp boosted probability
     boosted_proba = min(max(boosted_proba, 0.0), 1.0)
 
@@ -661,23 +767,9 @@ def predict_match(f1_input, f2_input):
     winner = f1_input["name"] if boosted_proba >= 0.5 else f2_input["name"]
     confidence = normalize_confidence(max(boosted_proba, 1 - boosted_proba))
 
-    # === Rematch Info ===
-    # === Rematch Info ===
-    rematch = is_rematch(f1_input, f2_input)
-
-    # === Debug Logging ===
-    if DEBUG_LOGGING:
-        def combined_ufc_record(fighter):
-            total_wins = total_losses = total_draws = 0
-            for fight in fighter["fight_history"]:
-                opp_w, opp_l, opp_d = get_opponent_ufc_record(fight.get("opponent"))
-                total_wins += opp_w
-                total_losses += opp_l
-                total_draws += opp_d
-            return total_wins, total_losses, total_draws
-
-        f1_opp_w, f1_opp_l, f1_opp_d = combined_ufc_record(f1_input)
-        f2_opp_w, f2_opp_l, f2_opp_d = combined_ufc_record(f2_input)
+    # === Opponent-strength boost ===
+    if flags["APPLY_OPP_STRENGTH_BOOST"]:
+        (f1_opp_w, f1_opp_l, f1_opp_d), (f2_opp_w, f2_opp_l, f2_opp_d) = opp_records
 
         def win_pct(w, l, d):
             total = w + l
@@ -698,74 +790,80 @@ def predict_match(f1_input, f2_input):
         winner = f1_input["name"] if boosted_proba >= 0.5 else f2_input["name"]
         confidence = normalize_confidence(max(boosted_proba, 1 - boosted_proba))
 
-        print("📊 Opponent UFC Records:")
-        print(f"   {f1_input['name']}: {f1_opp_w}-{f1_opp_l}-{f1_opp_d} (Win%: {f1_opp_winpct:.3f})")
-        print(f"   {f2_input['name']}: {f2_opp_w}-{f2_opp_l}-{f2_opp_d} (Win%: {f2_opp_winpct:.3f})")
-        print(f"   Win% Diff: {winpct_diff:+.3f} → Potential Confidence Change: {opp_strength_boost:+.2f} pts")
-        print(f"🔍 Normalized Order: {f1_input['name']} vs {f2_input['name']}")
-        print(f"  -> Winner: {winner} | Confidence: {confidence:.1f}%")
-        print(f"🧠 Raw model probability (f1 wins): {raw_proba:.4f}")
-        print(f"🧮 Boosted probability (f1 wins): {boosted_proba:.4f}")
-        print(f"🔧 Normalized base confidence: {base_confidence:.2f}")
-        print(f"📊 Final Prediction: {winner} | Confidence: {confidence:.1f}%")
-        print(f"    ↪ Stat boost: {stat_boost:.2f}")
-        print(f"    ↪ Form boost: {form_boost:.2f}")
-        print(f"    ↪ Streak boost: {streak_boost:.2f}")
-        print("[RAW Features] (display order):")
-        X_debug = build_feature_vector(f1_input, f2_input)
-        X_scaled_debug = scaler.transform(X_debug)
-        for k, v in X_debug.iloc[0].items():
-            print(f"{k}: {v:.3f}")
-        print("[SCALED Features] (display order):")
-        for i, k in enumerate(X_debug.columns):
-            print(f"{k}: {X_scaled_debug[0][i]:.3f}")
-        print(f"Rematch Detected: {rematch}")
-
-        
-    
-        
-    # Apply SHAP-style weights, reducing influence of TD_Def_diff
-    shap_weights = {f: 1.0 for f in X.columns}
-    shap_weights["TD_Def_diff"] = 0.25  # reduce weight here
-
-    # Apply weights to feature diffs
-    weighted_feature_diffs = {
-        f: round(X.iloc[0][f] * shap_weights[f], 4)
-        for f in X.columns
-    }
+        if details is not None:
+            details["opponent_records"] = {
+                "f1": {"name": f1_input["name"], "record": [f1_opp_w, f1_opp_l, f1_opp_d], "win_pct": round(f1_opp_winpct, 3)},
+                "f2": {"name": f2_input["name"], "record": [f2_opp_w, f2_opp_l, f2_opp_d], "win_pct": round(f2_opp_winpct, 3)},
+                "win_pct_diff": round(winpct_diff, 3),
+                "boost_pts": opp_strength_boost,
+            }
 
-    # Recalculate top contributors from weighted values
-    top_contributors = sorted(
-        weighted_feature_diffs.items(),
-        key=lambda kv: abs(kv[1]),
-        reverse=True
-    )[:3]
+    if details is not None:
+        details.update(boosted_proba=boosted_proba, winner=winner, confidence=confidence,
+                       boosts={"stat": stat_boost, "form": round(form_boost, 4), "streak": round(streak_boost, 4)})
 
-        # === Apply recent rematch override if present ===
+    # === Apply recent rematch override if present ===
     recent_rematch = recent_rematch_winner(f1_input, f2_input)
     if recent_rematch:
-        print(f"⚠️ Overriding prediction due to recent dominant rematch result: {recent_rematch} won last time.")
+        if details is not None:
+            details["rematch_override"] = recent_rematch
         winner = recent_rematch
         confidence = 90.0  # Strong confidence override
+        boosted_proba = REMATCH_OVERRIDE_PROBA if winner == f1_input["name"] else 1 - REMATCH_OVERRIDE_PROBA
 
+    return float(boosted_proba), winner, confidence
 
-    log_entry = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "fighter1": f1_input["name"],
-        "fighter2": f2_input["name"],
-        "winner": winner,
-        "confidence": confidence,
-        "rematch": rematch,
-        "raw_feature_diffs": X.iloc[0].to_dict(),
-        "shap_weights": shap_weights,
-        "weighted_feature_diffs": weighted_feature_diffs,
-        "top_3_contributors": [f"{k} ({v:+.3f})" for k, v in top_contributors],
-    }
 
+def _finalize_scored(prepared, raw_proba):
+    tr = current_trace()
+    f1_input, f2_input = prepared["f1"], prepared["f2"]
+    X = prepared["X"]
 
-    with open("predictions.log", "a", encoding="utf-8") as f:
-        f.write(json.dumps(log_entry) + "\n")
+    # If inputs were reversed, invert probability
+    if prepared["reverse"]:
+        raw_proba = 1 - raw_proba
+        f1_input, f2_input = f2_input, f1_input
+        # rebuild X for debug so stats match displayed order
+        X = build_feature_vector(f1_input, f2_input)
 
+    # Normalize based on true raw (not max symmetrical)
+    base_confidence = normalize_confidence(raw_proba)
+
+    stat_favors = get_stat_favors(f1_input, f2_input)
+    rematch = is_rematch(f1_input, f2_input)
+    flags = {
+        "APPLY_FORM_BOOST": APPLY_FORM_BOOST,
+        "APPLY_STREAK_BOOST": APPLY_STREAK_BOOST,
+        "APPLY_STAT_DOMINANCE_BONUS": APPLY_STAT_DOMINANCE_BONUS,
+        "APPLY_OPP_STRENGTH_BOOST": APPLY_OPP_STRENGTH_BOOST,
+    }
+    opp_records = None
+    if APPLY_OPP_STRENGTH_BOOST:
+        opp_records = (combined_opponent_record(f1_input), combined_opponent_record(f2_input))
+
+    details = {}
+    boosted_proba, winner, confidence = apply_boosts(
+        f1_input, f2_input, raw_proba, flags, opp_records, stat_favors, details)
+
+    if tr:
+        if "opponent_records" in details:
+            tr.event("opponent_records", **details["opponent_records"])
+        X_scaled_debug = scaler.transform(X)
+        tr.event("prediction",
+                 order=[f1_input["name"], f2_input["name"]],
+                 raw_proba=round(float(raw_proba), 4),
+                 boosted_proba=round(float(details["boosted_proba"]), 4),
+                 base_confidence=base_confidence,
+                 winner=details["winner"], confidence=details["confidence"],
+                 boosts=details["boosts"],
+                 raw_features={k: round(float(v), 4) for k, v in X.iloc[0].items()},
+                 scaled_features={k: round(float(X_scaled_debug[0][i]), 4) for i, k in enumerate(X.columns)},
+                 rematch=rematch)
+
+    if "rematch_override" in details:
+        SHORT_CIRCUITS.inc("rematch_override")
+        if tr:
+            tr.event("rematch_override", winner=details["rematch_override"], confidence=90.0)
 
     return (
         winner,
@@ -777,4 +875,18 @@ def predict_match(f1_input, f2_input):
         stat_favors,
         f1_input["name"],
         f2_input["name"]
-    )
+    ), boosted_proba
+
+
+def predict_matches(pairs, with_proba=False):
+    """
+    Predict many (f1, f2) matchups with a single scaler/model call. With
+    with_proba, each entry is (result, P(f1 wins) after boosts) instead.
+    """
+    prepared = [prepare_match(f1, f2) for f1, f2 in pairs]
+    probas = score_matches(prepared)
+    return [finalize_match(p, proba, with_proba) for p, proba in zip(prepared, probas)]
+
+
+def predict_match(f1_input, f2_input):
+    return predict_matches([(f1_input, f2_input)])[0]
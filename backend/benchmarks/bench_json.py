@@ -0,0 +1,130 @@
+# benchmarks/bench_json.py
+"""
+Encode time and size of real response payloads: the old path
+(safe_json walk + jsonable_encoder + JSONResponse) against FastJSONResponse.
+
+    python benchmarks/bench_json.py [--repeat 50]
+
+Payloads: a /predict response for an upcoming-card matchup (or the first two
+fighters in the DB when none of the card is there), data/tracked_predictions.json
+for /tracked, and data/ufc_fighters.json for /full_fighters.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import utils
+from app.routes import normalize_keys
+from app.serialization import FastJSONResponse
+
+
+def legacy_safe_json(val):
+    """routes.safe_json as it was before FastJSONResponse."""
+    if isinstance(val, (np.integer, np.floating)):
+        val = float(val)
+        return 0.0 if (math.isnan(val) or math.isinf(val)) else val
+    if isinstance(val, float):
+        return 0.0 if (math.isnan(val) or math.isinf(val)) else val
+    if isinstance(val, np.bool_):
+        return bool(val)
+    if isinstance(val, dict):
+        return {str(k): legacy_safe_json(v) for k, v in val.items()}
+    if isinstance(val, list):
+        return [legacy_safe_json(v) for v in val]
+    return val
+
+
+def predict_payload() -> dict:
+    names = []
+    path = os.path.join("data", "upcoming_cards.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            names = [(fight["fighter_red"], fight["fighter_blue"])
+                     for event in json.load(f) for fight in event.get("fights", [])]
+    f1 = f2 = None
+    for a, b in names:
+        f1, f2 = utils.get_fighter_stats(a), utils.get_fighter_stats(b)
+        if f1 and f2:
+            break
+    if not (f1 and f2):
+        f1, f2 = (utils.get_fighter_stats(n) for n in utils.fighters_df["name"].iloc[:2])
+
+    winner, confidence, diffs, l1, l2, rematch, favors, _, _ = utils.predict_match(f1, f2)
+    # Same fields the /predict handler returns
+    return {
+        "model_version": utils.MODEL_VERSION,
+        "predicted_winner": str(winner),
+        "confidence": float(confidence),
+        "feature_differences": diffs,
+        "fighter1_last5": list(map(str, l1)),
+        "fighter2_last5": list(map(str, l2)),
+        "fighter1": f1["name"],
+        "fighter2": f2["name"],
+        "fighter1_data": normalize_keys(f1),
+        "fighter2_data": normalize_keys(f2),
+        "rematch": bool(rematch),
+        "stat_favors": favors,
+        "is_champion": bool(f1["is_champion"]),
+        "debut_prediction": False,
+        "fighter1_has_stats": True,
+        "fighter2_has_stats": True,
+    }
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def legacy_encode(payload) -> bytes:
+    return JSONResponse(jsonable_encoder(legacy_safe_json(payload))).body
+
+
+def fast_encode(payload) -> bytes:
+    return FastJSONResponse(payload).body
+
+
+def timed(fn, payload, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        body = fn(payload)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = {"/predict": predict_payload()}
+    for route, path in (("/tracked", "data/tracked_predictions.json"), ("/full_fighters", "data/ufc_fighters.json")):
+        if os.path.exists(path):
+            payloads[route] = load(path)
+
+    print(f"{'route':<15} {'legacy ms':>10} {'fast ms':>9} {'speedup':>8} {'legacy bytes':>13} {'fast bytes':>11}")
+    for route, payload in payloads.items():
+        # /predict is tiny; repeat it more for a stable median
+        repeat = args.repeat * 20 if route == "/predict" else args.repeat
+        legacy_ms, legacy_bytes = timed(legacy_encode, payload, repeat)
+        fast_ms, fast_bytes = timed(fast_encode, payload, repeat)
+        print(f"{route:<15} {legacy_ms:>10.3f} {fast_ms:>9.3f} {legacy_ms / fast_ms:>7.1f}x "
+              f"{legacy_bytes:>13,} {fast_bytes:>11,}")
+
+
+if __name__ == "__main__":
+    main()
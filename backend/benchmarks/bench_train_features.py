@@ -0,0 +1,131 @@
+# benchmarks/bench_train_features.py
+"""
+Training feature build: the old per-fighter helpers from ml/mlp_model.py
+(a full fighters_df filter per opponent, so quadratic) against the
+vectorized ml/training_features.py. The three columns are checked to be
+identical before timing.
+
+    python benchmarks/bench_train_features.py [--scale 4] [--repeat 3]
+
+--scale N repeats the fighter DB N times under renamed fighters (opponents
+renamed to match) to see how both versions grow with the fighter count.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "ml"))
+os.chdir(BACKEND_DIR)
+
+import numpy as np
+
+from training_features import fighter_table, fight_table, add_form_features
+
+
+# --- mlp_model.py before vectorization ---
+
+def legacy_opponent_strength_score(name, df):
+    opp = df[df["name_clean"] == name.lower().strip()]
+    if opp.empty:
+        return 0.5
+    return (opp["TD Def."].values[0] + opp["Str. Def"].values[0]) / 200
+
+def legacy_recent_form_score(fights):
+    if not fights:
+        return 0.0
+    weights = np.linspace(1.0, 0.2, len(fights[:5]))
+    scores = np.array([1 if f["result"] == "win" else -1 for f in fights[:5]])
+    return np.dot(weights, scores) / sum(weights)
+
+def legacy_win_streak_score(fights, df):
+    score = 0
+    for f in fights[:5]:
+        if f["result"] == "win":
+            score += legacy_opponent_strength_score(f["opponent"], df)
+        else:
+            break
+    return score / 5
+
+def legacy_avg_opp_strength(fights, df):
+    if not fights:
+        return 0.5
+    return np.mean([legacy_opponent_strength_score(f["opponent"], df) for f in fights[:5]])
+
+def legacy_features(fighter_data, fighters_df):
+    fight_lookup = {}
+    for f in fighter_data:
+        name = f["name"].lower().strip()
+        fight_lookup[name] = [
+            {
+                "opponent": h.get("opponent", "").lower().strip(),
+                "result": h.get("result", "").lower(),
+                "event": h.get("event", "")
+            }
+            for h in f.get("fight_history", []) if "UFC" in h.get("event", "")
+        ]
+    fighters_df["recent_form_score"] = fighters_df["name_clean"].apply(lambda n: legacy_recent_form_score(fight_lookup.get(n, [])))
+    fighters_df["win_streak_score"] = fighters_df["name_clean"].apply(lambda n: legacy_win_streak_score(fight_lookup.get(n, []), fighters_df))
+    fighters_df["avg_opp_strength"] = fighters_df["name_clean"].apply(lambda n: legacy_avg_opp_strength(fight_lookup.get(n, []), fighters_df))
+    return fighters_df
+
+
+def vectorized_features(fighter_data, fighters_df):
+    return add_form_features(fighters_df, fight_table(fighter_data))
+
+
+def scaled(fighter_data, copies):
+    if copies == 1:
+        return fighter_data
+    out = []
+    for c in range(copies):
+        suffix = "" if c == 0 else f" {c}"
+        for f in fighter_data:
+            out.append({
+                **f,
+                "name": f["name"] + suffix,
+                "fight_history": [{**h, "opponent": h.get("opponent", "") + suffix} for h in f.get("fight_history", [])],
+            })
+    return out
+
+
+def timed(fn, fighter_data, repeat):
+    runs, out = [], None
+    for _ in range(repeat):
+        df = fighter_table(fighter_data)
+        t0 = time.perf_counter()
+        out = fn(fighter_data, df)
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs), out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fighters", default=os.path.join("data", "ufc_fighters.json"))
+    args = parser.parse_args()
+
+    with open(args.fighters, encoding="utf-8") as f:
+        fighter_data = scaled(json.load(f), args.scale)
+
+    legacy_s, legacy = timed(legacy_features, fighter_data, args.repeat)
+    fast_s, fast = timed(vectorized_features, fighter_data, args.repeat)
+
+    cols = ["recent_form_score", "win_streak_score", "avg_opp_strength"]
+    diff = max(float(np.max(np.abs(legacy[c].to_numpy() - fast[c].to_numpy()))) for c in cols)
+    identical = all(np.array_equal(legacy[c].to_numpy(), fast[c].to_numpy()) for c in cols)
+
+    print(f"👥 {len(legacy)} fighters")
+    print(f"   legacy      {legacy_s * 1000:10.1f} ms")
+    print(f"   vectorized  {fast_s * 1000:10.1f} ms  ({legacy_s / fast_s:.0f}x)")
+    print(f"   {'✅ identical' if identical else f'❌ max abs diff {diff:.3g}'}")
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# benchmarks/bench_workers.py
+"""
+RSS and throughput of the API at 1, 4 and 8 workers.
+
+    python benchmarks/bench_workers.py                 # serve.py (shared snapshot)
+    python benchmarks/bench_workers.py --mode plain    # plain uvicorn --workers, for comparison
+
+For every worker count the server is started on a free port, warmed up, hit
+with concurrent /predict requests for --duration seconds, then each worker's
+RSS and PSS (proportional set size, which splits shared pages between the
+processes mapping them) are read from /proc. Linux only.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def descendants(pid: int) -> list:
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    out, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            out.append(child)
+            stack.append(child)
+    return out
+
+
+def memory_kb(pid: int) -> dict:
+    mem = {"rss": 0, "pss": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    mem[key.lower()] = int(rest.split()[0])
+    except OSError:
+        pass
+    return mem
+
+
+def worker_pids(server_pid: int) -> list:
+    pids = []
+    for pid in descendants(server_pid):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmd = f.read().replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            continue
+        if ("spawn_main" in cmd or "multiprocessing" in cmd) and "resource_tracker" not in cmd:
+            pids.append(pid)
+    return pids
+
+
+def load_matchups() -> list:
+    with open(os.path.join(BACKEND_DIR, "data", "upcoming_cards.json"), encoding="utf-8") as f:
+        cards = json.load(f)
+    return [
+        {"fighter1": fight["fighter_red"], "fighter2": fight["fighter_blue"]}
+        for event in cards for fight in event.get("fights", [])
+        if fight.get("fighter_red") and fight.get("fighter_blue")
+    ]
+
+
+async def drive(base_url: str, matchups: list, duration: float, concurrency: int) -> dict:
+    done = errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(client):
+        nonlocal done, errors
+        while time.perf_counter() < deadline:
+            try:
+                r = await client.post("/predict", json=random.choice(matchups))
+                if r.status_code >= 500:
+                    errors += 1
+                else:
+                    done += 1
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[client_loop(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+    return {"requests": done, "errors": errors, "rps": round(done / elapsed, 1)}
+
+
+def wait_ready(base_url: str, timeout: float = 120.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(base_url + "/config", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server at {base_url} did not come up")
+
+
+def run(mode: str, workers: int, duration: float, concurrency: int, matchups: list) -> dict:
+    port = free_port()
+    env = dict(os.environ)
+    if mode == "snapshot":
+        cmd = [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port),
+               "--host", "127.0.0.1", "--reuse-snapshot"]
+    else:
+        env.pop("UFC_SNAPSHOT_DIR", None)
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--workers", str(workers),
+               "--port", str(port), "--host", "127.0.0.1"]
+
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(base_url)
+        asyncio.run(drive(base_url, matchups, 2.0, concurrency))  # warm every worker
+        result = asyncio.run(drive(base_url, matchups, duration, concurrency))
+        # uvicorn serves in-process when workers == 1
+        pids = worker_pids(proc.pid) or [proc.pid]
+        mems = [memory_kb(pid) for pid in pids]
+        result.update({
+            "workers": workers,
+            "worker_rss_mb": round(sum(m["rss"] for m in mems) / len(mems) / 1024, 1) if mems else None,
+            "worker_pss_mb": round(sum(m["pss"] for m in mems) / len(mems) / 1024, 1) if mems else None,
+            "total_pss_mb": round(sum(m["pss"] for m in mems) / 1024, 1),
+        })
+        return result
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["snapshot", "plain"], default="snapshot")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.mode == "snapshot":
+        # Build once so every run attaches to the same files
+        subprocess.run([sys.executable, "-m", "app.snapshot", os.path.join(BACKEND_DIR, "snapshot")],
+                       cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+
+    matchups = load_matchups()
+    print(f"{'workers':>7} {'rps':>8} {'errors':>6} {'RSS/worker MB':>14} {'PSS/worker MB':>14} {'total PSS MB':>13}")
+    for n in args.workers:
+        r = run(args.mode, n, args.duration, args.concurrency, matchups)
+        print(f"{r['workers']:>7} {r['rps']:>8} {r['errors']:>6} {r['worker_rss_mb']!s:>14} "
+              f"{r['worker_pss_mb']!s:>14} {r['total_pss_mb']:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/conftest.py
+"""
+Fixtures for the micro-benchmark suite (benchmarks/micro_*.py).
+
+The suite runs against a pinned snapshot of the fighter DB and model
+(benchmarks/.pinned-snapshot, built by app.snapshot the first time and then
+reused), so numbers from different commits are measured on the same data.
+Rebuild it with --repin-snapshot after a data refresh. The snapshot version
+is recorded in every saved run's machine_info, and pytest-benchmark warns
+when --benchmark-compare mixes runs from different snapshots.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PINNED_SNAPSHOT = os.path.join(BACKEND_DIR, "benchmarks", ".pinned-snapshot")
+HTML_DIR = os.path.join(BACKEND_DIR, "html")
+
+
+def pytest_addoption(parser):
+    parser.addoption("--repin-snapshot", action="store_true",
+                     help="rebuild the pinned fighter DB/model snapshot from the current data")
+
+
+def pytest_configure(config):
+    # Only for this suite (pytest -c benchmarks/pytest.ini); a plain pytest run leaves the app alone
+    if str(config.inipath or "") != os.path.join(BACKEND_DIR, "benchmarks", "pytest.ini"):
+        return
+    sys.path.insert(0, BACKEND_DIR)
+    sys.path.insert(0, os.path.join(BACKEND_DIR, "scraper"))
+    os.chdir(BACKEND_DIR)
+
+    if config.getoption("--repin-snapshot") and os.path.isdir(PINNED_SNAPSHOT):
+        shutil.rmtree(PINNED_SNAPSHOT)
+    if not os.path.exists(os.path.join(PINNED_SNAPSHOT, "manifest.json")):
+        subprocess.run([sys.executable, "-m", "app.snapshot", PINNED_SNAPSHOT], cwd=BACKEND_DIR, check=True)
+    # Must be set before anything imports app.utils
+    os.environ["UFC_SNAPSHOT_DIR"] = PINNED_SNAPSHOT
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    from app import utils
+    machine_info["snapshot_version"] = utils.DATA_VERSION
+    machine_info["model_version"] = utils.MODEL_VERSION
+
+
+def _ufc_fights(f: dict) -> int:
+    return f["ufc_wins"] + f["ufc_losses"] + f["ufc_draws"]
+
+
+@pytest.fixture(scope="session")
+def matchups():
+    """Deterministic fighter pairs from the pinned DB for each predict_match branch."""
+    from app import utils
+
+    fighters = [utils.get_fighter_stats(n) for n in sorted(utils.fighters_df["name"].dropna().unique())]
+    fighters = [f for f in fighters if f]
+    by_name = {f["name"].lower(): f for f in fighters}
+    veterans = [f for f in fighters if _ufc_fights(f) >= 4]
+
+    pairs = {}
+    for a in veterans:
+        for b in veterans:
+            if a is not b and a["weight"] == b["weight"] and not utils.is_rematch(a, b):
+                pairs["normal"] = (a, b)
+                break
+        if "normal" in pairs:
+            break
+
+    newcomer = next((f for f in fighters if _ufc_fights(f) < 3), None)
+    if newcomer and veterans:
+        pairs["tossup"] = (newcomer, veterans[0])
+
+    for a in veterans:
+        for fight in a["fight_history"][:2]:
+            b = by_name.get(fight.get("opponent", "").lower())
+            if b and _ufc_fights(b) >= 3 and utils.recent_rematch_winner(a, b):
+                pairs["rematch"] = (a, b)
+                break
+        if "rematch" in pairs:
+            break
+    return pairs
+
+
+@pytest.fixture(scope="session")
+def html_fixture():
+    def read(name: str) -> str:
+        with open(os.path.join(HTML_DIR, name), encoding="utf-8") as f:
+            return f.read()
+    return read
@@ -0,0 +1,21 @@
+# benchmarks/micro_parsers.py
+"""
+Scraper HTML parsing on the saved ufcstats pages in backend/html.
+
+html/fight_details.html (a single bout page) has no parser in the scraper,
+so it isn't benchmarked.
+"""
+
+import scraper
+
+
+def test_parse_fighter_list(benchmark, html_fixture):
+    html = html_fixture("initial_stats.html")
+    fighters = benchmark(scraper.parse_fighter_list, html)
+    assert fighters and all(f["profile_url"] for f in fighters)
+
+
+def test_parse_fighter_page(benchmark, html_fixture):
+    html = html_fixture("advanced_stats.html")
+    stats, fights, *_ = benchmark(scraper.parse_fighter_page, html, "Marcelo Aguiar")
+    assert "SLpM" in stats and fights
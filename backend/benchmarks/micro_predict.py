@@ -0,0 +1,63 @@
+# benchmarks/micro_predict.py
+"""Fighter lookup, feature build, predict_match per branch and TreeSHAP attribution."""
+
+import pytest
+
+from app import utils
+from app.attribution import attribution_engine
+
+
+def _pair(matchups, branch):
+    if branch not in matchups:
+        pytest.skip(f"no {branch} matchup in the pinned snapshot")
+    return matchups[branch]
+
+
+def test_get_fighter_stats(benchmark, matchups):
+    name = _pair(matchups, "normal")[0]["name"]
+    assert benchmark(utils.get_fighter_stats, name)["name"] == name
+
+
+def test_build_feature_vector(benchmark, matchups):
+    f1, f2 = _pair(matchups, "normal")
+    X = benchmark(utils.build_feature_vector, f1, f2)
+    assert list(X.columns) == list(utils.feature_names)
+
+
+@pytest.mark.parametrize("branch", ["tossup", "normal", "rematch"])
+def test_predict_match(benchmark, matchups, branch):
+    f1, f2 = _pair(matchups, branch)
+    winner, confidence = benchmark(utils.predict_match, f1, f2)[:2]
+    if branch == "tossup":
+        assert winner == "Toss Up"
+    elif branch == "rematch":
+        assert confidence == 90.0
+    else:
+        assert winner in (f1["name"], f2["name"])
+
+
+def test_predict_matches_card(benchmark, matchups):
+    """A 13-bout card through one batched scaler/model call."""
+    pairs = [_pair(matchups, "normal")] * 13
+    assert len(benchmark(utils.predict_matches, pairs)) == 13
+
+
+def _with_stats(f: dict) -> dict:
+    # utils.is_debut reads the scraped layout (a nested "stats" dict), not get_fighter_stats' flat keys
+    return {**f, "stats": {k: str(f[k]) for k in ("SLpM", "Str. Acc.", "SApM", "Str. Def", "TD Avg.", "TD Def.")}}
+
+
+def test_compute_shap_for_pair_cached(benchmark, matchups):
+    f1, f2 = map(_with_stats, _pair(matchups, "normal"))
+    utils.compute_shap_for_pair(f1, f2)
+    assert benchmark(utils.compute_shap_for_pair, f1, f2)["explainable"]
+
+
+def test_compute_shap_for_pair_cold(benchmark, matchups):
+    f1, f2 = map(_with_stats, _pair(matchups, "normal"))
+
+    def clear():
+        attribution_engine._cache.clear()
+
+    result = benchmark.pedantic(utils.compute_shap_for_pair, args=(f1, f2), setup=clear, rounds=200)
+    assert result["explainable"]
@@ -0,0 +1,57 @@
+# benchmarks/micro_serving.py
+"""
+Response encoding and the /upcoming join.
+
+routes.safe_json no longer exists (responses go through
+serialization.dumps); its legacy path is kept in bench_json.py and measured
+here next to the current one so the gap stays visible.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app import routes, upcoming
+from app.serialization import dumps
+from bench_json import legacy_safe_json, predict_payload
+
+
+@pytest.fixture(scope="module")
+def payload():
+    return predict_payload()
+
+
+def test_predict_response_dumps(benchmark, payload):
+    benchmark(dumps, payload)
+
+
+def test_predict_response_legacy_safe_json(benchmark, payload):
+    benchmark(lambda p: json.dumps(jsonable_encoder(legacy_safe_json(p))).encode(), payload)
+
+
+def test_tracked_dumps(benchmark):
+    path = Path("data/tracked_predictions.json")
+    if not path.exists():
+        pytest.skip("no data/tracked_predictions.json")
+    benchmark(dumps, json.loads(path.read_bytes()))
+
+
+@pytest.fixture(scope="module")
+def upcoming_raw():
+    raw = upcoming.read_raw()
+    if raw[str(upcoming.UPCOMING_PATH)] is None:
+        pytest.skip("no data/upcoming_cards.json")
+    return raw
+
+
+def test_upcoming_odds_join(benchmark, upcoming_raw):
+    cards = benchmark(upcoming.join_upcoming_odds, upcoming_raw)
+    assert isinstance(cards, list)
+
+
+def test_upcoming_payload_cached(benchmark, upcoming_raw):
+    """What a /upcoming request costs once the joined payload is built: a stat and a lookup."""
+    routes.upcoming_payload.get()
+    benchmark(routes.upcoming_payload.get)
@@ -0,0 +1,384 @@
+# benchmarks/replay.py
+"""
+Replay real traffic against the API and report latency per endpoint.
+
+    python benchmarks/replay.py                                  # in-process ASGI, closed loop
+    python benchmarks/replay.py --target http://127.0.0.1:8000   # a running server
+    python benchmarks/replay.py --rate 200 --duration 30         # open loop, Poisson arrivals
+    python benchmarks/replay.py --arrival recorded --speed 50    # log timestamps, 50x faster
+    python benchmarks/replay.py --save-baseline main             # store as baselines/replay-main.json
+    python benchmarks/replay.py --compare main                   # diff against it; exit 1 on regression
+
+Request mix, built from what the app has actually served:
+  logs/predictions.log (+ rotated .gz)  one POST /predict per logged prediction
+  data/tracked_predictions.json         POST /predict per tracked fight, GET /tracked page loads
+  data/upcoming_cards.json              GET /upcoming per card view, POST /predict and /explain per bout
+  fighter names from all of the above   GET /fighters/search typeahead prefixes
+--mix reweights endpoints (e.g. --mix predict=70,upcoming=10,explain=5).
+
+Closed loop (default) keeps --concurrency requests in flight. Open loop
+(--rate) starts requests on a Poisson schedule regardless of how fast they
+finish, up to --concurrency in flight, so queueing shows up in the latency.
+In-process runs share the event loop and GIL with the app; compare them
+with each other, not with --target runs.
+"""
+
+import argparse
+import asyncio
+import glob
+import gzip
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(BACKEND_DIR, "benchmarks", "baselines")
+
+
+# --- workload ---
+
+def read_prediction_log() -> list:
+    """(timestamp, fighter1, fighter2) for every logged prediction, oldest first."""
+    paths = sorted(glob.glob(os.path.join(BACKEND_DIR, "logs", "predictions.log.*.gz")))
+    paths.append(os.path.join(BACKEND_DIR, "logs", "predictions.log"))
+    out = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    ts = datetime.strptime(rec["timestamp"], "%Y-%m-%d %H:%M:%S").timestamp()
+                    out.append((ts, rec["fighter1"], rec["fighter2"]))
+                except (ValueError, KeyError):
+                    continue
+    out.sort()
+    return out
+
+
+def load_json(path, default):
+    try:
+        with open(os.path.join(BACKEND_DIR, path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def build_workload():
+    """({endpoint: [request specs {method, path, json?, params?}]}, prediction log rows)."""
+    pools = defaultdict(list)
+
+    log = read_prediction_log()
+    for _, f1, f2 in log:
+        pools["predict"].append({"method": "POST", "path": "/predict", "json": {"fighter1": f1, "fighter2": f2}})
+
+    tracked = load_json("data/tracked_predictions.json", [])
+    for rec in tracked:
+        if rec.get("fighter1") and rec.get("fighter2"):
+            pools["predict"].append({"method": "POST", "path": "/predict",
+                                     "json": {"fighter1": rec["fighter1"], "fighter2": rec["fighter2"]}})
+    if tracked:
+        pools["tracked"].append({"method": "GET", "path": "/tracked"})
+
+    cards = load_json("data/upcoming_cards.json", [])
+    for event in cards:
+        pools["upcoming"].append({"method": "GET", "path": "/upcoming"})
+        for fight in event.get("fights", []):
+            f1, f2 = fight.get("fighter_red"), fight.get("fighter_blue")
+            if not (f1 and f2):
+                continue
+            body = {"fighter1": f1, "fighter2": f2}
+            pools["predict"].append({"method": "POST", "path": "/predict", "json": body})
+            pools["explain"].append({"method": "POST", "path": "/explain", "json": body})
+
+    names = {spec["json"][k] for spec in pools["predict"] for k in ("fighter1", "fighter2")}
+    for name in sorted(names):
+        for n in (2, 4, len(name)):
+            pools["search"].append({"method": "GET", "path": "/fighters/search", "params": {"q": name[:n]}})
+
+    return {k: v for k, v in pools.items() if v}, log
+
+
+def parse_mix(text: str, pools: dict) -> dict:
+    """Endpoint weights; defaults to each pool's share of the recorded traffic."""
+    if not text:
+        weights = {k: len(v) for k, v in pools.items()}
+        # Single-spec pools (/tracked) stand for a page load per tracked-page visit, not per fight
+        weights["search"] = min(weights.get("search", 0), weights.get("predict", 0))
+        if "tracked" in weights:
+            weights["tracked"] = max(1, weights.get("predict", 0) // 20)
+        return weights
+    weights = {}
+    for part in text.split(","):
+        key, _, value = part.partition("=")
+        if key.strip() not in pools:
+            raise SystemExit(f"unknown endpoint {key!r} in --mix; have {', '.join(sorted(pools))}")
+        weights[key.strip()] = float(value)
+    return weights
+
+
+def request_stream(pools: dict, weights: dict, seed: int):
+    rng = random.Random(seed)
+    keys = [k for k in weights if weights[k] > 0]
+    cum = np.cumsum([weights[k] for k in keys])
+    while True:
+        endpoint = keys[int(np.searchsorted(cum, rng.random() * cum[-1], side="right"))]
+        yield endpoint, rng.choice(pools[endpoint])
+
+
+# --- driving ---
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    async def send(self, client, endpoint: str, spec: dict):
+        t0 = time.perf_counter()
+        try:
+            r = await client.request(spec["method"], spec["path"], json=spec.get("json"), params=spec.get("params"))
+            status = r.status_code
+        except httpx.HTTPError:
+            self.errors[endpoint] += 1
+            return
+        self.latencies[endpoint].append(time.perf_counter() - t0)
+        self.statuses[endpoint][status] += 1
+        if status >= 500:
+            self.errors[endpoint] += 1
+
+
+async def closed_loop(client, stream, recorder, concurrency: int, duration: float, total: int):
+    deadline = time.perf_counter() + duration
+    sent = 0
+
+    async def worker():
+        nonlocal sent
+        while time.perf_counter() < deadline and (not total or sent < total):
+            sent += 1
+            await recorder.send(client, *next(stream))
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+
+async def open_loop(client, stream, recorder, concurrency: int, duration: float, total: int,
+                    rate: float = None, offsets=None, seed: int = 0):
+    """Start requests on a schedule (Poisson at `rate`, or recorded `offsets`)."""
+    rng = random.Random(seed + 1)
+    slots = asyncio.Semaphore(concurrency)
+    tasks = []
+    started = time.perf_counter()
+    next_at = 0.0
+    i = 0
+    while (not total or i < total) and next_at < duration:
+        delay = started + next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await slots.acquire()
+        endpoint, spec = next(stream)
+
+        async def one(endpoint=endpoint, spec=spec):
+            try:
+                await recorder.send(client, endpoint, spec)
+            finally:
+                slots.release()
+
+        tasks.append(asyncio.ensure_future(one()))
+        i += 1
+        if offsets is not None:
+            if i >= len(offsets):
+                break
+            next_at = offsets[i]
+        else:
+            next_at += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+
+
+def make_client(target: str, concurrency: int):
+    if target == "asgi":
+        sys.path.insert(0, BACKEND_DIR)
+        os.chdir(BACKEND_DIR)
+        from app.main import app, _warm_caches
+        _warm_caches()
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay", timeout=60)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(base_url=target, timeout=60, limits=limits)
+
+
+async def replay(args, pools, weights, log):
+    async with make_client(args.target, args.concurrency) as client:
+        if args.warmup:
+            warm = request_stream(pools, weights, args.seed + 100)
+            await closed_loop(client, warm, Recorder(), args.concurrency, args.warmup, 0)
+
+        stream = request_stream(pools, weights, args.seed)
+        recorder = Recorder()
+        t0 = time.perf_counter()
+        if args.arrival == "recorded":
+            if not log:
+                raise SystemExit("--arrival recorded needs logs/predictions.log")
+            # The log only has /predict, so recorded arrivals replay exactly that traffic
+            specs = iter([("predict", {"method": "POST", "path": "/predict",
+                                       "json": {"fighter1": f1, "fighter2": f2}}) for _, f1, f2 in log])
+            offsets = [(ts - log[0][0]) / args.speed for ts, _, _ in log]
+            await open_loop(client, specs, recorder, args.concurrency, args.duration or float("inf"),
+                            args.requests, offsets=offsets)
+        elif args.rate:
+            await open_loop(client, stream, recorder, args.concurrency, args.duration, args.requests,
+                            rate=args.rate, seed=args.seed)
+        else:
+            await closed_loop(client, stream, recorder, args.concurrency, args.duration, args.requests)
+        elapsed = time.perf_counter() - t0
+    return recorder, elapsed
+
+
+# --- reporting ---
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    everything = []
+    for endpoint in sorted(set(recorder.latencies) | set(recorder.errors)):
+        lat = np.array(recorder.latencies.get(endpoint, []), dtype=float) * 1000
+        everything.append(lat)
+        endpoints[endpoint] = _stats(lat, elapsed, recorder.errors.get(endpoint, 0))
+        endpoints[endpoint]["status"] = {str(k): v for k, v in sorted(recorder.statuses[endpoint].items())}
+    all_lat = np.concatenate(everything) if everything else np.array([])
+    return {"elapsed_s": round(elapsed, 3), "endpoints": endpoints,
+            "total": _stats(all_lat, elapsed, sum(recorder.errors.values()))}
+
+
+def _stats(lat_ms, elapsed: float, errors: int) -> dict:
+    if not len(lat_ms):
+        return {"requests": 0, "errors": errors, "rps": 0.0, "mean_ms": None,
+                "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    p50, p95, p99 = np.percentile(lat_ms, [50, 95, 99])
+    return {
+        "requests": int(len(lat_ms)),
+        "errors": errors,
+        "rps": round(len(lat_ms) / elapsed, 1),
+        "mean_ms": round(float(lat_ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(lat_ms.max()), 3),
+    }
+
+
+def print_report(summary: dict):
+    print(f"\n{'endpoint':<10} {'requests':>8} {'errors':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9}  status")
+    rows = list(summary["endpoints"].items()) + [("TOTAL", summary["total"])]
+    for endpoint, s in rows:
+        fmt = lambda v: f"{v:>9.2f}" if v is not None else f"{'-':>9}"
+        print(f"{endpoint:<10} {s['requests']:>8} {s['errors']:>6} {s['rps']:>8.1f} {fmt(s['p50_ms'])} "
+              f"{fmt(s['p95_ms'])} {fmt(s['p99_ms'])} {fmt(s['max_ms'])}  {s.get('status', '')}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def baseline_path(name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"replay-{name}.json")
+
+
+def compare(summary: dict, baseline: dict, threshold: float) -> bool:
+    """Print per-endpoint deltas; True if any p95/p99 got slower or throughput dropped past threshold."""
+    print(f"\nvs baseline {baseline.get('name')} (commit {baseline.get('commit')}, {baseline.get('created_at')})")
+    print(f"{'endpoint':<10} {'p50':>16} {'p95':>16} {'p99':>16} {'rps':>16}")
+    regressed = False
+    rows = list(summary["endpoints"].items()) + [("TOTAL", summary["total"])]
+    for endpoint, s in rows:
+        b = baseline["summary"]["total"] if endpoint == "TOTAL" else baseline["summary"]["endpoints"].get(endpoint)
+        if not b or not b.get("requests") or not s.get("requests"):
+            continue
+        cells = []
+        for key, worse_if_higher in (("p50_ms", True), ("p95_ms", True), ("p99_ms", True), ("rps", False)):
+            old, new = b[key], s[key]
+            change = (new - old) / old if old else 0.0
+            bad = change > threshold if worse_if_higher else change < -threshold
+            # p50 is reported but only tail latency and throughput gate the run
+            if bad and key != "p50_ms":
+                regressed = True
+            cells.append(f"{change:+7.1%}{' !!' if bad else '   '}".rjust(16))
+        print(f"{endpoint:<10} {''.join(cells)}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded traffic against the API")
+    parser.add_argument("--target", default="asgi", help="'asgi' (in-process) or a base URL")
+    parser.add_argument("--concurrency", type=int, default=16, help="max requests in flight")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load (0 = until --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests")
+    parser.add_argument("--rate", type=float, default=None, help="open loop: Poisson arrivals per second")
+    parser.add_argument("--arrival", choices=["closed", "recorded"], default="closed",
+                        help="recorded: replay predictions.log timestamps (see --speed)")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression for --arrival recorded")
+    parser.add_argument("--mix", default="", help="endpoint weights, e.g. predict=70,upcoming=10")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of unrecorded warm-up load")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold (fraction)")
+    args = parser.parse_args()
+    if not args.duration:
+        args.duration = float("inf")
+        if not args.requests and args.arrival != "recorded":
+            parser.error("--duration 0 needs --requests")
+
+    pools, log = build_workload()
+    if not pools:
+        raise SystemExit("No traffic to replay: predictions.log, tracked_predictions.json and upcoming_cards.json are empty")
+    weights = parse_mix(args.mix, pools)
+    total_w = sum(weights.values())
+    print("🎯 Mix: " + ", ".join(f"{k} {w / total_w:.0%} ({len(pools[k])} distinct)" for k, w in weights.items()))
+    mode = (f"recorded arrivals x{args.speed}" if args.arrival == "recorded"
+            else f"open loop {args.rate}/s" if args.rate else "closed loop")
+    limits = [f"{args.duration:g}s" if args.duration != float("inf") else "",
+              f"max {args.requests} requests" if args.requests else ""]
+    print(f"🚦 {args.target}: {mode}, concurrency {args.concurrency}, {' '.join(l for l in limits if l)}")
+
+    recorder, elapsed = asyncio.run(replay(args, pools, weights, log))
+    summary = summarize(recorder, elapsed)
+    print_report(summary)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        doc = {
+            "name": args.save_baseline,
+            "commit": git_commit(),
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "args": {k: v for k, v in vars(args).items() if k not in ("save_baseline", "compare")
+                     and v != float("inf")},
+            "summary": summary,
+        }
+        with open(baseline_path(args.save_baseline), "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"\n💾 Baseline saved: {baseline_path(args.save_baseline)}")
+
+    if args.compare:
+        with open(baseline_path(args.compare), encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(summary, baseline, args.threshold):
+            print(f"\n❌ Regression beyond {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\n✅ Within {args.threshold:.0%} of baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # log_analyze.py
 
+import gzip
 import json
 import pandas as pd
 from pathlib import Path
@@ -9,8 +10,14 @@ log_path = Path(__file__).resolve().parent.parent / "logs" / "predictions.log"
 if not log_path.exists():
     raise FileNotFoundError(f"Prediction log not found at: {log_path}")
 
-with log_path.open("r", encoding="utf-8") as f:
-    rows = [json.loads(line.strip()) for line in f if line.strip()]
+# Rotated, gzipped logs first (oldest to newest), then the live file
+log_files = sorted(log_path.parent.glob(log_path.name + ".*.gz")) + [log_path]
+
+rows = []
+for path in log_files:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        rows.extend(json.loads(line.strip()) for line in f if line.strip())
 
 records = []
 
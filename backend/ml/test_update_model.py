@@ -0,0 +1,32 @@
+# test_update_model.py
+
+import copy
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.preprocessing import StandardScaler
+
+from update_model import rescale_thresholds
+
+
+def test_rescale_thresholds_keeps_parent_predictions():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 4)) * [1.0, 3.0, 0.5, 10.0] + [0.0, 2.0, -1.0, 50.0]
+    y = (X[:, 0] + X[:, 1] / 3 + rng.normal(scale=0.5, size=400) > 0.7).astype(int)
+
+    scaler = StandardScaler().fit(X)
+    parent = GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0)
+    parent.fit(scaler.transform(X), y)
+
+    # New bouts with a different mean and spread move the scaler
+    new_scaler = copy.deepcopy(scaler)
+    new_scaler.partial_fit(rng.normal(size=(150, 4)) * [2.0, 1.0, 1.5, 4.0] + [1.0, -1.0, 0.5, 40.0])
+    assert not np.allclose(new_scaler.mean_, scaler.mean_)
+
+    candidate = copy.deepcopy(parent)
+    rescale_thresholds(candidate, scaler, new_scaler)
+
+    np.testing.assert_array_equal(
+        candidate.predict_proba(new_scaler.transform(X)),
+        parent.predict_proba(scaler.transform(X)),
+    )
@@ -0,0 +1,219 @@
+# training_features.py
+"""
+Training data for mlp_model.py (and ml/tune.py): the fighter table, form /
+streak / opponent-strength columns, and the order-invariant feature matrix.
+
+Each fighter's last five UFC fights are exploded into one table. Opponent
+strength ((TD Def. + Str. Def) / 200) is computed once per fighter and
+joined onto it by name. The three scores are then array operations over a
+(fighters x 5) grid. The values are the same as the per-fighter helpers
+this replaces, which filtered the whole fighter frame once per opponent.
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+WINDOW = 5  # fights the form/streak/strength scores look at
+
+FEATURES = [
+    "SLpM_diff", "SApM_diff", "TD_Avg_diff", "TD_Def_diff", "Str_Acc_diff",
+    "Str_Def_diff", "Height_diff", "Reach_diff", "Recent_form_score_diff",
+    "Win_streak_score_diff", "Avg_opp_strength_diff", "TD_SApM_combo"
+]
+
+# Hand-tuned feature weights (saved as shap_feature_weights.npy)
+MANUAL_WEIGHTS = {
+    "SLpM_diff": 0.8,
+    "SApM_diff": 2.0,
+    "TD_Avg_diff": 1.0,
+    "TD_Def_diff": 4.0,
+    "Str_Acc_diff": 0.6,
+    "Str_Def_diff": 1.4,
+    "Height_diff": 0.6,
+    "Reach_diff": 0.8,
+    "Recent_form_score_diff": 2.0,
+    "Win_streak_score_diff": 1.5,
+    "Avg_opp_strength_diff": 1.0,
+    "TD_SApM_combo": 1.5
+}
+
+BASELINE_PARAMS = {
+    "n_estimators": 500,
+    "learning_rate": 0.03,
+    "max_depth": 4,
+    "subsample": 0.9,
+    "random_state": 42,
+}
+
+
+def load_fights(path) -> pd.DataFrame:
+    """data.csv with Winner as 0 (Red) / 1 (Blue); rows without a winner dropped."""
+    df = pd.read_csv(path)
+    df["Winner"] = df["Winner"].map({"Red": 0, "Blue": 1})
+    df.dropna(subset=["Winner"], inplace=True)
+    return df
+
+
+def fighter_table(fighter_data) -> pd.DataFrame:
+    """Career stats per fighter from ufc_fighters.json (entries that don't parse are skipped)."""
+    fighter_rows = []
+    for f in fighter_data:
+        try:
+            stats = f["stats"]
+            fighter_rows.append({
+                "name": f["name"],
+                "stance": f.get("stance", "Unknown"),
+                "weight": float(f["weight"].replace(" lbs.", "")) if "lbs" in f["weight"] else None,
+                "height": float(f["height"].replace("\"", "").replace("' ", ".")) * 2.54 if "'" in f["height"] else None,
+                "reach": float(f["reach"].replace("\"", "")) * 2.54 if f["reach"] else None,
+                "SLpM": float(stats.get("SLpM", "0")),
+                "SApM": float(stats.get("SApM", "0")),
+                "TD Avg.": float(stats.get("TD Avg.", "0")),
+                "TD Def.": float(stats.get("TD Def.", "0%").replace("%", "")),
+                "Str. Acc.": float(stats.get("Str. Acc.", "0%").replace("%", "")),
+                "Str. Def": float(stats.get("Str. Def", "0%").replace("%", ""))
+            })
+        except:
+            continue
+
+    fighters_df = pd.DataFrame(fighter_rows)
+    fighters_df["name_clean"] = fighters_df["name"].str.lower().str.strip()
+    return fighters_df
+
+
+def fight_table(fighter_data) -> pd.DataFrame:
+    """
+    One row per (fighter, pos) for the fighter's most recent WINDOW UFC fights,
+    pos 0 being the latest. A name listed twice keeps its last entry.
+    """
+    latest = {}
+    for f in fighter_data:
+        fights = [h for h in f.get("fight_history", []) if "UFC" in h.get("event", "")][:WINDOW]
+        latest[f["name"].lower().strip()] = fights
+    return pd.DataFrame(
+        [
+            (name, pos, h.get("opponent", "").lower().strip(), h.get("result", "").lower())
+            for name, fights in latest.items()
+            for pos, h in enumerate(fights)
+        ],
+        columns=["name_clean", "pos", "opponent", "result"],
+    )
+
+
+def add_form_features(fighters_df: pd.DataFrame, fights: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds recent_form_score, win_streak_score and avg_opp_strength:
+      recent_form_score  weighted mean of +1 (win) / -1 (anything else), weights 1.0 -> 0.2
+      win_streak_score   opponent strength summed over the leading run of wins, / 5
+      avg_opp_strength   mean opponent strength (0.5 for opponents not in the table)
+    Fighters without UFC fights get 0.0, 0.0 and 0.5.
+    """
+    # Opponent strength once per fighter; the first row wins for duplicated names
+    strength = pd.Series(((fighters_df["TD Def."] + fighters_df["Str. Def"]) / 200).to_numpy(),
+                         index=fighters_df["name_clean"])
+    strength = strength[~strength.index.duplicated(keep="first")]
+
+    names = pd.Index(fighters_df["name_clean"].unique())
+    row = names.get_indexer(fights["name_clean"])
+    fights = fights[row >= 0]
+    row, pos = row[row >= 0], fights["pos"].to_numpy()
+
+    played = np.zeros((len(names), WINDOW), dtype=bool)
+    won = np.zeros((len(names), WINDOW), dtype=bool)
+    opp_strength = np.zeros((len(names), WINDOW))
+    played[row, pos] = True
+    won[row, pos] = (fights["result"] == "win").to_numpy()
+    opp_strength[row, pos] = fights["opponent"].map(strength).fillna(0.5).to_numpy()
+    n = played.sum(axis=1)
+    has = n > 0
+
+    # np.linspace(1.0, 0.2, k) for a fighter with k fights, zero-padded
+    weights = np.zeros((WINDOW + 1, WINDOW))
+    for k in range(1, WINDOW + 1):
+        weights[k, :k] = np.linspace(1.0, 0.2, k)
+    w = weights[n]
+    scores = np.where(won, 1.0, -1.0) * played
+
+    form = np.zeros(len(names))
+    form[has] = (w[has] * scores[has]).sum(axis=1) / w[has].sum(axis=1)
+    leading_wins = np.cumprod(won & played, axis=1).astype(bool)
+    streak = np.where(leading_wins, opp_strength, 0.0).sum(axis=1) / 5
+    avg = np.full(len(names), 0.5)
+    avg[has] = opp_strength[has].sum(axis=1) / n[has]
+
+    idx = names.get_indexer(fighters_df["name_clean"])
+    fighters_df["recent_form_score"] = form[idx]
+    fighters_df["win_streak_score"] = streak[idx]
+    fighters_df["avg_opp_strength"] = avg[idx]
+    return fighters_df
+
+
+def safe_log(x, base=10):
+    return np.sign(x) * np.log1p(abs(x)) / np.log(base)
+
+
+def training_matrix(df: pd.DataFrame, fighters_df: pd.DataFrame, mark=None, return_rows=False):
+    """
+    Fights merged with both fighters' stats -> (X_full, y_full): the FEATURES
+    diffs for every fight plus its mirrored copy (negated features, flipped
+    label), so the model is order-invariant. y is 1 when the first fighter won.
+    With return_rows, also the df index label each X_full row came from.
+    """
+    mark = mark or (lambda stage: None)
+
+    # === Merge into fight DataFrame ===
+    df["source_row"] = df.index
+    df["R_fighter_clean"] = df["R_fighter"].str.lower().str.strip()
+    df["B_fighter_clean"] = df["B_fighter"].str.lower().str.strip()
+
+    r_stats = fighters_df.add_prefix("R_")
+    b_stats = fighters_df.add_prefix("B_")
+    df = df.merge(r_stats, left_on="R_fighter_clean", right_on="R_name_clean", how="left")
+    df = df.merge(b_stats, left_on="B_fighter_clean", right_on="B_name_clean", how="left")
+
+    # Encode stance
+    for col in ["R_stance", "B_stance"]:
+        df[col] = df[col].fillna("Unknown")
+        df[col] = LabelEncoder().fit_transform(df[col])
+
+    # Drop extra cols
+    drop_cols = [c for c in df.columns if "fighter" in c or "name" in c or c in ["Referee", "date", "location", "weight_class", "title_bout"]]
+    df.drop(columns=drop_cols, inplace=True)
+    df.dropna(inplace=True)
+    mark("merge")
+
+    # === Feature engineering ===
+    df["SLpM_diff"] = safe_log(df["R_SLpM"] - df["B_SLpM"])
+    df["SApM_diff"] = df["B_SApM"] - df["R_SApM"]  # raw now
+
+    df["TD_Avg_diff"] = safe_log(df["R_TD Avg."] - df["B_TD Avg."])
+    df["TD_Def_diff"] = (df["R_TD Def."] - df["B_TD Def."]) / 100  # no log/clamp
+
+    df["Str_Acc_diff"] = safe_log(df["R_Str. Acc."] - df["B_Str. Acc."])
+    df["Str_Def_diff"] = 0.5 * safe_log(df["R_Str. Def"] - df["B_Str. Def"])
+    df["Height_diff"] = 0.25 * (df["R_height"] - df["B_height"])
+    df["Reach_diff"] = 0.25 * (df["R_reach"] - df["B_reach"])
+    df["Recent_form_score_diff"] = df["R_recent_form_score"] - df["B_recent_form_score"]
+    df["Win_streak_score_diff"] = 0.4 * (df["R_win_streak_score"] - df["B_win_streak_score"])
+    df["Avg_opp_strength_diff"] = df["R_avg_opp_strength"] - df["B_avg_opp_strength"]
+
+    # NEW: Combo feature
+    combo = (df["B_SApM"] - df["R_SApM"]) * (df["R_TD Def."] - df["B_TD Def."]) / 100
+    df["TD_SApM_combo"] = combo
+
+    # Label: Red wins = 1
+    df["f1_won"] = (df["Winner"] == 0).astype(int)
+
+    # === Make order-invariant ===
+    df_swapped = df.copy()
+    for col in FEATURES:
+        df_swapped[col] = -df_swapped[col]
+    df_swapped["f1_won"] = 1 - df_swapped["f1_won"]
+
+    X_full = pd.concat([df[FEATURES], df_swapped[FEATURES]], ignore_index=True)
+    y_full = pd.concat([df["f1_won"], df_swapped["f1_won"]], ignore_index=True)
+    mark("feature engineering")
+    if return_rows:
+        return X_full, y_full, np.concatenate([df["source_row"].to_numpy()] * 2)
+    return X_full, y_full
@@ -0,0 +1,330 @@
+# tune.py
+"""
+Hyperparameter search for the mlp_model.py classifier.
+
+    python tune.py [--trials 27] [--workers 4] [--max-estimators 500] [--study default]
+
+Run from the directory holding data.csv and ufc_fighters.json, like
+mlp_model.py. The scaled training matrix (training_features.training_matrix
++ StandardScaler) is built once into ml/cache/ and reused until data.csv,
+ufc_fighters.json or training_features.py change. Workers open it with
+np.load(mmap_mode="r"), so every process reads the same pages and nothing is
+pickled to them but the trial parameters.
+
+Each trial samples GradientBoostingClassifier settings and a feature-weight
+vector (MANUAL_WEIGHTS scaled by 0.5x-2x per feature); trial 0 is the
+current mlp_model.py setup. Trials run through successive halving: all of
+them at the smallest n_estimators budget, the best third at three times
+that, and so on up to --max-estimators, each fit with early stopping
+(n_iter_no_change). Like mlp_model.py, models are fit on X * weights; they
+are scored on unweighted X, which is what the app feeds them.
+
+Every finished (trial, rung) is appended to ml/tuning/trials.jsonl; a rerun
+of the same study skips what is already there. The winner goes to
+ml/tuning/best.json along with its test-split score next to trial 0's.
+
+The test split is mlp_model.py's (stratified 20%, random_state=42). The
+validation split is carved out of the training rows by fight, so a fight
+and its mirrored copy are always on the same side.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils import compute_sample_weight
+
+from training_features import (
+    load_fights, fighter_table, fight_table, add_form_features, training_matrix,
+    FEATURES, MANUAL_WEIGHTS, BASELINE_PARAMS,
+)
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(ML_DIR, "cache")
+TUNING_DIR = os.path.join(ML_DIR, "tuning")
+TRIALS_PATH = os.path.join(TUNING_DIR, "trials.jsonl")
+BEST_PATH = os.path.join(TUNING_DIR, "best.json")
+
+ETA = 3                   # successive halving: keep 1/ETA per rung, ETA x the trees
+VAL_FRACTION = 0.2        # share of training fights held out for scoring trials
+LEAF_SIZES = [1, 5, 10, 20, 50]
+
+
+# === Cached training matrix ===
+
+def _sha256(paths) -> str:
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def build_matrix(data_path, fighters_path, cache_dir=CACHE_DIR) -> dict:
+    """Materializes X / y / split indices in cache_dir unless they're current. Returns the meta."""
+    key = _sha256([data_path, fighters_path, os.path.join(ML_DIR, "training_features.py")])
+    meta_path = os.path.join(cache_dir, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("key") == key:
+            print(f"📦 Cached matrix {key[:12]} ({meta['rows']} rows)")
+            return meta
+
+    t0 = time.perf_counter()
+    df = load_fights(data_path)
+    with open(fighters_path, "r", encoding="utf-8") as f:
+        fighter_data = json.load(f)
+    fighters_df = add_form_features(fighter_table(fighter_data), fight_table(fighter_data))
+    X_full, y_full = training_matrix(df, fighters_df)
+
+    scaler = StandardScaler()
+    X = np.ascontiguousarray(scaler.fit_transform(X_full))
+    y = y_full.to_numpy().astype(np.int8)
+
+    # Same rows as mlp_model.py's train_test_split(X_scaled, y_full, ...)
+    train_idx, test_idx = train_test_split(np.arange(len(X)), stratify=y, test_size=0.2, random_state=42)
+
+    # Row i and row i + n_fights are the same fight (training_matrix's mirrored copy)
+    n_fights = len(X) // 2
+    rng = np.random.default_rng(42)
+    val_fights = rng.random(n_fights) < VAL_FRACTION
+    in_val = val_fights[train_idx % n_fights]
+    fit_idx, val_idx = train_idx[~in_val], train_idx[in_val]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    for name, arr in [("X", X), ("y", y), ("fit", fit_idx), ("val", val_idx), ("test", test_idx)]:
+        np.save(os.path.join(cache_dir, f"{name}.npy"), arr)
+    meta = {
+        "key": key,
+        "rows": len(X),
+        "features": FEATURES,
+        "fit": len(fit_idx),
+        "val": len(val_idx),
+        "test": len(test_idx),
+        "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    tmp = meta_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, meta_path)  # meta last: a half-written cache is never "current"
+    print(f"📦 Built matrix {key[:12]} ({len(X)} rows) in {time.perf_counter() - t0:.1f}s")
+    return meta
+
+
+# === Search space ===
+
+def baseline_params() -> dict:
+    return {
+        "learning_rate": BASELINE_PARAMS["learning_rate"],
+        "max_depth": BASELINE_PARAMS["max_depth"],
+        "subsample": BASELINE_PARAMS["subsample"],
+        "min_samples_leaf": 1,
+        "weights": [MANUAL_WEIGHTS[f] for f in FEATURES],
+    }
+
+
+def sample_params(seed: int, trial: int) -> dict:
+    """Deterministic in (seed, trial), so a study can be resumed or extended."""
+    if trial == 0:
+        return baseline_params()
+    rng = np.random.default_rng([seed, trial])
+    base = np.array([MANUAL_WEIGHTS[f] for f in FEATURES])
+    return {
+        "learning_rate": round(float(10 ** rng.uniform(-2, math.log10(0.2))), 5),
+        "max_depth": int(rng.integers(2, 7)),
+        "subsample": round(float(rng.uniform(0.6, 1.0)), 3),
+        "min_samples_leaf": int(rng.choice(LEAF_SIZES)),
+        "weights": [round(float(w), 4) for w in base * np.exp(rng.uniform(-math.log(2), math.log(2), len(base)))],
+    }
+
+
+def rung_budgets(max_estimators: int, n_trials: int) -> list:
+    """n_estimators per rung, e.g. 500 over 27 trials -> [18, 55, 166, 500]."""
+    rungs = max(1, min(4, int(math.log(max(n_trials, 1), ETA)) + 1))
+    return [max(10, round(max_estimators / ETA ** k)) for k in reversed(range(rungs))]
+
+
+# === Workers ===
+
+_X = _y = _fit = _val = None
+
+
+def _open_matrix(cache_dir):
+    global _X, _y, _fit, _val
+    _X = np.load(os.path.join(cache_dir, "X.npy"), mmap_mode="r")
+    _y = np.load(os.path.join(cache_dir, "y.npy"), mmap_mode="r")
+    _fit = np.load(os.path.join(cache_dir, "fit.npy"))
+    _val = np.load(os.path.join(cache_dir, "val.npy"))
+
+
+def _model(params: dict, budget: int, patience: int) -> GradientBoostingClassifier:
+    return GradientBoostingClassifier(
+        n_estimators=budget,
+        learning_rate=params["learning_rate"],
+        max_depth=params["max_depth"],
+        subsample=params["subsample"],
+        min_samples_leaf=params["min_samples_leaf"],
+        n_iter_no_change=patience,
+        validation_fraction=0.1,
+        random_state=42,
+    )
+
+
+def _scores(clf, X, y) -> dict:
+    proba = clf.predict_proba(X)[:, 1]
+    return {
+        "log_loss": round(float(log_loss(y, proba, labels=[0, 1])), 5),
+        "accuracy": round(float(accuracy_score(y, proba >= 0.5)), 5),
+    }
+
+
+def run_trial(trial: int, rung: int, budget: int, params: dict, patience: int) -> dict:
+    t0 = time.perf_counter()
+    weights = np.asarray(params["weights"])
+    y_fit = np.asarray(_y[_fit])
+    clf = _model(params, budget, patience)
+    clf.fit(_X[_fit] * weights, y_fit, sample_weight=compute_sample_weight("balanced", y_fit))
+
+    X_val, y_val = _X[_val], np.asarray(_y[_val])
+    served = _scores(clf, X_val, y_val)
+    return {
+        "trial": trial,
+        "rung": rung,
+        "budget": budget,
+        "trees": int(clf.n_estimators_),
+        "val_log_loss": served["log_loss"],
+        "val_accuracy": served["accuracy"],
+        "val_log_loss_weighted": _scores(clf, X_val * weights, y_val)["log_loss"],
+        "params": params,
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+
+
+# === Trial log ===
+
+def load_trials(study: str, matrix_key: str) -> dict:
+    """(trial, rung) -> record for finished trials of this study on this matrix."""
+    done = {}
+    if not os.path.exists(TRIALS_PATH):
+        return done
+    with open(TRIALS_PATH, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted run
+            if rec.get("study") == study and rec.get("matrix") == matrix_key:
+                done[(rec["trial"], rec["rung"])] = rec
+    return done
+
+
+def append_trial(rec: dict):
+    with open(TRIALS_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec) + "\n")
+
+
+# === Search ===
+
+def successive_halving(args, meta) -> list:
+    os.makedirs(TUNING_DIR, exist_ok=True)
+    done = load_trials(args.study, meta["key"])
+    budgets = rung_budgets(args.max_estimators, args.trials)
+    candidates = list(range(args.trials))
+    print(f"🔎 Study '{args.study}': {args.trials} trials, rungs {budgets}, {args.workers} workers"
+          f" ({len(done)} results already logged)")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_open_matrix, initargs=(CACHE_DIR,)) as pool:
+        for rung, budget in enumerate(budgets):
+            results = [done[(t, rung)] for t in candidates if (t, rung) in done]
+            todo = [t for t in candidates if (t, rung) not in done]
+            t0 = time.perf_counter()
+            futures = [
+                pool.submit(run_trial, t, rung, budget, sample_params(args.seed, t), args.patience)
+                for t in todo
+            ]
+            for fut in as_completed(futures):
+                rec = {"study": args.study, "matrix": meta["key"], "seed": args.seed, **fut.result()}
+                append_trial(rec)
+                results.append(rec)
+
+            results.sort(key=lambda r: r["val_log_loss"])
+            best = results[0]
+            print(f"  rung {rung} ({budget:>4} trees): {len(todo)} run, {len(results) - len(todo)} cached,"
+                  f" best #{best['trial']} log loss {best['val_log_loss']:.4f}"
+                  f" in {time.perf_counter() - t0:.1f}s")
+            candidates = [r["trial"] for r in results[:max(1, len(results) // ETA)]]
+    return results
+
+
+def test_scores(params: dict, budget: int, patience: int) -> dict:
+    """Fit on all training rows (fit + val) and score the mlp_model.py test split."""
+    _open_matrix(CACHE_DIR)
+    test = np.load(os.path.join(CACHE_DIR, "test.npy"))
+    train = np.concatenate([_fit, _val])
+    weights = np.asarray(params["weights"])
+    y_train = np.asarray(_y[train])
+    clf = _model(params, budget, patience)
+    clf.fit(_X[train] * weights, y_train, sample_weight=compute_sample_weight("balanced", y_train))
+    return {**_scores(clf, _X[test], np.asarray(_y[test])), "trees": int(clf.n_estimators_)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving search over the training settings")
+    parser.add_argument("--data", default="data.csv")
+    parser.add_argument("--fighters", default="ufc_fighters.json")
+    parser.add_argument("--trials", type=int, default=27)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-estimators", type=int, default=BASELINE_PARAMS["n_estimators"])
+    parser.add_argument("--patience", type=int, default=20, help="n_iter_no_change for early stopping")
+    parser.add_argument("--study", default="default")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    meta = build_matrix(args.data, args.fighters)
+    results = successive_halving(args, meta)
+
+    print("\n🏆 Final rung:")
+    print(f"  {'trial':>5} {'trees':>5} {'log loss':>9} {'acc':>6}  lr       depth  sub   leaf")
+    for r in results[:10]:
+        p = r["params"]
+        print(f"  {r['trial']:>5} {r['trees']:>5} {r['val_log_loss']:>9.4f} {r['val_accuracy']:>6.3f}"
+              f"  {p['learning_rate']:<8} {p['max_depth']:<6} {p['subsample']:<5} {p['min_samples_leaf']}")
+
+    best = results[0]
+    print("\n🧪 Scoring best and baseline on the test split...")
+    best_test = test_scores(best["params"], args.max_estimators, args.patience)
+    base_test = test_scores(baseline_params(), args.max_estimators, args.patience)
+
+    out = {
+        "study": args.study,
+        "matrix": meta["key"],
+        "trial": best["trial"],
+        "params": {k: v for k, v in best["params"].items() if k != "weights"},
+        "n_estimators": best_test["trees"],
+        "weights": dict(zip(FEATURES, best["params"]["weights"])),
+        "val": {"log_loss": best["val_log_loss"], "accuracy": best["val_accuracy"]},
+        "test": best_test,
+        "baseline_test": base_test,
+    }
+    with open(BEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+
+    print(f"  best #{best['trial']}: log loss {best_test['log_loss']:.4f}, accuracy {best_test['accuracy']:.3f}")
+    print(f"  baseline: log loss {base_test['log_loss']:.4f}, accuracy {base_test['accuracy']:.3f}")
+    print(f"✅ Saved {BEST_PATH}")
+
+
+if __name__ == "__main__":
+    main()
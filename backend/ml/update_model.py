@@ -0,0 +1,276 @@
+# update_model.py
+"""
+Incremental model update from newly resolved fights.
+
+    python update_model.py [--bouts new_bouts.csv] [--stages 50] [--promote]
+
+Run from the directory holding data.csv and ufc_fighters.json, like
+mlp_model.py. Starts from the promoted registry version (or --parent) and
+only touches bouts resolved after the version's bouts_through date. Those
+come from the tracked predictions store, or from --bouts, a CSV in the
+data.csv layout.
+
+1. The new bouts go through training_features.training_matrix (with their
+   mirrored copies).
+2. The scaler's mean and variance are updated with StandardScaler.partial_fit.
+3. Every existing tree threshold is rewritten into the new scaled space
+   (x <= m + s*t  <=>  x' <= (m + s*t - m') / s'), so the old stages make
+   the same splits on raw stats as before.
+4. --stages new boosting stages are appended with warm_start. They are fit
+   on the input the API serves (unweighted scaled X), so they correct the
+   served model's residuals.
+5. The candidate and the parent are scored on mlp_model.py's test split of
+   data.csv. If log loss rises by more than --max-log-loss-increase, or
+   accuracy drops by more than --max-accuracy-drop, the update is dropped.
+   mlp_model.py then runs in full on data.csv plus every tracked bout after
+   it, in a temp dir, leaving out the holdout bouts so the retrain is scored
+   on the same holdout rows without having seen them. If it degrades the
+   holdout too, nothing is registered.
+
+Either way the result is registered as a new version (app/model_registry.py)
+with its parent, the bouts it saw and the holdout metrics in its manifest.
+"""
+
+import argparse
+import copy
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import train_test_split
+from sklearn.utils import compute_sample_weight
+
+from training_features import load_fights, fighter_table, fight_table, add_form_features, training_matrix
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(ML_DIR)
+sys.path.append(BACKEND_DIR)
+
+from app import model_registry
+from app.tracked_store import tracked_store, parse_card_date
+
+
+# === New bouts ===
+
+def tracked_bouts(since) -> pd.DataFrame:
+    """Resolved tracked fights after `since` (ISO date) as data.csv rows; draws and NCs are skipped."""
+    rows = []
+    for record in tracked_store.resolved_since(since):
+        winner = (record.get("actual_result") or "").lower().strip()
+        f1, f2 = record.get("fighter1") or "", record.get("fighter2") or ""
+        if winner not in (f1.lower().strip(), f2.lower().strip()):
+            continue
+        rows.append({
+            "R_fighter": f1,
+            "B_fighter": f2,
+            "Winner": "Red" if winner == f1.lower().strip() else "Blue",
+            "date": parse_card_date(record.get("date")),
+            "location": record.get("event"),
+        })
+    return pd.DataFrame(rows, columns=["R_fighter", "B_fighter", "Winner", "date", "location"])
+
+
+def load_bouts(path) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    return df[df["Winner"].isin(["Red", "Blue"])].reset_index(drop=True)
+
+
+# === Scaler / tree updates ===
+
+def rescale_thresholds(model, old_scaler, new_scaler):
+    """Rewrite every split threshold from old_scaler's space into new_scaler's."""
+    shift = (old_scaler.mean_ - new_scaler.mean_) / new_scaler.scale_
+    ratio = old_scaler.scale_ / new_scaler.scale_
+    for est in model.estimators_[:, 0]:
+        state = est.tree_.__getstate__()
+        nodes = state["nodes"].copy()
+        split = nodes["left_child"] != -1
+        f = nodes["feature"][split]
+        nodes["threshold"][split] = nodes["threshold"][split] * ratio[f] + shift[f]
+        state["nodes"] = nodes
+        est.tree_.__setstate__(state)
+
+
+def holdout_scores(model, scaler, X, y) -> dict:
+    proba = model.predict_proba(scaler.transform(X))[:, 1]
+    return {
+        "log_loss": round(float(log_loss(y, proba, labels=[0, 1])), 4),
+        "accuracy": round(float(accuracy_score(y, proba >= 0.5)), 4),
+    }
+
+
+def feature_drift(scaler, X, features, top=3) -> list:
+    """Features whose mean in the new bouts is furthest from the scaler's, in standard deviations."""
+    shift = np.abs((X.to_numpy().mean(axis=0) - scaler.mean_) / scaler.scale_)
+    order = np.argsort(-shift)[:top]
+    return [(features[i], round(float(shift[i]), 2)) for i in order]
+
+
+# === Full retrain fallback ===
+
+def full_retrain(data_path, fighters_path, extra, exclude=()):
+    """
+    mlp_model.py on data.csv (minus the rows labelled `exclude`) + the extra
+    bouts, in a temp dir. Returns (model, scaler, features, shap_weights,
+    training_info).
+    """
+    tmp = tempfile.mkdtemp(prefix="retrain-")
+    try:
+        data = pd.read_csv(data_path).drop(index=list(exclude))
+        # Tracked bouts only carry the columns training_matrix reads; fill the
+        # rest so its dropna() keeps them, while data.csv rows are dropped as before
+        extra = extra.assign(**{
+            c: 0 if pd.api.types.is_numeric_dtype(data[c]) else "" for c in data.columns if c not in extra
+        })
+        pd.concat([data, extra], ignore_index=True).to_csv(os.path.join(tmp, "data.csv"), index=False)
+        shutil.copy(fighters_path, os.path.join(tmp, "ufc_fighters.json"))
+        print(f"🔁 Full retrain on {len(data)} + {len(extra)} bouts ({len(exclude)} held out)...")
+        subprocess.run([sys.executable, os.path.join(ML_DIR, "mlp_model.py")], cwd=tmp, check=True,
+                       stdout=subprocess.DEVNULL)
+        with open(os.path.join(tmp, "training_info.json"), encoding="utf-8") as f:
+            info = json.load(f)
+        return (
+            joblib.load(os.path.join(tmp, "mlp_model.joblib")),
+            joblib.load(os.path.join(tmp, "scaler.joblib")),
+            pd.read_csv(os.path.join(tmp, "feature_list.csv"))["feature"].tolist(),
+            np.load(os.path.join(tmp, "shap_feature_weights.npy")),
+            info,
+        )
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def degrades(before: dict, after: dict, args) -> bool:
+    return (after["log_loss"] - before["log_loss"] > args.max_log_loss_increase
+            or before["accuracy"] - after["accuracy"] > args.max_accuracy_drop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the promoted model with newly resolved bouts")
+    parser.add_argument("--data", default="data.csv")
+    parser.add_argument("--fighters", default="ufc_fighters.json")
+    parser.add_argument("--parent", help="registry version to update (default: the promoted one)")
+    parser.add_argument("--bouts", help="CSV of new bouts in the data.csv layout (default: tracked predictions)")
+    parser.add_argument("--since", help="take tracked bouts after this date (default: parent's bouts_through)")
+    parser.add_argument("--stages", type=int, default=50, help="boosting stages to append")
+    parser.add_argument("--max-log-loss-increase", type=float, default=0.005)
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01)
+    parser.add_argument("--promote", action="store_true")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    parent = args.parent or model_registry.current_version()
+    if parent is None:
+        raise SystemExit("❌ No promoted model; register one first (python -m app.model_registry register ...)")
+    manifest = model_registry.read_manifest(parent)
+    path = model_registry.version_dir(parent)
+    model = joblib.load(os.path.join(path, "mlp_model.joblib"))
+    scaler = joblib.load(os.path.join(path, "scaler.joblib"))
+    weights = np.load(os.path.join(path, "shap_feature_weights.npy"))
+    features = manifest["features"]
+    if not hasattr(model, "estimators_") or type(model).__name__ != "GradientBoostingClassifier":
+        raise SystemExit(f"❌ {parent} is a {manifest['model_class']}; only GradientBoosting can be extended")
+
+    since = args.since or manifest["training"].get("bouts_through")
+    if args.bouts:
+        new_df, source = load_bouts(args.bouts), args.bouts
+    elif since:
+        new_df, source = tracked_bouts(since), f"tracked fights after {since}"
+    else:
+        raise SystemExit(f"❌ {parent} has no bouts_through date; pass --since or --bouts")
+    raw_bouts = new_df.copy()
+
+    with open(args.fighters, "r", encoding="utf-8") as f:
+        fighter_data = json.load(f)
+    fighters_df = add_form_features(fighter_table(fighter_data), fight_table(fighter_data))
+    new_df["Winner"] = new_df["Winner"].map({"Red": 0, "Blue": 1})
+    X_new, y_new = training_matrix(new_df.copy(), fighters_df)
+    X_new = X_new[features]
+    if X_new.empty:
+        print(f"✅ No new bouts with stats for both fighters in {source}; {parent} is current")
+        return
+    print(f"🆕 {len(X_new) // 2} new bouts for {parent} from {source}; "
+          f"largest shifts (sd): {feature_drift(scaler, X_new, features)}")
+
+    # Holdout: mlp_model.py's test split of data.csv
+    X_all, y_all, source_rows = training_matrix(load_fights(args.data), fighters_df, return_rows=True)
+    _, X_hold, _, y_hold = train_test_split(X_all[features], y_all, stratify=y_all, test_size=0.2, random_state=42)
+    hold_rows = X_hold.index
+    before = holdout_scores(model, scaler, X_hold, y_hold)
+
+    # Scaler stats, thresholds moved with them, then appended stages
+    new_scaler = copy.deepcopy(scaler)
+    new_scaler.partial_fit(X_new)
+    candidate = copy.deepcopy(model)
+    rescale_thresholds(candidate, scaler, new_scaler)
+    n_before = len(candidate.estimators_)
+    candidate.set_params(warm_start=True, n_estimators=n_before + args.stages, n_iter_no_change=None)
+    candidate.fit(new_scaler.transform(X_new), y_new, sample_weight=compute_sample_weight("balanced", y_new))
+    candidate.set_params(warm_start=False)
+    after = holdout_scores(candidate, new_scaler, X_hold, y_hold)
+    print(f"📊 Holdout log loss {before['log_loss']:.4f} → {after['log_loss']:.4f}, "
+          f"accuracy {before['accuracy']:.3f} → {after['accuracy']:.3f}")
+
+    if degrades(before, after, args):
+        print("⚠️ Update degrades the holdout; falling back to a full retrain")
+        if not args.bouts:
+            # Every tracked bout data.csv doesn't have yet, not just the ones since the parent
+            raw_bouts = tracked_bouts(str(pd.read_csv(args.data, usecols=["date"])["date"].max()))
+        # Either side of a bout in the holdout keeps the whole bout out of the retrain
+        held_out = np.unique(source_rows[hold_rows])
+        model_r, scaler_r, features_r, weights_r, info = full_retrain(args.data, args.fighters, raw_bouts, held_out)
+        retrained = holdout_scores(model_r, scaler_r, X_all.loc[hold_rows, features_r], y_hold)
+        print(f"📊 Full retrain holdout log loss {retrained['log_loss']:.4f}, accuracy {retrained['accuracy']:.3f}")
+        if degrades(before, retrained, args):
+            raise SystemExit(f"❌ The full retrain also degrades the holdout; nothing registered, {parent} stays")
+        new = model_registry.register(
+            model_r, scaler_r, features_r, weights_r,
+            training={**info.get("training", {}), "mode": "full_retrain", "extra_bouts": int(len(raw_bouts)),
+                      "held_out_bouts": int(len(held_out))},
+            metrics={
+                **info.get("metrics", {}),
+                "holdout_log_loss": retrained["log_loss"],
+                "holdout_accuracy": retrained["accuracy"],
+                "parent_holdout_log_loss": before["log_loss"],
+                "parent_holdout_accuracy": before["accuracy"],
+            },
+            parent=parent,
+        )
+    else:
+        dates = new_df["date"].dropna().astype(str)
+        new = model_registry.register(
+            candidate, new_scaler, features, weights,
+            training={
+                **manifest["training"],
+                "mode": "incremental",
+                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "new_bouts": int(len(X_new) // 2),
+                "stages_added": int(len(candidate.estimators_) - n_before),
+                "bouts_through": dates.max() if len(dates) else since,
+                "scaler_samples": int(np.max(new_scaler.n_samples_seen_)),
+            },
+            metrics={
+                "holdout_log_loss": after["log_loss"],
+                "holdout_accuracy": after["accuracy"],
+                "parent_holdout_log_loss": before["log_loss"],
+                "parent_holdout_accuracy": before["accuracy"],
+            },
+            parent=parent,
+        )
+
+    print(f"📦 Registered {new['version']} in {time.perf_counter() - t0:.1f}s")
+    if args.promote:
+        model_registry.promote(new["version"])
+        print(f"🚀 Promoted {new['version']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from fastapi.responses import JSONResponse
-from app.utils import get_fighter_stats, predict_match, fighters_df
+from app.utils import get_fighter_stats, predict_match, fighters_df, MODEL_VERSION
 
 router = APIRouter()
 
-MODEL_VERSION = "v1.2.3"
-
 class PredictRequest(BaseModel):
     fighter1: str
     fighter2: str
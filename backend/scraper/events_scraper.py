@@ -5,6 +5,8 @@ import json
 import os
 from datetime import datetime
 
+from run_stats import scraper_run, count_error
+
 headers = {'User-Agent': 'Mozilla/5.0'}
 DELAY = 1.0  # seconds between requests to be polite
 JSON_PATH = "upcoming_cards.json"
@@ -85,6 +87,7 @@ def scrape_upcoming_cards():
         try:
             cards.append(parse_event_card(event))
         except Exception as e:
+            count_error()
             print(f"❌ Failed to parse event: {event['event_name']} — {e}")
         time.sleep(DELAY)
     return cards
@@ -100,6 +103,7 @@ def load_existing(path):
             # If old file was a dict, convert to list safely
             return list(data.values())
     except Exception as e:
+        count_error()
         print(f"⚠️ Failed to read existing {path}: {e}")
         return []
 
@@ -113,6 +117,7 @@ def backup_file(path):
             dst.write(src.read())
         print(f"🗂️  Backup created: {bak}")
     except Exception as e:
+        count_error()
         print(f"⚠️ Failed to create backup: {e}")
 
 def upsert_cards(existing_list, fresh_list):
@@ -144,20 +149,21 @@ def upsert_cards(existing_list, fresh_list):
     return merged, added, updated
 
 if __name__ == "__main__":
-    print("🔎 Scraping upcoming events…")
-    fresh = scrape_upcoming_cards()
-    print(f"📥 Scraped {len(fresh)} upcoming events")
+    with scraper_run("events"):
+        print("🔎 Scraping upcoming events…")
+        fresh = scrape_upcoming_cards()
+        print(f"📥 Scraped {len(fresh)} upcoming events")
 
-    print("📖 Loading existing file…")
-    existing = load_existing(JSON_PATH)
-    print(f"🗃️ Existing events in file: {len(existing)}")
+        print("📖 Loading existing file…")
+        existing = load_existing(JSON_PATH)
+        print(f"🗃️ Existing events in file: {len(existing)}")
 
-    merged, added, updated = upsert_cards(existing, fresh)
-    print(f"➕ Added: {added}   ✏️ Updated: {updated}   🧮 Total after merge: {len(merged)}")
+        merged, added, updated = upsert_cards(existing, fresh)
+        print(f"➕ Added: {added}   ✏️ Updated: {updated}   🧮 Total after merge: {len(merged)}")
 
-    backup_file(JSON_PATH)
+        backup_file(JSON_PATH)
 
-    with open(JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(merged, f, indent=2, ensure_ascii=False)
+        with open(JSON_PATH, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2, ensure_ascii=False)
 
-    print(f"✅ Saved {JSON_PATH}")
+        print(f"✅ Saved {JSON_PATH}")
@@ -4,6 +4,8 @@ import json
 import os
 from datetime import datetime
 
+from run_stats import scraper_run, count_error
+
 JSON_PATH = "ufc_odds.json"
 
 def normalize_name(name: str) -> str:
@@ -22,6 +24,7 @@ def scrape_ufc_odds():
     table = soup.select_one(".oddstablev2 table")
     if not table:
         print("❌ Could not find odds table")
+        count_error()
         return odds_map
 
     for tbody in table.find_all("tbody"):
@@ -38,6 +41,7 @@ def scrape_ufc_odds():
             key = "|".join(sorted([f1, f2]))
             odds_map[key] = {f1: o1, f2: o2}
         except Exception as e:
+            count_error()
             print("⚠️ Error parsing a fight row:", e)
             continue
     return odds_map
@@ -49,6 +53,7 @@ def load_existing(path: str):
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception as e:
+        count_error()
         print(f"⚠️ Failed to read existing {path}: {e}")
         return {}
 
@@ -62,6 +67,7 @@ def backup_file(path: str):
             dst.write(src.read())
         print(f"🗂️  Backup created: {bak}")
     except Exception as e:
+        count_error()
         print(f"⚠️ Failed to create backup: {e}")
 
 def merge_odds(existing: dict, fresh: dict):
@@ -82,21 +88,22 @@ def merge_odds(existing: dict, fresh: dict):
     return merged, added, updated, unchanged
 
 if __name__ == "__main__":
-    print("🔎 Scraping latest odds…")
-    fresh_odds = scrape_ufc_odds()
-    print(f"📥 Scraped {len(fresh_odds)} fights")
+    with scraper_run("odds"):
+        print("🔎 Scraping latest odds…")
+        fresh_odds = scrape_ufc_odds()
+        print(f"📥 Scraped {len(fresh_odds)} fights")
 
-    print("📖 Loading existing JSON…")
-    existing = load_existing(JSON_PATH)
-    print(f"🗃️  Existing fights: {len(existing)}")
+        print("📖 Loading existing JSON…")
+        existing = load_existing(JSON_PATH)
+        print(f"🗃️  Existing fights: {len(existing)}")
 
-    merged, added, updated, unchanged = merge_odds(existing, fresh_odds)
-    print(f"➕ Added: {added}   ✏️ Updated: {updated}   ➖ Unchanged: {unchanged}")
-    print(f"🧮 Total in file after merge: {len(merged)}")
+        merged, added, updated, unchanged = merge_odds(existing, fresh_odds)
+        print(f"➕ Added: {added}   ✏️ Updated: {updated}   ➖ Unchanged: {unchanged}")
+        print(f"🧮 Total in file after merge: {len(merged)}")
 
-    backup_file(JSON_PATH)
+        backup_file(JSON_PATH)
 
-    with open(JSON_PATH, "w", encoding="utf-8") as f:
-        json.dump(merged, f, indent=2, ensure_ascii=False)
+        with open(JSON_PATH, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2, ensure_ascii=False)
 
-    print(f"✅ Saved {JSON_PATH}")
+        print(f"✅ Saved {JSON_PATH}")
@@ -0,0 +1,69 @@
+"""
+Run bookkeeping shared by the scrapers, exported by the API at /metrics.
+
+    with scraper_run("odds"):
+        ...                # call count_error() wherever a failure is logged and skipped
+
+Each run updates one entry of backend/logs/scraper_runs.json (runs, errors,
+durations, last finish time, whether the last run raised). The file is
+replaced atomically, so the API never reads a half-written one.
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+RUNS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logs", "scraper_runs.json")
+
+_errors = 0
+
+
+def count_error(n: int = 1):
+    global _errors
+    _errors += n
+
+
+def _load() -> dict:
+    try:
+        with open(RUNS_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(runs: dict):
+    directory = os.path.dirname(RUNS_PATH)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(runs, f, indent=2)
+    os.replace(tmp, RUNS_PATH)
+
+
+@contextmanager
+def scraper_run(name: str):
+    global _errors
+    _errors = 0
+    started = time.time()
+    success = False
+    try:
+        yield
+        success = True
+    finally:
+        duration = time.time() - started
+        runs = _load()
+        entry = runs.get(name, {})
+        entry["runs"] = entry.get("runs", 0) + 1
+        entry["errors"] = entry.get("errors", 0) + _errors + (0 if success else 1)
+        entry["total_duration_s"] = round(entry.get("total_duration_s", 0.0) + duration, 3)
+        entry["last_duration_s"] = round(duration, 3)
+        entry["last_errors"] = _errors + (0 if success else 1)
+        entry["last_finished"] = round(time.time(), 3)
+        entry["last_success"] = 1 if success else 0
+        runs[name] = entry
+        try:
+            _save(runs)
+        except OSError as e:
+            print(f"⚠️ Could not record scraper run: {e}")
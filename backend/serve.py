@@ -0,0 +1,55 @@
+# serve.py
+"""
+Multi-worker production entry point.
+
+    python serve.py --workers 4 --port 8000
+
+The fighter DB and model are built into a memory-mapped snapshot once (in a
+short-lived child process, so the supervisor itself stays small), then every
+uvicorn worker attaches to it through UFC_SNAPSHOT_DIR instead of parsing
+ufc_fighters.json and unpickling the model on its own.
+
+gunicorn works the same way once the snapshot exists:
+
+    python -m app.snapshot snapshot
+    UFC_SNAPSHOT_DIR=snapshot gunicorn -k uvicorn.workers.UvicornWorker -w 4 app.main:app
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def build_snapshot(out_dir: str):
+    env = dict(os.environ)
+    env.pop("UFC_SNAPSHOT_DIR", None)  # build from the JSON/joblib sources
+    subprocess.run([sys.executable, "-m", "app.snapshot", out_dir], cwd=BACKEND_DIR, env=env, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the prediction API with N workers sharing one snapshot")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--snapshot-dir", default=os.path.join(BACKEND_DIR, "snapshot"))
+    parser.add_argument("--reuse-snapshot", action="store_true",
+                        help="attach to an existing snapshot instead of rebuilding it")
+    args = parser.parse_args()
+
+    snapshot_dir = os.path.abspath(args.snapshot_dir)
+    if not (args.reuse_snapshot and os.path.exists(os.path.join(snapshot_dir, "manifest.json"))):
+        build_snapshot(snapshot_dir)
+
+    os.environ["UFC_SNAPSHOT_DIR"] = snapshot_dir
+    os.chdir(BACKEND_DIR)  # routes use backend-relative data/ and logs/ paths
+    sys.path.insert(0, BACKEND_DIR)
+
+    import uvicorn
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()